@@ -0,0 +1 @@
+"""Performance benchmarks for the template fillers (see benchmarks/bench_fillers.py)."""
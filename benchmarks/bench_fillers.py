@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Benchmark every template filler with realistic payloads.
+
+Usage:
+    python benchmarks/bench_fillers.py [--templates NAME ...] [--language zh] [--scale 1]
+                                       [--rounds 3] [--output results.json]
+                                       [--baseline baseline.json] [--max-regression 0.25]
+
+Each template in TemplateService.TEMPLATE_FILLER_MAPPING runs in its own
+subprocess, so peak RSS is attributable to that template alone. The subprocess
+renders the payload from benchmarks/payloads.py once cold (template parse, first
+imports) and then ``--rounds`` more times; every round references fresh image URLs
+on the local image server, so image download and normalisation are part of the
+measured path, as they are for distinct production requests.
+
+Recorded per template: cold and median/min/max warm render time, output size,
+peak RSS and the RSS before the first render. With ``--baseline`` (a previous
+``--output`` file) the run fails when median time, peak RSS or output size grows
+by more than ``--max-regression`` (a fraction), so filler regressions are caught
+before release.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from benchmarks.image_server import ImageServer  # noqa: E402
+from benchmarks.payloads import PAYLOAD_BUILDERS, build_payload  # noqa: E402
+
+# Metrics compared against the baseline (a higher value is a regression) and the
+# absolute growth below which a change is treated as noise
+COMPARED_METRICS = {"median_ms": 5.0, "peak_rss_mb": 2.0, "output_bytes": 0}
+# Distance between the image numbers of consecutive rounds
+IMAGE_NUMBERS_PER_ROUND = 100_000
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process in MiB (None where unsupported)."""
+    # VmHWM starts over on exec; ru_maxrss on Linux keeps the high-water mark of the
+    # parent that spawned us (which hosts the image server)
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_template(
+    template_name: str,
+    image_base_url: str,
+    language: str = "zh",
+    scale: int = 1,
+    rounds: int = 3,
+) -> Dict[str, Any]:
+    """Render one template ``rounds + 1`` times in this process and return its measurements."""
+    from src.config import settings
+    from src.domain.template_filler_service import TemplateService
+
+    # a private image cache: nothing left over from earlier runs on this machine
+    settings.image_cache_dir = tempfile.mkdtemp(prefix="ohc_bench_images_")
+    service = TemplateService()
+    payloads = [
+        build_payload(template_name, image_base_url, scale, language, image_start=i * IMAGE_NUMBERS_PER_ROUND)
+        for i in range(rounds + 1)
+    ]
+    baseline_rss = peak_rss_mb()
+
+    timings: List[float] = []
+    output_bytes = 0
+    for payload in payloads:
+        output = io.BytesIO()
+        started = time.perf_counter()
+        if not service.generate_document(template_name, payload, output, language):
+            raise RuntimeError(f"{template_name} ({language}) failed to render")
+        timings.append(time.perf_counter() - started)
+        output_bytes = len(output.getvalue())
+
+    warm = timings[1:] or timings
+    return {
+        "template": template_name,
+        "language": language,
+        "scale": scale,
+        "rounds": len(warm),
+        "cold_ms": round(timings[0] * 1000, 1),
+        "median_ms": round(statistics.median(warm) * 1000, 1),
+        "min_ms": round(min(warm) * 1000, 1),
+        "max_ms": round(max(warm) * 1000, 1),
+        "output_bytes": output_bytes,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_isolated(template_name: str, image_base_url: str, language: str, scale: int, rounds: int) -> Dict[str, Any]:
+    """Run ``run_template`` in a fresh interpreter so peak RSS belongs to this template only."""
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--worker", template_name,
+        "--image-base-url", image_base_url, "--language", language,
+        "--scale", str(scale), "--rounds", str(rounds),
+    ]
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{template_name} benchmark failed:\n{completed.stderr.strip()}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], max_regression: float) -> List[str]:
+    """Human-readable regressions of ``results`` against ``baseline``."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for metric, noise in COMPARED_METRICS.items():
+            old, new = previous.get(metric), current.get(metric)
+            if old and new is not None and new > old * (1 + max_regression) and new - old > noise:
+                regressions.append(f"{name}: {metric} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, Any]]) -> None:
+    print(f"{'template':<32} {'cold ms':>9} {'median ms':>10} {'min ms':>9} {'max ms':>9} {'output KiB':>11} {'peak RSS MiB':>13}")
+    for name, result in results.items():
+        print(
+            f"{name:<32} {result['cold_ms']:>9.1f} {result['median_ms']:>10.1f} {result['min_ms']:>9.1f} "
+            f"{result['max_ms']:>9.1f} {result['output_bytes'] / 1024:>11.1f} {result['peak_rss_mb'] or 0:>13.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--templates", nargs="+", choices=sorted(PAYLOAD_BUILDERS), default=list(PAYLOAD_BUILDERS))
+    parser.add_argument("--language", default="zh")
+    parser.add_argument("--scale", type=int, default=1, help="payload size multiplier (list lengths, table rows, images)")
+    parser.add_argument("--rounds", type=int, default=3, help="warm renders per template after the cold one")
+    parser.add_argument("--output", type=Path, help="write results as JSON (usable as a later --baseline)")
+    parser.add_argument("--baseline", type=Path, help="results JSON of a previous run to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed growth per metric, as a fraction")
+    parser.add_argument("--worker", metavar="TEMPLATE", help=argparse.SUPPRESS)
+    parser.add_argument("--image-base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    import warnings
+    warnings.simplefilter("ignore")
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.worker:
+        result = run_template(args.worker, args.image_base_url, args.language, args.scale, args.rounds)
+        print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    # read before running: --output may point at the same file
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"] if args.baseline else None
+    results: Dict[str, Dict[str, Any]] = {}
+    with ImageServer() as server:
+        for name in args.templates:
+            results[name] = run_isolated(name, server.base_url, args.language, args.scale, args.rounds)
+            print(f"  {name}: {results[name]['median_ms']} ms", file=sys.stderr, flush=True)
+    print_table(results)
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "language": args.language,
+            "scale": args.scale,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""
+In-process stand-in for MinIO, enough for the service's MinIOStorageService.
+
+Implements the S3 calls the ``minio`` client makes when the service starts and
+uploads a document: bucket location, bucket exists / create, single PUT uploads
+and multipart uploads (initiate, upload part, complete). Request signatures are
+not checked and object bodies are counted, then discarded, so a long load test
+does not hold every generated document in memory.
+"""
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+_XMLNS = "http://s3.amazonaws.com/doc/2006-03-01/"
+
+
+class FakeMinIOStats:
+    """Objects and bytes received (thread-safe)."""
+
+    def __init__(self) -> None:
+        self.buckets: Set[str] = set()
+        self.objects = 0
+        self.bytes = 0
+        self.uploads: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add_object(self, size: int) -> None:
+        with self._lock:
+            self.objects += 1
+            self.bytes += size
+
+
+class _FakeMinIOHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    stats: FakeMinIOStats
+
+    def _target(self) -> Tuple[str, str, Dict[str, list]]:
+        parts = urlsplit(self.path)
+        bucket, _, key = parts.path.lstrip("/").partition("/")
+        return bucket, key, parse_qs(parts.query, keep_blank_values=True)
+
+    def _read_body(self) -> int:
+        length = int(self.headers.get("Content-Length") or 0)
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1 << 16))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        return length
+
+    def _reply(self, status: int = 200, body: str = "", headers: Dict[str, str] = None) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data:
+            self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if data and self.command != "HEAD":
+            self.wfile.write(data)
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        bucket, key, query = self._target()
+        if not key and "location" in query:
+            self._reply(body=f'<LocationConstraint xmlns="{_XMLNS}"></LocationConstraint>')
+        else:
+            self._reply(404, f"<Error><Code>NoSuchKey</Code><Key>{key}</Key></Error>")
+
+    def do_HEAD(self) -> None:  # noqa: N802
+        bucket, key, _ = self._target()
+        self._reply(200 if not key and bucket in self.stats.buckets else 404)
+
+    def do_PUT(self) -> None:  # noqa: N802
+        bucket, key, query = self._target()
+        size = self._read_body()
+        if not key:
+            self.stats.buckets.add(bucket)
+            self._reply()
+        elif "uploadId" in query:
+            upload_id = query["uploadId"][0]
+            with self.stats._lock:
+                self.stats.uploads[upload_id] = self.stats.uploads.get(upload_id, 0) + size
+            self._reply(headers={"ETag": f'"{uuid.uuid4().hex}"'})
+        else:
+            self.stats.add_object(size)
+            self._reply(headers={"ETag": f'"{uuid.uuid4().hex}"'})
+
+    def do_POST(self) -> None:  # noqa: N802
+        bucket, key, query = self._target()
+        self._read_body()
+        if "uploads" in query:
+            upload_id = uuid.uuid4().hex
+            with self.stats._lock:
+                self.stats.uploads[upload_id] = 0
+            self._reply(body=(
+                f'<InitiateMultipartUploadResult xmlns="{_XMLNS}"><Bucket>{bucket}</Bucket>'
+                f"<Key>{key}</Key><UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            ))
+        elif "uploadId" in query:
+            with self.stats._lock:
+                size = self.stats.uploads.pop(query["uploadId"][0], 0)
+            self.stats.add_object(size)
+            self._reply(body=(
+                f'<CompleteMultipartUploadResult xmlns="{_XMLNS}"><Bucket>{bucket}</Bucket>'
+                f'<Key>{key}</Key><ETag>"{uuid.uuid4().hex}"</ETag></CompleteMultipartUploadResult>'
+            ))
+        else:
+            self._reply(400)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class FakeMinIO:
+    """Fake MinIO endpoint on 127.0.0.1; use as a context manager."""
+
+    access_key = "bench-access-key"
+    secret_key = "bench-secret-key"
+
+    def __init__(self, port: int = 0):
+        self.stats = FakeMinIOStats()
+        handler = type("Handler", (_FakeMinIOHandler,), {"stats": self.stats})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-fake-minio", daemon=True)
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def __enter__(self) -> "FakeMinIO":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
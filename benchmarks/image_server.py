@@ -0,0 +1,93 @@
+"""
+Local HTTP stand-in for the image hosts referenced by rich fields.
+
+Serves ``/photo/<n>.jpg`` (a large camera-sized JPEG that the normaliser has to
+shrink) and ``/icon/<n>.png`` (a small transparent PNG). Every ``<n>`` yields a
+slightly different image, so content-hash de-duplication in the image cache does
+not collapse them into one download.
+"""
+import io
+import random
+import threading
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from PIL import Image
+
+PHOTO_SIZE = (2400, 1600)
+ICON_SIZE = (320, 240)
+
+
+@lru_cache(maxsize=None)
+def _base_image(kind: str) -> Image.Image:
+    rng = random.Random(kind)
+    if kind == "photo":
+        width, height = PHOTO_SIZE
+        # coarse noise over a gradient compresses like a real photo, unlike a flat fill
+        tile = Image.new("RGB", (width // 8, height // 8))
+        tile.putdata([
+            (x * 255 // (width // 8), y * 255 // (height // 8), rng.randint(0, 255))
+            for y in range(height // 8) for x in range(width // 8)
+        ])
+        return tile.resize(PHOTO_SIZE, Image.NEAREST)
+    return Image.new("RGBA", ICON_SIZE, (0, 120, 200, 128))
+
+
+@lru_cache(maxsize=1024)
+def render_image(kind: str, number: int) -> Tuple[bytes, str]:
+    """Encoded bytes and content type of image ``number`` of ``kind``."""
+    image = _base_image(kind).copy()
+    # a per-image marker block keeps every URL's content distinct
+    image.paste((number * 37 % 256, number * 91 % 256, number * 13 % 256), (0, 0, 32, 32))
+    buffer = io.BytesIO()
+    if kind == "photo":
+        image.save(buffer, format="JPEG", quality=90)
+        return buffer.getvalue(), "image/jpeg"
+    image.save(buffer, format="PNG")
+    return buffer.getvalue(), "image/png"
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802 - http.server API
+        parsed = self._parse_path()
+        if parsed is None:
+            self.send_error(404)
+            return
+        body, content_type = render_image(*parsed)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _parse_path(self) -> Optional[Tuple[str, int]]:
+        parts = self.path.split("?", 1)[0].strip("/").split("/")
+        if len(parts) != 2 or parts[0] not in ("photo", "icon"):
+            return None
+        number = parts[1].split(".", 1)[0]
+        return (parts[0], int(number)) if number.isdigit() else None
+
+    def log_message(self, format: str, *args) -> None:  # keep benchmark output clean
+        pass
+
+
+class ImageServer:
+    """Threaded image server on 127.0.0.1; use as a context manager."""
+
+    def __init__(self, port: int = 0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _ImageHandler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="bench-image-server", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "ImageServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.shutdown()
+        self._server.server_close()
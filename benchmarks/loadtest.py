@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Load-test the HTTP API's /generate/* endpoints.
+
+Usage:
+    python benchmarks/loadtest.py [--url http://host:8000] [--storage local|minio]
+                                  [--mix PROJECT_PLAN=1,DHF_INDEX=3 ...] [--concurrency 8]
+                                  [--duration 60 | --requests N] [--warmup 5]
+                                  [--server-workers 1] [--output report.json]
+
+Without ``--url`` the service is started locally (uvicorn in a subprocess, auth
+off) with a generated config: ``--storage local`` keeps documents in a temporary
+directory through LocalStorageService, ``--storage minio`` points
+MinIOStorageService at an in-process fake MinIO (benchmarks/fake_minio.py).
+Payloads come from benchmarks/payloads.py; their images are served by the local
+image server and, unless ``--reuse-images``, every request references fresh ones.
+
+``--concurrency`` clients send requests back to back, picking the template by the
+weights in ``--mix``. Requests started during ``--warmup`` are not counted. The
+report (stdout table; JSON with ``--output``) gives per template and overall:
+throughput, p50/p95/p99/max latency, error rate and HTTP status counts (503 means
+the executor queue was full). For a local server it also gives the CPU time the
+server spent, as cores used and CPU ms per request: replicas for a target rate are
+roughly target_rps / throughput_rps of one replica at an acceptable p95, and the
+CPU request per replica roughly cpu.cores at that load.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from benchmarks.fake_minio import FakeMinIO  # noqa: E402
+from benchmarks.image_server import ImageServer  # noqa: E402
+from benchmarks.payloads import build_payload  # noqa: E402
+
+# Template -> dedicated endpoint (src/interfaces/routers/generate.py)
+ROUTES = {
+    "DHF_INDEX": "/generate/dhf-index",
+    "PTF_INDEX": "/generate/ptf-index",
+    "INDIVIDUAL_TEST_SPEC": "/generate/individual-test-spec",
+    "INDIVIDUAL_TEST_RESULT": "/generate/individual-test-result",
+    "VERIFICATION_PLAN": "/generate/verification-plan",
+    "VERIFICATION_RESULT": "/generate/verification-result",
+    "BASIC_SPECIFICATION": "/generate/basic-specification",
+    "LABELING_SPECIFICATION": "/generate/labeling-specification",
+    "PRODUCT_ENVIRONMENT_ASSESSMENT": "/generate/product-environment-assessment",
+    "PACKAGING_DESIGN_SPECIFICATION": "/generate/packaging-design-specification",
+    "USER_MANUAL_SPECIFICATION": "/generate/user-manual-specification",
+    "PROJECT_PLAN": "/generate/project-plan",
+}
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass
+class Sample:
+    """One request: when it started (seconds from the run start), its outcome and latency."""
+    template: str
+    started: float
+    latency: float
+    status: str
+    ok: bool
+
+
+def parse_mix(specs: Optional[List[str]]) -> Dict[str, float]:
+    """``["A=2,B", "C=0.5"]`` -> ``{"A": 2.0, "B": 1.0, "C": 0.5}``; empty means every template once."""
+    if not specs:
+        return {name: 1.0 for name in ROUTES}
+    mix: Dict[str, float] = {}
+    for spec in specs:
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            name, _, weight = item.partition("=")
+            if name not in ROUTES:
+                raise ValueError(f"unknown template {name!r}; choose from {', '.join(ROUTES)}")
+            mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("the template mix needs at least one positive weight")
+    return mix
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(index, len(sorted_values) - 1)]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """Throughput, latency percentiles (ms), error rate and status counts of ``samples``."""
+    latencies = sorted(sample.latency * 1000 for sample in samples)
+    errors = sum(1 for sample in samples if not sample.ok)
+    statuses: Dict[str, int] = {}
+    for sample in samples:
+        statuses[sample.status] = statuses.get(sample.status, 0) + 1
+    summary: Dict[str, Any] = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / elapsed, 3) if elapsed > 0 else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "latency_ms": None,
+    }
+    if latencies:
+        summary["latency_ms"] = {f"p{pct}": round(percentile(latencies, pct), 1) for pct in PERCENTILES}
+        summary["latency_ms"]["mean"] = round(sum(latencies) / len(latencies), 1)
+        summary["latency_ms"]["max"] = round(latencies[-1], 1)
+    return summary
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: Dict[str, float],
+    make_payload,
+    concurrency: int = 4,
+    duration: Optional[float] = None,
+    requests: Optional[int] = None,
+    warmup: float = 0.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Drive the API with ``concurrency`` clients until ``duration`` seconds (after the
+    warm-up) have passed or ``requests`` requests have been counted.
+
+    ``make_payload(template)`` builds the request body; it runs before a request's
+    clock starts.
+    """
+    if duration is None and requests is None:
+        raise ValueError("give a duration or a request count")
+    rng = random.Random(seed)
+    templates, weights = list(mix), list(mix.values())
+    samples: List[Sample] = []
+    issued = 0
+    run_start = time.perf_counter()
+    deadline = run_start + warmup + duration if duration is not None else None
+
+    async def worker() -> None:
+        nonlocal issued
+        while deadline is None or time.perf_counter() < deadline:
+            template = rng.choices(templates, weights)[0]
+            body = make_payload(template)
+            started = time.perf_counter()
+            counted = started - run_start >= warmup
+            if counted:
+                if requests is not None and issued >= requests:
+                    return
+                issued += 1
+            try:
+                response = await client.post(ROUTES[template], json=body)
+                status = str(response.status_code)
+                ok = response.status_code == 200 and bool(response.json().get("success"))
+            except httpx.HTTPError as e:
+                status, ok = f"error:{type(e).__name__}", False
+            finished = time.perf_counter()
+            if counted:
+                samples.append(Sample(template, started - run_start, finished - started, status, ok))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - run_start - warmup
+    by_template: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        by_template.setdefault(sample.template, []).append(sample)
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "overall": summarize(samples, elapsed),
+        "templates": {name: summarize(by_template[name], elapsed) for name in mix if name in by_template},
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _process_tree(pid: int) -> List[int]:
+    """``pid`` and its live descendants (Linux /proc)."""
+    parents: Dict[int, int] = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                fields = (entry / "stat").read_text().rsplit(")", 1)[1].split()
+            except OSError:
+                continue
+            parents[int(entry.name)] = int(fields[1])
+    tree, frontier = [pid], [pid]
+    while frontier:
+        children = [child for child, parent in parents.items() if parent in frontier]
+        tree.extend(children)
+        frontier = children
+    return tree
+
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """User + system CPU seconds of ``pid`` and its descendants; None where /proc is unavailable."""
+    if not Path(f"/proc/{pid}/stat").exists():
+        return None
+    ticks = 0
+    for member in _process_tree(pid):
+        try:
+            fields = Path(f"/proc/{member}/stat").read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        ticks += int(fields[11]) + int(fields[12])  # utime, stime
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+
+def _config_toml(storage: str, workdir: Path, minio_endpoint: Optional[str], args: argparse.Namespace) -> str:
+    lines = [f'[storage]\ntype = "{storage}"']
+    if storage == "minio":
+        lines.append(
+            f'[storage.minio]\nendpoint = "{minio_endpoint}"\naccess_key = "{FakeMinIO.access_key}"\n'
+            f'secret_key = "{FakeMinIO.secret_key}"\nbucket_name = "bench"\nsecure = false'
+        )
+    else:
+        lines.append(f'[storage.local]\npath = "{(workdir / "files").as_posix()}"')
+    lines.append(f"[executor]\nmax_workers = {args.executor_workers}\nmax_queue = {args.executor_queue}")
+    lines.append(f'[templates]\nbase_path = "{(ROOT / "static" / "templates").as_posix()}"')
+    lines.append(f'[images]\ncache_dir = "{(workdir / "image_cache").as_posix()}"')
+    lines.append("[auth.sso]\nenabled = false\n[auth.api_key]\nenabled = false")
+    return "\n\n".join(lines) + "\n"
+
+
+class LocalServer:
+    """The service under uvicorn in a subprocess, configured for the load test."""
+
+    def __init__(self, args: argparse.Namespace, minio_endpoint: Optional[str] = None):
+        self.workdir = Path(tempfile.mkdtemp(prefix="ohc_loadtest_"))
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        # Settings reads config/config.toml relative to the working directory
+        (self.workdir / "config").mkdir()
+        (self.workdir / "config" / "config.toml").write_text(
+            _config_toml(args.storage, self.workdir, minio_endpoint, args), encoding="utf-8"
+        )
+        self.env = dict(os.environ)
+        self.env.pop("SKIP_INFRA_INIT", None)
+        self.command = [
+            sys.executable, "-m", "uvicorn", "src.main:app", "--app-dir", str(ROOT),
+            "--host", "127.0.0.1", "--port", str(self.port),
+            "--workers", str(args.server_workers), "--log-level", "warning",
+        ]
+        self.log_path = self.workdir / "server.log"
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> "LocalServer":
+        with open(self.log_path, "wb") as log:
+            self.process = subprocess.Popen(
+                self.command, cwd=self.workdir, env=self.env, stdout=log, stderr=subprocess.STDOUT
+            )
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.process.returncode}, see {self.log_path}")
+            try:
+                if httpx.get(f"{self.url}/health", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"server did not become healthy within 60s, see {self.log_path}")
+
+    def __exit__(self, *exc_info) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+def _payload_factory(image_base_url: str, scale: int, reuse_images: bool):
+    cached: Dict[str, Dict[str, Any]] = {}
+    numbers: Iterator[int] = iter(range(1, sys.maxsize))
+
+    def make_payload(template: str) -> Dict[str, Any]:
+        if reuse_images:
+            if template not in cached:
+                cached[template] = build_payload(template, image_base_url, scale)
+            return cached[template]
+        return build_payload(template, image_base_url, scale, image_start=next(numbers) * 1000)
+
+    return make_payload
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"{'template':<32} {'req':>6} {'rps':>8} {'err %':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    rows = list(report["templates"].items()) + [("OVERALL", report["overall"])]
+    for name, summary in rows:
+        latency = summary["latency_ms"] or {}
+        print(
+            f"{name:<32} {summary['requests']:>6} {summary['throughput_rps']:>8.2f} {summary['error_rate'] * 100:>6.1f} "
+            + " ".join(f"{latency.get(key, 0):>9.1f}" for key in ("p50", "p95", "p99", "max"))
+        )
+    if report.get("cpu"):
+        cpu = report["cpu"]
+        print(f"server CPU: {cpu['seconds']} s, {cpu['cores']} cores, {cpu['ms_per_request']} ms/request")
+
+
+async def _run(args: argparse.Namespace, base_url: str, image_base_url: str, server_pid: Optional[int]) -> Dict[str, Any]:
+    mix = parse_mix(args.mix)
+    headers = {"x-api-key": args.api_key} if args.api_key else {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, timeout=args.timeout, limits=limits) as client:
+        cpu_before = cpu_seconds(server_pid) if server_pid else None
+        report = await run_load(
+            client, mix, _payload_factory(image_base_url, args.scale, args.reuse_images),
+            concurrency=args.concurrency, duration=args.duration, requests=args.requests,
+            warmup=args.warmup, seed=args.seed,
+        )
+        cpu_after = cpu_seconds(server_pid) if server_pid else None
+    report["cpu"] = None
+    if cpu_before is not None and cpu_after is not None:
+        # includes the warm-up: CPU time cannot be split by request start time
+        busy = cpu_after - cpu_before
+        total = report["elapsed_s"] + args.warmup
+        report["cpu"] = {
+            "seconds": round(busy, 2),
+            "cores": round(busy / total, 3) if total > 0 else None,
+            "ms_per_request": round(busy * 1000 / report["overall"]["requests"], 1) if report["overall"]["requests"] else None,
+        }
+    report["config"] = {
+        "target": args.url or f"local ({args.storage})",
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "duration_s": args.duration,
+        "requests": args.requests,
+        "warmup_s": args.warmup,
+        "scale": args.scale,
+        "reuse_images": args.reuse_images,
+        "server_workers": None if args.url else args.server_workers,
+        "executor_workers": None if args.url else args.executor_workers,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="base URL of a running service (default: start one locally)")
+    parser.add_argument("--api-key", help="x-api-key header for --url targets with auth enabled")
+    parser.add_argument("--storage", choices=("local", "minio"), default="local", help="storage of the local server")
+    parser.add_argument("--mix", nargs="*", help="template weights, e.g. PROJECT_PLAN=1,DHF_INDEX=3 (default: all equally)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, help="seconds to measure after the warm-up (default 60)")
+    parser.add_argument("--requests", type=int, help="stop after this many counted requests")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds of requests not counted")
+    parser.add_argument("--scale", type=int, default=1, help="payload size multiplier (see benchmarks/payloads.py)")
+    parser.add_argument("--reuse-images", action="store_true", help="send the same payload per template (warm image cache)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout (seconds)")
+    parser.add_argument("--seed", type=int, help="seed for the template choice")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes of the local server")
+    parser.add_argument("--executor-workers", type=int, default=4, help="executor.max_workers of the local server")
+    parser.add_argument("--executor-queue", type=int, default=16, help="executor.max_queue of the local server")
+    parser.add_argument("--output", type=Path, help="write the report as JSON")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 60.0
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with ImageServer() as images:
+        if args.url:
+            report = asyncio.run(_run(args, args.url, images.base_url, None))
+        elif args.storage == "minio":
+            with FakeMinIO() as minio, LocalServer(args, minio.endpoint) as server:
+                report = asyncio.run(_run(args, server.url, images.base_url, server.process.pid))
+                report["storage"] = {"objects": minio.stats.objects, "bytes": minio.stats.bytes}
+        else:
+            with LocalServer(args) as server:
+                report = asyncio.run(_run(args, server.url, images.base_url, server.process.pid))
+
+    print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
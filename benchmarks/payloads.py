@@ -0,0 +1,288 @@
+"""
+Synthetic but realistic request payloads for every template filler.
+
+Each builder returns the ``parameters`` dict that ``TemplateService.generate_document``
+receives for one template. The shape follows the request schemas in
+src/interfaces/schemas/templates.py; the size is driven by ``scale`` so the same
+payloads cover both everyday and worst-case requests:
+
+- rich fields mix long paragraphs, large Markdown / HTML tables and inline images
+- images point at the local image server (see benchmarks/image_server.py); every
+  URL is distinct so neither the image cache nor content de-duplication hides the
+  download and normalisation cost
+- ``file_list`` / ``file_number_map`` / ``related_file_info`` are long lists whose
+  short names are taken from the template itself, so a realistic share of entries
+  actually matches rows instead of being skipped
+"""
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from openpyxl import load_workbook
+
+STAGES = ("DR1", "DR2", "DR3", "DR4", "DR5")
+
+PARAGRAPH = (
+    "本试验依据 IEC 60601-1 第3版及 JIS T 0601-1:2017 进行评价，样品数 n=5，"
+    "在 23±2℃ / 50±10%RH 环境下测量。Measured values are recorded per sample and axis. "
+)
+
+BASE = {
+    "project_number": "PRJ-2025-001",
+    "version": "1.0",
+    "date": "2025-06-01",
+    "author": "评价担当",
+    "theme_no": "T-1234",
+    "theme_name": "血压计新机种",
+    "product_model": "HEM-7600T/HEM-7601T/HEM-7602T",
+    "sales_name": "上臂式电子血压计/BP-Plus/BP-Lite",
+    "product_model_name": "HEM-7600T",
+    "product_name": "电子血压计",
+}
+
+
+class ImageUrls:
+    """Hands out distinct image URLs served by the local image server."""
+
+    def __init__(self, base_url: str, start: int = 0):
+        self.base_url = base_url.rstrip("/")
+        self.count = start
+
+    def next(self, kind: str = "photo") -> str:
+        self.count += 1
+        suffix = "jpg" if kind == "photo" else "png"
+        return f"{self.base_url}/{kind}/{self.count}.{suffix}"
+
+
+def markdown_table(rows: int, columns: int = 4) -> str:
+    header = ["No", "试验项目", "条件", "判定"] + [f"备注{i}" for i in range(columns - 4)]
+    lines = ["| " + " | ".join(header[:columns]) + " |", "|" + "---|" * columns]
+    for row in range(rows):
+        cells = [str(row + 1), f"试验项目 {row + 1}", f"{40 + row % 20}℃ 90%RH 持续 {24 * (row % 5 + 1)}h 后确认外观与功能", "合格"]
+        cells += [f"note {row}-{i}" for i in range(columns - 4)]
+        lines.append("| " + " | ".join(cells[:columns]) + " |")
+    return "\n".join(lines)
+
+
+def html_table(rows: int) -> str:
+    body = []
+    for row in range(rows):
+        if row % 4 == 0:
+            body.append(f'<tr><td rowspan="2">{row + 1}</td><td>耐压 1500V AC 1min</td><td>OK</td></tr>')
+        elif row % 4 == 1:
+            body.append("<tr><td>绝缘电阻 500V DC ≥100MΩ</td><td>OK</td></tr>")
+        else:
+            body.append(f"<tr><td>{row + 1}</td><td>漏电流 {row * 3}µA</td><td>OK</td></tr>")
+    return "<table><tr><th>No</th><th>测试项</th><th>结果</th></tr>" + "".join(body) + "</table>"
+
+
+def rich_text(images: ImageUrls, scale: int) -> str:
+    """A multi-part field: numbered steps, a large table, inline and standalone images."""
+    parts = ["1. 准备试验样品，确认外观无异常。", "2. 按下述条件实施试验：", markdown_table(12 * scale)]
+    for i in range(2 * scale):
+        parts.append(f"![fig{i}]({images.next('photo')})")
+        parts.append(f"{i + 3}. 试验后确认功能正常。" + PARAGRAPH * 3)
+    parts.append(f"参考图 {images.next('icon')} 与 <img src=\"{images.next('photo')}\"> 为试验布置。")
+    parts.append(html_table(6 * scale))
+    parts.append("以上。")
+    return "\n".join(parts)
+
+
+@lru_cache(maxsize=None)
+def template_names(template_name: str, language: str = "zh", limit: int = 200) -> Tuple[str, ...]:
+    """Short texts from the template's first sheet, used as realistic short names."""
+    from src.domain.template_filler_service import TemplateService
+
+    path: Optional[Path] = TemplateService().get_template_path(template_name, None, language)
+    if path is None or path.suffix != ".xlsx":
+        return ()
+    worksheet = load_workbook(path, read_only=True).worksheets[0]
+    names: List[str] = []
+    for row in worksheet.iter_rows(values_only=True):
+        for value in row:
+            if isinstance(value, str) and 2 <= len(value.strip()) <= 30 and "{" not in value:
+                names.append(value.strip())
+    return tuple(dict.fromkeys(names))[:limit]
+
+
+def file_entries(template_name: str, count: int, language: str = "zh") -> List[Dict[str, str]]:
+    """A long file list: about half the entries match template rows, some share a name."""
+    names = template_names(template_name, language) or ["产品要件书", "要求仕样书", "风险管理报告书"]
+    entries = []
+    for i in range(count):
+        if i % 2 == 0:
+            short_name = names[(i // 2) % len(names)]
+            if i % 10 == 0:
+                short_name += "|" + names[(i // 2 + 1) % len(names)]
+        else:
+            short_name = f"未登记文件 {i}"
+        entries.append({
+            "file_number": f"DOC-{i:05d}",
+            "short_name": short_name,
+            "stage": STAGES[i % len(STAGES)],
+            "version": f"{i % 3 + 1}.0",
+        })
+    return entries
+
+
+def _individual_test_spec(images: ImageUrls, scale: int, language: str) -> Dict[str, Any]:
+    return dict(
+        BASE,
+        test_name="高温高湿试验",
+        test_number="TS-001",
+        meas_temperature="23℃",
+        meas_humidity="50%",
+        test_purpose="确认产品在高温高湿环境下的可靠性。" * 3,
+        test_conditions=rich_text(images, scale),
+        test_method=rich_text(images, scale),
+        others="无特别事项\n- 注意事项A\n- 注意事项B",
+        admission_decision_standard=markdown_table(8 * scale),
+        source="IEC 60601-1\nJIS T 0601-1",
+    )
+
+
+def _verification_plan(images: ImageUrls, scale: int, language: str) -> Dict[str, Any]:
+    return dict(
+        BASE,
+        condition="常温",
+        doubt_condition="无",
+        verification_plan="VP-001",
+        test_list=[
+            {
+                "test_number": f"T-{i:04d}",
+                "test_name": f"试验{i}",
+                "requirement_and_standard": "IEC 60601-1 / IEC 80601-2-30",
+                "individual_test_spec_number": f"S-{i}",
+                "individual_test_result_number": f"R-{i}",
+            }
+            for i in range(40 * scale)
+        ],
+    )
+
+
+def _basic_specification(images: ImageUrls, scale: int, language: str) -> Dict[str, Any]:
+    table = markdown_table(10 * scale)
+    return dict(
+        BASE,
+        production_area="OMD",
+        reference_document="\n".join(f"参考文件 {i}" for i in range(10 * scale)),
+        scope="适用于本机种",
+        definition_term_table=markdown_table(6 * scale, columns=4),
+        use_purpose="**测量**血压与脉搏\n- 家庭用\n- 医疗用",
+        intended_patients="成人",
+        intended_user="患者本人",
+        environment="家庭",
+        use_type="诊断辅助",
+        component_table=table,
+        appearance_image=str([images.next("photo") for _ in range(2 * scale)]),
+        dimensions_and_weight="约 120×80×50mm，约 250g",
+        regulations_and_standards="IEC 60601-1\nIEC 80601-2-30",
+        service_environment_conditions={
+            "power_supply": "DC 6V",
+            "use_temperature_humidity_range": "+10~+40℃",
+            "storage_and_transport_conditions": "-20~+60℃",
+            "durability": "5年",
+        },
+        main_unit="ABS 树脂",
+        accessories="袖带、电池",
+        safety_protection_info={
+            "definitions_of_basic_safety": "无",
+            "device_classification": "内部电源设备 BF型",
+            "equipment_safety_protection_and_warnings": "注意",
+            "safety_protection": "IP21",
+            "safety_warning": "勿用于新生儿",
+            "biological_alarms": "无",
+            "technical_alarms": "错误显示",
+        },
+        various_settings={"default_equipment_setting": "mmHg", "date_time_settings": "2025/1/1"},
+        labeling="铭牌",
+        packaging="彩盒",
+        maintenance_and_disposal={"maintenance": "干布擦拭", "disposal": "按当地法规"},
+        function_table=table,
+        function_block_image=str([images.next("icon") for _ in range(scale)]),
+        function_block_table=table,
+        performance_table=table,
+    )
+
+
+def _project_plan(images: ImageUrls, scale: int, language: str) -> Dict[str, Any]:
+    return dict(
+        BASE,
+        target=f"打造**高精度**血压计\n![t]({images.next('icon')})",
+        differentiation=rich_text(images, scale),
+        issue_result=html_table(8 * scale),
+        document_drawing_no="DWG-001",
+        document_drawing_rev="A",
+        software="软件计划<br>第二行",
+        function_module=markdown_table(10 * scale),
+        p_plan="P计划",
+        equipment_plan=f"设备<br>![e]({images.next('photo')})",
+        engineering_plan=PARAGRAPH * 4,
+        customer_service="服务",
+        approval_plan="认证",
+        risk_management=rich_text(images, scale),
+        es_verification_plan="ES计划",
+        es_verification_result="ES结果",
+        igs="IGS",
+        qc_engineering="QC",
+        new_product_confirmation="确认书",
+        requirement_spec="要求",
+        product_design_spec="设计",
+        schedule=markdown_table(12 * scale),
+        doc_record_list="一览",
+        target_fc="FC",
+    )
+
+
+def _related_files(template_name: str) -> Callable[[ImageUrls, int, str], Dict[str, Any]]:
+    def build(images: ImageUrls, scale: int, language: str) -> Dict[str, Any]:
+        return dict(BASE, related_file_info=file_entries(template_name, 150 * scale, language))
+    return build
+
+
+PAYLOAD_BUILDERS: Dict[str, Callable[[ImageUrls, int, str], Dict[str, Any]]] = {
+    "DHF_INDEX": lambda images, scale, language: dict(BASE, stage="DR3", file_list=file_entries("DHF_INDEX", language=language, count=200 * scale)),
+    "PTF_INDEX": lambda images, scale, language: dict(
+        BASE,
+        target_area="中国,日本,欧洲,美国",
+        file_number_map=[
+            {"file_number": entry["file_number"], "short_name": entry["short_name"]}
+            for entry in file_entries("PTF_INDEX", language=language, count=150 * scale)
+        ],
+    ),
+    "PRODUCT_ENVIRONMENT_ASSESSMENT": lambda images, scale, language: dict(
+        BASE, production_area="大连", target_area="欧洲,中国,日本,美国", remarks=PARAGRAPH, eta_schedule="2025-10"
+    ),
+    "BASIC_SPECIFICATION": _basic_specification,
+    "VERIFICATION_PLAN": _verification_plan,
+    "VERIFICATION_RESULT": _verification_plan,
+    "LABELING_SPECIFICATION": lambda images, scale, language: dict(
+        BASE,
+        representative_model="HEM-7600T",
+        production_area="OMD",
+        target_area="中国,OHC",
+        sales_channel="医療機関",
+        stage="DR4",
+        related_file_info=file_entries("LABELING_SPECIFICATION", language=language, count=150 * scale),
+        address="大连市",
+        country="中国",
+        phone="0411-0000",
+    ),
+    "PACKAGING_DESIGN_SPECIFICATION": _related_files("PACKAGING_DESIGN_SPECIFICATION"),
+    "USER_MANUAL_SPECIFICATION": _related_files("USER_MANUAL_SPECIFICATION"),
+    "PROJECT_PLAN": _project_plan,
+    "INDIVIDUAL_TEST_SPEC": _individual_test_spec,
+    "INDIVIDUAL_TEST_RESULT": _individual_test_spec,
+}
+
+
+def build_payload(
+    template_name: str, image_base_url: str, scale: int = 1, language: str = "zh", image_start: int = 0
+) -> Dict[str, Any]:
+    """
+    Build the benchmark parameters for one template.
+
+    Image URLs are numbered from ``image_start``; pass a different start per round to
+    make every round download fresh images, as distinct requests would.
+    """
+    return PAYLOAD_BUILDERS[template_name](ImageUrls(image_base_url, image_start), scale, language)
@@ -1,17 +1,170 @@
 from pathlib import Path
+import asyncio
+import io
+import shutil
 import tempfile
+import zipfile
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
 
-from src.infrastructure.services_registry import template_service, storage_service
+from src.infrastructure.services_registry import template_service, storage_service, generation_executor, render_engine
 from src.config import settings
 from src.application.utils import generate_output_filename
 from src.application.logging_config import get_logger
 from src.application.errors import TemplateNotFoundError, TemplateGenerationError, StorageError
+from src.infrastructure.executor import ExecutorSaturatedError
+from src.infrastructure.metrics import annotate, span, trace_generation
+from src.infrastructure.profiling import ProfileCapture, current_capture, profile_generation, requested_profile
 
 
-def generate_document_internal(template_name: str, parameters: Dict[str, Any], language: Optional[str] = None) -> Dict[str, Optional[Any]]:
-    """核心生成逻辑（从 main 中提取）；返回适用于响应模型的字典。"""
+def _storage_type() -> Optional[str]:
+    # 处理枚举类型：如果是枚举，使用 .value 获取字符串值；否则直接转换为字符串
+    if hasattr(settings, "storage_type") and settings.storage_type is not None:
+        if hasattr(settings.storage_type, "value"):
+            return str(settings.storage_type.value).lower()
+        return str(settings.storage_type).lower()
+    return None
+
+
+def _new_output_buffer(suffix: str) -> Union[Path, BinaryIO]:
+    """
+    创建渲染输出目标：默认是内存缓冲区（超过 render.spool_max_mb 才溢写到临时目录），
+    spool_max_mb <= 0 时退回到磁盘临时文件。
+    """
+    spill_dir = getattr(settings, "render_temp_dir", None)
+    if spill_dir:
+        Path(spill_dir).mkdir(parents=True, exist_ok=True)
+    max_bytes = int(getattr(settings, "render_spool_max_mb", 32) * 1024 * 1024)
+    if max_bytes > 0:
+        return tempfile.SpooledTemporaryFile(max_size=max_bytes, suffix=suffix, dir=spill_dir)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=spill_dir) as temp_file:
+        return Path(temp_file.name)
+
+
+def _discard_output(output: Union[Path, BinaryIO, None]) -> None:
+    """释放渲染输出（关闭缓冲区或删除临时文件）"""
+    if output is None:
+        return
+    if isinstance(output, Path):
+        output.unlink(missing_ok=True)
+    else:
+        output.close()
+
+
+def _store_output(output: Union[Path, BinaryIO], file_name: str, project_id: Optional[str], version: Optional[str]) -> Tuple[bool, Optional[str], str]:
+    """保存渲染输出：文件走 _store_file，缓冲区直接从内存上传（不经过磁盘）。"""
+    if isinstance(output, Path):
+        return _store_file(output, file_name, project_id, version)
+
+    length = output.seek(0, 2)
+    output.seek(0)
+    if _storage_type() == "local":
+        try:
+            target_dir = settings.get_local_storage_path() / (project_id or "default") / (version or "default")
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target_path = target_dir / file_name
+            with open(target_path, "wb") as f:
+                shutil.copyfileobj(output, f)
+            return True, str(target_path), "文件保存成功"
+        except Exception as e:
+            return False, None, str(e)
+    if storage_service is None:
+        raise StorageError("storage_service is not initialized")
+    return storage_service.save_stream(output, length, file_name, project_id=project_id, version=version)
+
+
+def _output_size(output: Union[Path, BinaryIO]) -> int:
+    """渲染输出的字节数"""
+    if isinstance(output, Path):
+        return output.stat().st_size
+    return output.seek(0, 2)
+
+
+def _store_file(file_path: Path, file_name: str, project_id: Optional[str], version: Optional[str]) -> Tuple[bool, Optional[str], str]:
+    """按存储类型保存文件；返回 (是否成功, 文件URL或路径, 消息)。"""
+    if _storage_type() == "local":
+        # local storage: use settings to write file locally
+        try:
+            storage_path = settings.get_local_storage_path()
+            # create folder structure if applicable
+            target_dir = storage_path / (project_id or "default") / (version or "default")
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target_path = target_dir / file_name
+            file_path.replace(target_path)
+            file_url = str(target_path)
+            success = True
+            message = "文件保存成功"
+        except Exception as e:
+            success = False
+            file_url = None
+            message = str(e)
+    else:
+        if storage_service is None:
+            raise StorageError("storage_service is not initialized")
+        success, file_url, message = storage_service.save_file(
+            file_path,
+            file_name,
+            project_id=project_id,
+            version=version
+        )
+    return success, file_url, message
+
+
+def _store_profile(capture: ProfileCapture, file_name: str, project_id: Optional[str], version: Optional[str]) -> None:
+    """把剖析结果保存在生成文件旁边（<文件名>.<请求ID>.<后缀>）；保存失败不影响生成结果"""
+    logger = get_logger("application.generate")
+    logger.info(
+        "profile captured: template=%s request_id=%s\n%s", capture.template_name, capture.request_id, capture.summary()
+    )
+    locations = []
+    for suffix, data in capture.artifacts().items():
+        try:
+            success, location, message = _store_output(
+                io.BytesIO(data), f"{file_name}.{capture.request_id}.{suffix}", project_id, version
+            )
+        except Exception as e:
+            success, location, message = False, None, str(e)
+        if success:
+            locations.append(location)
+        else:
+            logger.warning("Failed to store profile %s: %s", suffix, message)
+    profile_request = requested_profile()
+    if profile_request is not None:
+        profile_request.artifacts.extend(locations)
+
+
+def generate_document_internal(
+    template_name: str,
+    parameters: Dict[str, Any],
+    language: Optional[str] = None,
+    archive_dir: Optional[Path] = None,
+) -> Dict[str, Optional[Any]]:
+    """核心生成逻辑（从 main 中提取）；返回适用于响应模型的字典。
+
+    archive_dir 不为 None 时，额外把生成的文件以输出文件名复制到该目录（用于批量生成的 zip 打包）。
+    各阶段耗时记录在生成追踪中（见 src.infrastructure.metrics），汇总到 /metrics；
+    被选中剖析的生成（见 src.infrastructure.profiling）会把填充阶段的剖析结果保存在生成文件旁边。
+    """
+    with trace_generation(template_name, language, enabled=getattr(settings, "metrics_enabled", True)) as trace, \
+            profile_generation(
+                template_name,
+                sample_rate=getattr(settings, "profiling_sample_rate", 0.0),
+                templates=getattr(settings, "profiling_templates", ()),
+            ):
+        result = _generate_document(template_name, parameters, language, archive_dir)
+        trace.annotate(outcome="success" if result["success"] else "failure")
+    get_logger("application.generate").info(
+        "generate_document_internal timings: template=%s %s", template_name, trace.server_timing()
+    )
+    return result
+
+
+def _generate_document(
+    template_name: str,
+    parameters: Dict[str, Any],
+    language: Optional[str],
+    archive_dir: Optional[Path],
+) -> Dict[str, Optional[Any]]:
     result = {
         "success": False,
         "message": "",
@@ -24,6 +177,7 @@ def generate_document_internal(template_name: str, parameters: Dict[str, Any], l
 
     logger = get_logger("application.generate")
     logger.info("generate_document_internal start: template=%s, language=%s", template_name, language)
+    output = None
     try:
         # Validate template
         if not template_service.validate_template_name(template_name):
@@ -36,59 +190,47 @@ def generate_document_internal(template_name: str, parameters: Dict[str, Any], l
         # Remove phase from parameters before passing to template filler (phase is only for filename)
         parameters.pop("phase", None)
 
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{output_filename.split('.')[-1]}") as temp_file:
-            temp_path = Path(temp_file.name)
-
-        # Generate document using template service
-        success = template_service.generate_document(template_name, parameters, temp_path, language)
+        suffix = f".{output_filename.split('.')[-1]}"
+        with span("render"):
+            if render_engine is not None:
+                # Render in the warm worker process pool; the worker returns a file in the shared temp dir
+                output = render_engine.render(
+                    template_name, parameters, language, suffix, template_service.catalog.version
+                )
+                success = output is not None
+            else:
+                # Render into an in-memory buffer that spills to disk only above the size threshold
+                output = _new_output_buffer(suffix)
+                success = template_service.generate_document(template_name, parameters, output, language)
         if not success:
             raise TemplateGenerationError("文档生成失败，请检查模板和参数")
+        annotate(output_size=_output_size(output))
 
         # Extract project/version
         project_id = parameters.get("project_number") or parameters.get("project_id")
         version = parameters.get("version") or parameters.get("ver")
 
-        # Store file
-        # 处理枚举类型：如果是枚举，使用 .value 获取字符串值；否则直接转换为字符串
-        storage_type_val = None
-        if hasattr(settings, "storage_type") and settings.storage_type is not None:
-            if hasattr(settings.storage_type, "value"):
-                storage_type_val = str(settings.storage_type.value).lower()
-            else:
-                storage_type_val = str(settings.storage_type).lower()
-        
-        if storage_type_val == "local":
-            # local storage: use settings to write file locally
-            try:
-                storage_path = settings.get_local_storage_path()
-                # create folder structure if applicable
-                target_dir = storage_path / (project_id or "default") / (version or "default")
-                target_dir.mkdir(parents=True, exist_ok=True)
-                target_path = target_dir / output_filename
-                temp_path.replace(target_path)
-                file_url = str(target_path)
-                success = True
-                message = "文件保存成功"
-            except Exception as e:
-                success = False
-                file_url = None
-                message = str(e)
-        else:
-            if storage_service is None:
-                raise StorageError("storage_service is not initialized")
-            success, file_url, message = storage_service.save_file(
-                temp_path,
-                output_filename,
-                project_id=project_id,
-                version=version
-            )
+        # Keep a copy for the batch zip artifact before the file is moved to storage
+        if archive_dir is not None:
+            with span("archive"):
+                if isinstance(output, Path):
+                    shutil.copyfile(output, archive_dir / output_filename)
+                else:
+                    output.seek(0)
+                    with open(archive_dir / output_filename, "wb") as f:
+                        shutil.copyfileobj(output, f)
 
-        temp_path.unlink(missing_ok=True)
+        # Store file
+        with span("upload"):
+            success, file_url, message = _store_output(output, output_filename, project_id, version)
 
         if not success:
             raise StorageError(message or "文件存储失败")
 
+        capture = current_capture()
+        if capture is not None and capture.captured:
+            _store_profile(capture, output_filename, project_id, version)
+
         result.update({
             "success": True,
             "message": "文档生成成功",
@@ -121,5 +263,116 @@ def generate_document_internal(template_name: str, parameters: Dict[str, Any], l
         result["success"] = False
         result["message"] = f"文档生成失败: {str(e)}"
         return result
+    finally:
+        _discard_output(output)
+
+
+async def generate_document_async(template_name: str, parameters: Dict[str, Any], language: Optional[str] = None) -> Dict[str, Optional[Any]]:
+    """
+    在生成执行器中运行 generate_document_internal，避免阻塞事件循环。
+
+    Raises:
+        ExecutorSaturatedError: 执行器工作线程与等待队列均已占满
+    """
+    return await generation_executor.run(generate_document_internal, template_name, parameters, language)
+
+
+def _failed_result(message: str) -> Dict[str, Optional[Any]]:
+    return {
+        "success": False,
+        "message": message,
+        "file_name": None,
+        "file_url": None,
+        "storage_type": None,
+        "project_id": None,
+        "version": None,
+    }
 
 
+def _write_batch_zip(item_dirs: List[Path], zip_path: Path) -> int:
+    """把各条目的生成文件打包为 zip（xlsx/docx 本身已压缩，直接存储不再压缩）；返回打包文件数。"""
+    used_names = set()
+    count = 0
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+        for item_dir in item_dirs:
+            for file_path in sorted(item_dir.iterdir()):
+                arcname = file_path.name
+                n = 1
+                while arcname in used_names:
+                    arcname = f"{file_path.stem}_{n}{file_path.suffix}"
+                    n += 1
+                used_names.add(arcname)
+                zf.write(file_path, arcname)
+                count += 1
+    return count
+
+
+async def generate_documents_batch(
+    items: List[Tuple[str, Dict[str, Any], Optional[str]]],
+    include_zip: bool = False,
+) -> Dict[str, Any]:
+    """
+    批量生成文档：各条目并行提交到生成执行器（渲染与上传在各自的工作线程中并发进行），
+    按提交顺序返回逐条结果；include_zip 为 True 时把全部成功生成的文件打包为一个 zip 并上传。
+
+    Args:
+        items: (template_name, parameters, language) 列表
+        include_zip: 是否额外生成 zip 打包文件
+    """
+    logger = get_logger("application.generate")
+    logger.info("generate_documents_batch start: items=%s include_zip=%s", len(items), include_zip)
+
+    # 每个批次最多同时占用与工作线程数相同的执行器名额，避免单个批次挤占等待队列
+    semaphore = asyncio.Semaphore(generation_executor.max_workers)
+    archive_root = Path(tempfile.mkdtemp(prefix="ohc_batch_")) if include_zip else None
+
+    async def run_item(index: int, template_name: str, parameters: Dict[str, Any], language: Optional[str]):
+        archive_dir = None
+        if archive_root is not None:
+            archive_dir = archive_root / f"{index:04d}"
+            archive_dir.mkdir()
+        async with semaphore:
+            try:
+                return await generation_executor.run(generate_document_internal, template_name, parameters, language, archive_dir)
+            except ExecutorSaturatedError as e:
+                return _failed_result(str(e))
+
+    try:
+        results = await asyncio.gather(*(
+            run_item(index, template_name, parameters, language)
+            for index, (template_name, parameters, language) in enumerate(items)
+        ))
+
+        batch_result: Dict[str, Any] = {
+            "success": all(r["success"] for r in results),
+            "message": f"批量生成完成：成功 {sum(1 for r in results if r['success'])} / {len(results)}",
+            "results": results,
+            "zip_file_name": None,
+            "zip_file_url": None,
+        }
+
+        succeeded = [r for r in results if r["success"]]
+        if archive_root is not None and succeeded:
+            project_id = succeeded[0].get("project_id")
+            version = succeeded[0].get("version")
+            zip_name = f"{project_id or 'batch'}_{datetime.now().strftime('%Y%m%d%H%M%S')}.zip"
+            zip_path = archive_root / zip_name
+            item_dirs = sorted(p for p in archive_root.iterdir() if p.is_dir())
+            await asyncio.to_thread(_write_batch_zip, item_dirs, zip_path)
+            try:
+                stored, zip_url, message = await asyncio.to_thread(_store_file, zip_path, zip_name, project_id, version)
+            except StorageError as e:
+                stored, zip_url, message = False, None, str(e)
+            if stored:
+                batch_result["zip_file_name"] = zip_name
+                batch_result["zip_file_url"] = zip_url
+            else:
+                logger.error("Batch zip storage failed: %s", message)
+                batch_result["success"] = False
+                batch_result["message"] += f"；zip 打包文件存储失败: {message}"
+
+        logger.info("generate_documents_batch done: %s", batch_result["message"])
+        return batch_result
+    finally:
+        if archive_root is not None:
+            shutil.rmtree(archive_root, ignore_errors=True)
@@ -0,0 +1,72 @@
+import asyncio
+from functools import partial
+from typing import Any, Dict, Optional
+
+from src.infrastructure.services_registry import generation_executor, job_store
+from src.infrastructure.job_store import JobRecord, JobStatus
+from src.config import settings
+from src.application.generate_service import generate_document_internal
+from src.application.logging_config import get_logger
+
+logger = get_logger("application.jobs")
+
+
+def submit_generate_job(template_name: str, parameters: Dict[str, Any], language: Optional[str] = None) -> JobRecord:
+    """
+    提交异步生成任务，立即返回任务记录；生成结果在任务结束后写入任务存储。
+
+    Raises:
+        ExecutorSaturatedError: 执行器工作线程与等待队列均已占满
+    """
+    record = JobRecord.new(template_name)
+    future = generation_executor.submit(generate_document_internal, template_name, parameters, language)
+    job_store.create(record)
+    # 任务可能在 create 之前就已完成，add_done_callback 会立即回调
+    future.add_done_callback(partial(_on_job_done, record.job_id))
+    logger.info("Job submitted: job_id=%s template=%s", record.job_id, template_name)
+    return record
+
+
+def _on_job_done(job_id: str, future) -> None:
+    """执行器任务结束回调：把生成结果写入任务存储"""
+    try:
+        result = future.result()
+    except Exception as e:
+        logger.exception("Job failed: job_id=%s", job_id)
+        result = {
+            "success": False,
+            "message": f"文档生成失败: {str(e)}",
+            "file_name": None,
+            "file_url": None,
+            "storage_type": None,
+            "project_id": None,
+            "version": None,
+        }
+    status = JobStatus.SUCCEEDED if result.get("success") else JobStatus.FAILED
+    job_store.finish(job_id, status, result)
+    logger.info("Job finished: job_id=%s status=%s", job_id, status)
+
+
+def get_job(job_id: str) -> Optional[JobRecord]:
+    return job_store.get(job_id)
+
+
+async def wait_for_job(job_id: str, timeout: float, last_status: Optional[str] = None) -> Optional[JobRecord]:
+    """
+    长轮询：等待任务结束（或状态不同于 last_status），最多等待 timeout 秒。
+
+    Returns:
+        最新的任务记录；任务不存在或已过期时返回 None
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        record = job_store.get(job_id)
+        if record is None or record.finished:
+            return record
+        if last_status is not None and record.status != last_status:
+            return record
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            return record
+        await asyncio.sleep(min(settings.jobs_poll_interval, remaining))
@@ -14,3 +14,6 @@ def get_template_info(template_name: str, language: Optional[str] = None) -> Opt
     return template_service.get_template_info(template_name, language)
 
 
+def reload_templates() -> int:
+    """Rescan template directories and return the number of indexed entries."""
+    return template_service.reload_templates()
@@ -132,14 +132,59 @@ class Settings(BaseSettings):
     
     # 模板配置
     template_base_path: str = Field(default="static/templates", description="模板基础路径")
+    template_cache_enabled: bool = Field(default=True, description="是否缓存解析后的模板")
+    template_cache_max_mb: int = Field(default=256, description="模板缓存内存上限（MB），超出时按LRU淘汰")
+    template_watch_enabled: bool = Field(default=False, description="是否监听模板目录变化并自动刷新模板索引")
+    template_watch_poll_interval: float = Field(default=5.0, description="未安装 watchfiles 时轮询模板目录的间隔（秒）")
+    template_xlsx_patch_enabled: bool = Field(default=True, description="是否允许简单 Excel 模板直接修补工作表 XML（不经 openpyxl 重新生成）")
     
     # 文件名配置
     filename_include_timestamp: bool = Field(default=True, description="文件名是否包含时间戳")
     filename_max_length: int = Field(default=200, description="文件名最大长度")
     
+    # 文档生成执行器配置
+    executor_type: str = Field(default="thread", description="文档生成执行器类型（thread/process）")
+    executor_max_workers: int = Field(default=4, description="文档生成工作线程/进程数")
+    executor_max_queue: int = Field(default=16, description="等待执行的最大排队任务数，超出时返回503")
+    executor_retry_after: int = Field(default=5, description="执行器繁忙时建议客户端重试的间隔（秒）")
+    
+    # 渲染引擎配置
+    render_engine: str = Field(default="inline", description="渲染引擎（inline: 在执行器线程内渲染；process: 在常驻进程池中渲染）")
+    render_workers: int = Field(default=2, description="渲染进程数")
+    render_max_jobs_per_worker: int = Field(default=50, description="每个渲染进程处理多少个任务后回收")
+    render_temp_dir: Optional[str] = Field(default=None, description="渲染结果共享临时目录（默认系统临时目录下的 ohc_render）")
+    render_spool_max_mb: float = Field(default=32, description="渲染结果在内存中缓冲的上限（MB），超出后溢写到临时目录；<=0 时始终写临时文件")
+    
+    # 图片下载配置
+    image_download_timeout: float = Field(default=10, description="单张图片下载超时时间（秒）")
+    image_prefetch_workers: int = Field(default=8, description="渲染前并发预取图片的最大并发数")
+    image_prefetch_deadline: float = Field(default=30, description="单个文档图片预取的总时限（秒），超时未完成的图片视为下载失败")
+    image_cache_enabled: bool = Field(default=True, description="是否启用跨请求共享的图片缓存")
+    image_cache_dir: Optional[str] = Field(default=None, description="图片缓存磁盘目录（默认系统临时目录下的 ohc_image_cache）")
+    image_cache_memory_mb: float = Field(default=64, description="图片缓存内存层上限（MB）")
+    image_cache_disk_mb: float = Field(default=512, description="图片缓存磁盘层上限（MB），超出时淘汰最久未访问的图片")
+    image_normalize_enabled: bool = Field(default=True, description="是否在嵌入前按显示尺寸缩小并重新编码图片")
+    image_render_dpi: int = Field(default=150, description="嵌入图片的目标分辨率（DPI），决定按显示尺寸缩小后的像素数")
+    image_jpeg_quality: int = Field(default=85, description="重新编码为 JPEG 时的质量（1-95）")
+    image_normalize_cache_mb: float = Field(default=64, description="图片规格化结果缓存上限（MB）")
+    image_cache_revalidate_seconds: float = Field(default=300, description="缓存图片超过该时间（秒）后使用 ETag/Last-Modified 重新验证")
+    
+    # 异步任务配置
+    jobs_backend: str = Field(default="memory", description="任务存储后端（memory/sqlite）")
+    jobs_ttl_seconds: int = Field(default=3600, description="任务记录保留时间（秒），超时后淘汰")
+    jobs_sqlite_path: str = Field(default="jobs.db", description="SQLite 任务存储文件路径")
+    jobs_poll_interval: float = Field(default=0.5, description="长轮询/SSE 检查任务状态的间隔（秒）")
+    
     # Sentry / monitoring (optional)
     sentry_dsn: Optional[str] = Field(default=None, description="Sentry DSN (optional)")
     sentry_environment: Optional[str] = Field(default=None, description="Sentry environment name")
+    metrics_enabled: bool = Field(default=True, description="是否统计文档生成各阶段耗时并提供 /metrics 端点")
+    metrics_server_timing: bool = Field(default=False, description="是否在生成接口响应中返回 Server-Timing 头")
+
+    # 性能剖析配置
+    profiling_sample_rate: float = Field(default=0.0, description="随机剖析文档生成的比例（0～1），0 表示不抽样")
+    profiling_templates: list[str] = Field(default_factory=list, description="只对这些模板抽样剖析（为空时不限）")
+    profiling_admin_token: Optional[str] = Field(default=None, description="请求头 X-OHC-Profile 等于该值时强制剖析该请求（为空时不接受请求头）")
 
     # SSO 认证配置
     auth_sso_enabled: bool = Field(default=False, description="是否启用 SSO 认证")
@@ -192,8 +237,17 @@ def _flatten_toml_config(data: Dict[str, Any]) -> Dict[str, Any]:
     - storage.local.path -> local_storage_path
     - storage.s3.* -> aws_* (特殊映射)
     - templates.base_path -> template_base_path
+    - templates.cache_* -> template_cache_*
+    - templates.watch_* -> template_watch_*
+    - templates.xlsx_patch_enabled -> template_xlsx_patch_enabled
     - files.* -> filename_*
-    - monitoring.* -> sentry_*
+    - executor.* -> executor_*
+    - render.* -> render_*
+    - images.* -> image_*
+    - jobs.* -> jobs_*
+    - monitoring.sentry_* -> sentry_*
+    - monitoring.metrics_enabled / server_timing -> metrics_enabled / metrics_server_timing
+    - profiling.* -> profiling_*
     """
     result = {}
     
@@ -254,6 +308,16 @@ def _flatten_toml_config(data: Dict[str, Any]) -> Dict[str, Any]:
         templates_config = data["templates"]
         if "base_path" in templates_config:
             result["template_base_path"] = templates_config["base_path"]
+        if "cache_enabled" in templates_config:
+            result["template_cache_enabled"] = templates_config["cache_enabled"]
+        if "cache_max_mb" in templates_config:
+            result["template_cache_max_mb"] = templates_config["cache_max_mb"]
+        if "watch_enabled" in templates_config:
+            result["template_watch_enabled"] = templates_config["watch_enabled"]
+        if "watch_poll_interval" in templates_config:
+            result["template_watch_poll_interval"] = templates_config["watch_poll_interval"]
+        if "xlsx_patch_enabled" in templates_config:
+            result["template_xlsx_patch_enabled"] = templates_config["xlsx_patch_enabled"]
     
     # 文件配置
     if "files" in data:
@@ -263,6 +327,30 @@ def _flatten_toml_config(data: Dict[str, Any]) -> Dict[str, Any]:
         if "max_length" in files_config:
             result["filename_max_length"] = files_config["max_length"]
     
+    # 文档生成执行器配置
+    if "executor" in data:
+        executor_config = data["executor"]
+        for key, value in executor_config.items():
+            result[f"executor_{key}"] = value
+    
+    # 渲染引擎配置
+    if "render" in data:
+        render_config = data["render"]
+        for key, value in render_config.items():
+            result[f"render_{key}"] = value
+    
+    # 图片下载配置
+    if "images" in data:
+        images_config = data["images"]
+        for key, value in images_config.items():
+            result[f"image_{key}"] = value
+    
+    # 异步任务配置
+    if "jobs" in data:
+        jobs_config = data["jobs"]
+        for key, value in jobs_config.items():
+            result[f"jobs_{key}"] = value
+    
     # 监控配置
     if "monitoring" in data:
         monitoring_config = data["monitoring"]
@@ -270,6 +358,16 @@ def _flatten_toml_config(data: Dict[str, Any]) -> Dict[str, Any]:
             result["sentry_dsn"] = monitoring_config["sentry_dsn"]
         if "sentry_environment" in monitoring_config:
             result["sentry_environment"] = monitoring_config["sentry_environment"]
+        if "metrics_enabled" in monitoring_config:
+            result["metrics_enabled"] = monitoring_config["metrics_enabled"]
+        if "server_timing" in monitoring_config:
+            result["metrics_server_timing"] = monitoring_config["server_timing"]
+
+    # 性能剖析配置
+    if "profiling" in data:
+        profiling_config = data["profiling"]
+        for key, value in profiling_config.items():
+            result[f"profiling_{key}"] = value
 
     # 认证配置
     if "auth" in data:
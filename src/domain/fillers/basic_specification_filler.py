@@ -6,7 +6,6 @@ from typing import Any, Dict, List, Optional, Tuple
 import io
 import re
 import tempfile
-import urllib.request
 
 from docx import Document
 from docx.enum.style import WD_STYLE_TYPE
@@ -15,6 +14,10 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Pt, RGBColor, Cm, Inches
 
+from src.infrastructure.docx_fill_plan import BoundFillPlan
+from src.infrastructure.image_normalizer import normalize_image, target_pixels_for_cm
+from src.infrastructure.placeholders import DOCX_PLACEHOLDERS
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import TemplateFillerStrategy
 
 logger = logging.getLogger(__name__)
@@ -65,21 +68,22 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
             # 预处理参数：构造商品型号表数据
             self._build_product_model_table(parameters)
 
-            # 加载 Word 模板
-            doc = Document(template_path)
+            # 加载 Word 模板，并定位模板中含占位符的段落/单元格
+            doc = template_cache.load_document(template_path)
+            plan = template_cache.docx_fill_plan(template_path).bind(doc)
 
             # 先在表格单元格中处理占位符（表格更适合放 markdown 表和图片）
-            self._process_tables(doc, parameters)
+            self._process_tables(doc, parameters, plan)
 
             # 再处理普通段落中的占位符（用于 markdown 文本转段落/列表等）
-            self._process_paragraphs(doc, parameters)
+            self._process_paragraphs(doc, parameters, plan)
 
             # 最后做一次兜底的纯文本占位符替换，避免遗漏简单文本
             flat_parameters = self._flatten_parameters(parameters)
-            self._fallback_text_replace(doc, flat_parameters)
+            self._fallback_text_replace(doc, flat_parameters, plan)
 
             # 保存结果
-            doc.save(output_path)
+            self._save_document(doc, template_path, output_path)
             return True
         except Exception as e:
             logger.error("基本规格书模板填充失败: %s", str(e), exc_info=True)
@@ -114,92 +118,90 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
 
         parameters[self.PRODUCT_MODEL_TABLE_FIELD] = rows
 
-    def _process_tables(self, doc: Document, parameters: Dict[str, Any]) -> None:
+    def _process_tables(self, doc: Document, parameters: Dict[str, Any], plan: BoundFillPlan) -> None:
         """处理所有表格中的占位符：markdown表格、商品型号表、图片等"""
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    text = cell.text or ""
-                    placeholders = self._extract_placeholders(text)
-                    if not placeholders:
+        for cell in plan.cells:
+            text = cell.text or ""
+            placeholders = self._extract_placeholders(text)
+            if not placeholders:
+                continue
+
+            for placeholder in placeholders:
+                key = placeholder
+                is_table_field = key in self.MARKDOWN_TABLE_FIELDS
+                is_image_field = key in self.IMAGE_LIST_FIELDS
+                is_special_field = is_table_field or is_image_field or key == self.PRODUCT_MODEL_TABLE_FIELD
+
+                if is_table_field:
+                    markdown_text = str(self._get_param(parameters, key) or "").strip()
+                    if markdown_text:
+                        self._clear_cell(cell)
+                        self._insert_markdown_table_into_cell(cell, markdown_text, merge_same_column=False)
+                elif key == self.PRODUCT_MODEL_TABLE_FIELD:
+                    rows = parameters.get(self.PRODUCT_MODEL_TABLE_FIELD) or []
+                    if rows:
+                        self._clear_cell(cell)
+                        self._insert_product_model_table(cell, rows)
+                elif is_image_field:
+                    images = self._normalize_image_urls(self._get_param(parameters, key))
+                    if images:
+                        self._clear_cell(cell)
+                        self._insert_images_into_cell(cell, images)
+                        # 占位符已通过 clear_cell 清除，无需再次清理
                         continue
+                elif not is_special_field:
+                    # 非特殊字段：检测是否是 markdown 表格
+                    value = self._get_param(parameters, key)
+                    markdown_text = str(value or "").strip()
 
-                    for placeholder in placeholders:
-                        key = placeholder
-                        is_table_field = key in self.MARKDOWN_TABLE_FIELDS
-                        is_image_field = key in self.IMAGE_LIST_FIELDS
-                        is_special_field = is_table_field or is_image_field or key == self.PRODUCT_MODEL_TABLE_FIELD
-
-                        if is_table_field:
-                            markdown_text = str(self._get_param(parameters, key) or "").strip()
-                            if markdown_text:
-                                self._clear_cell(cell)
-                                self._insert_markdown_table_into_cell(cell, markdown_text, merge_same_column=False)
-                        elif key == self.PRODUCT_MODEL_TABLE_FIELD:
-                            rows = parameters.get(self.PRODUCT_MODEL_TABLE_FIELD) or []
-                            if rows:
-                                self._clear_cell(cell)
-                                self._insert_product_model_table(cell, rows)
-                        elif is_image_field:
-                            images = self._normalize_image_urls(self._get_param(parameters, key))
-                            if images:
-                                self._clear_cell(cell)
-                                self._insert_images_into_cell(cell, images)
-                                # 占位符已通过 clear_cell 清除，无需再次清理
-                                continue
-                        elif not is_special_field:
-                            # 非特殊字段：检测是否是 markdown 表格
-                            value = self._get_param(parameters, key)
-                            markdown_text = str(value or "").strip()
-
-                            # 如果值是默认文本，跳过表格检测
-                            if markdown_text and not self._is_missing_text(markdown_text):
-                                if self._is_markdown_table(markdown_text):
-                                    # 是表格，插入表格
-                                    logger.info(f"在表格单元格中检测到 markdown 表格字段: {key}")
-                                    self._clear_cell(cell)
-                                    self._insert_markdown_table_into_cell(cell, markdown_text, merge_same_column=False)
-                                    continue  # 已处理，跳过后续清理
-                                else:
-                                    logger.debug(f"字段 {key} 不是 markdown 表格，内容预览: {markdown_text[:100]}...")
-
-                        # 占位符处理完，避免重复文本留在单元格中（只在段落级别清理，保留格式）
-                        if f"{{{{{key}}}}}" in cell.text:
-                            for paragraph in cell.paragraphs:
-                                if paragraph.text and f"{{{{{key}}}}}" in paragraph.text:
-                                    # 在 run 级别替换，保留格式
-                                    if paragraph.runs:
-                                        first_run = paragraph.runs[0]
-                                        font_name = first_run.font.name
-                                        font_size = first_run.font.size
-                                        is_bold = first_run.font.bold
-                                        is_italic = first_run.font.italic
-                                        font_color = first_run.font.color
-
-                                        new_text = paragraph.text.replace(f"{{{{{key}}}}}", "")
-
-                                        # 清空所有 runs
-                                        for run in list(paragraph.runs):
-                                            run.clear()
-
-                                        # 用原格式创建新文本
-                                        if new_text:
-                                            new_run = paragraph.add_run(new_text)
-                                            if font_name:
-                                                new_run.font.name = font_name
-                                            if font_size:
-                                                new_run.font.size = font_size
-                                            new_run.font.bold = is_bold
-                                            new_run.font.italic = is_italic
-                                            if font_color:
-                                                new_run.font.color = font_color
-                                    else:
-                                        # 没有 run，直接替换
-                                        paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", "")
-
-    def _process_paragraphs(self, doc: Document, parameters: Dict[str, Any]) -> None:
+                    # 如果值是默认文本，跳过表格检测
+                    if markdown_text and not self._is_missing_text(markdown_text):
+                        if self._is_markdown_table(markdown_text):
+                            # 是表格，插入表格
+                            logger.info(f"在表格单元格中检测到 markdown 表格字段: {key}")
+                            self._clear_cell(cell)
+                            self._insert_markdown_table_into_cell(cell, markdown_text, merge_same_column=False)
+                            continue  # 已处理，跳过后续清理
+                        else:
+                            logger.debug(f"字段 {key} 不是 markdown 表格，内容预览: {markdown_text[:100]}...")
+
+                # 占位符处理完，避免重复文本留在单元格中（只在段落级别清理，保留格式）
+                if f"{{{{{key}}}}}" in cell.text:
+                    for paragraph in cell.paragraphs:
+                        if paragraph.text and f"{{{{{key}}}}}" in paragraph.text:
+                            # 在 run 级别替换，保留格式
+                            if paragraph.runs:
+                                first_run = paragraph.runs[0]
+                                font_name = first_run.font.name
+                                font_size = first_run.font.size
+                                is_bold = first_run.font.bold
+                                is_italic = first_run.font.italic
+                                font_color = first_run.font.color
+
+                                new_text = paragraph.text.replace(f"{{{{{key}}}}}", "")
+
+                                # 清空所有 runs
+                                for run in list(paragraph.runs):
+                                    run.clear()
+
+                                # 用原格式创建新文本
+                                if new_text:
+                                    new_run = paragraph.add_run(new_text)
+                                    if font_name:
+                                        new_run.font.name = font_name
+                                    if font_size:
+                                        new_run.font.size = font_size
+                                    new_run.font.bold = is_bold
+                                    new_run.font.italic = is_italic
+                                    if font_color:
+                                        new_run.font.color = font_color
+                            else:
+                                # 没有 run，直接替换
+                                paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", "")
+
+    def _process_paragraphs(self, doc: Document, parameters: Dict[str, Any], plan: BoundFillPlan) -> None:
         """处理文档中普通段落的占位符，将 markdown 文本转换为段落/列表/加粗等结构"""
-        for paragraph in list(doc.paragraphs):
+        for paragraph in plan.live_paragraphs():
             text = paragraph.text or ""
             placeholders = self._extract_placeholders(text)
             if not placeholders:
@@ -313,19 +315,29 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
                             pass  # 让 _fallback_text_replace 处理简单情况
                     break  # 处理完这个段落，跳出循环
 
-    def _fallback_text_replace(self, doc: Document, flat_parameters: Dict[str, str]) -> None:
+    def _fallback_text_replace(self, doc: Document, flat_parameters: Dict[str, str], plan: BoundFillPlan) -> None:
         """兜底的纯文本占位符替换，避免遗漏简单字符串场景，同时保留原有格式"""
 
+        # 排除图片列表字段和表格字段的占位符
+        excluded_fields = self.IMAGE_LIST_FIELDS | self.MARKDOWN_TABLE_FIELDS | {self.PRODUCT_MODEL_TABLE_FIELD}
+
         def has_placeholder(text: str) -> bool:
             """检查文本是否包含占位符"""
             if not text:
                 return False
-            # 排除图片列表字段和表格字段的占位符
-            excluded_fields = self.IMAGE_LIST_FIELDS | self.MARKDOWN_TABLE_FIELDS | {self.PRODUCT_MODEL_TABLE_FIELD}
-            for key in flat_parameters.keys():
-                if key not in excluded_fields and f"{{{{{key}}}}}" in text:
-                    return True
-            return False
+            return any(
+                key in flat_parameters and key not in excluded_fields
+                for key in DOCX_PLACEHOLDERS.keys(text)
+            )
+
+        def resolve(key: str) -> Optional[str]:
+            value = flat_parameters.get(key)
+            # 检查值是否是 markdown 表格
+            # 如果是表格，跳过替换（表格应该在前面的处理中已经处理）
+            if value and self._is_markdown_table(str(value)):
+                logger.debug(f"跳过 markdown 表格字段 {key} 的兜底替换（应该已在前面处理）")
+                return None
+            return value
 
         def replace_in_runs(paragraph, flat_parameters: Dict[str, str]) -> None:
             """在 run 级别替换占位符，保留原有格式"""
@@ -334,18 +346,7 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
 
             # 合并所有 runs 的文本
             full_text = paragraph.text
-            new_text = full_text
-
-            # 检查替换后的文本是否包含 markdown 表格
-            # 如果包含表格，跳过替换（表格应该在前面的处理中已经处理）
-            for key, value in flat_parameters.items():
-                placeholder = f"{{{{{key}}}}}"
-                if placeholder in full_text:
-                    # 检查值是否是 markdown 表格
-                    if value and self._is_markdown_table(str(value)):
-                        logger.debug(f"跳过 markdown 表格字段 {key} 的兜底替换（应该已在前面处理）")
-                        continue  # 跳过这个字段的替换
-                    new_text = new_text.replace(placeholder, value)
+            new_text = DOCX_PLACEHOLDERS.substitute(full_text, resolve)
 
             if full_text == new_text:
                 return
@@ -381,15 +382,12 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
                     self._apply_font(run, bold=False)
 
         # 处理段落：只替换包含占位符的段落
-        for paragraph in doc.paragraphs:
+        for paragraph in plan.live_paragraphs():
             replace_in_runs(paragraph, flat_parameters)
 
         # 处理表格单元格：只替换包含占位符的单元格
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        replace_in_runs(paragraph, flat_parameters)
+        for paragraph in plan.cell_paragraphs():
+            replace_in_runs(paragraph, flat_parameters)
 
     def _insert_product_model_table(self, cell, rows: List[Dict[str, str]]) -> None:
         """在单元格中插入商品型号表"""
@@ -600,6 +598,9 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
                     target_width_cm = available_width_cm
                     target_height_cm = None  # 不指定高度，让 python-docx 保持宽高比
 
+                # 按显示宽度与输出 DPI 缩小并重新编码，避免嵌入超大原图
+                content = normalize_image(content, target_pixels_for_cm(target_width_cm), url)
+
                 # 创建新的流对象用于插入图片
                 image_stream_for_insert = io.BytesIO(content)
 
@@ -1168,25 +1169,16 @@ class BasicSpecificationFiller(TemplateFillerStrategy):
         # 去重并返回
         return list(dict.fromkeys(urls))  # 保持顺序的去重
 
+    def _collect_image_urls(self, parameters: Dict[str, Any]) -> List[str]:
+        """图片列表字段中的全部图片 URL（用于渲染前预取）"""
+        urls: List[str] = []
+        for key in self.IMAGE_LIST_FIELDS:
+            urls.extend(self._normalize_image_urls(self._get_param(parameters, key)))
+        return urls
+
     def _download_image(self, url: str) -> bytes:
-        """下载图片内容，失败时返回空字节串"""
-        try:
-            req = urllib.request.Request(
-                url,
-                headers={
-                    # Some hosts block requests without UA
-                    "User-Agent": "ohc-account-invoice/1.0 (+python urllib)",
-                },
-                method="GET",
-            )
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                status = getattr(resp, "status", None)
-                if status is not None and int(status) != 200:
-                    return b""
-                return resp.read()
-        except Exception:
-            return b""
-        return b""
+        """获取图片内容（优先使用预取结果），失败时返回空字节串"""
+        return self._fetch_image(url)
 
     def _extract_placeholders(self, text: str) -> List[str]:
         """从文本中提取 {{var}} 形式的占位符变量名"""
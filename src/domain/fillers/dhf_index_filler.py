@@ -3,11 +3,11 @@ import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
-from openpyxl import load_workbook
 from openpyxl.styles import Alignment, Font, Border, PatternFill, Protection, Side
-from openpyxl.cell.cell import MergedCell
 
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import ExcelTemplateFiller
+from src.infrastructure.text_metrics import count_lines, sheet_text_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -38,38 +38,16 @@ class DHFIndexFiller(ExcelTemplateFiller):
         # 获取单元格
         cell = worksheet.cell(row, column)
         
-        # 获取列宽（字符数），如果未设置则使用默认值
-        column_letter = cell.column_letter
-        column_width = worksheet.column_dimensions[column_letter].width
-        if not column_width or column_width == 0:
-            column_width = 10  # 默认列宽
+        # 获取列宽（字符数，合并单元格取合并区域总宽），如果未设置则使用默认值
+        column_width = sheet_text_metrics(worksheet).cell_width(row, column, 10)
         
         # 获取字体大小，如果未设置则使用默认值
         font_size = 11  # 默认字体大小
         if cell.font and cell.font.size:
             font_size = cell.font.size
         
-        # 估算每行可容纳的字符数（考虑中文字符占2个位置，英文占1个位置）
-        # 使用保守估计：中英文混合时平均每字符占1.7个位置
-        chars_per_line = int(column_width * 1.7)
-        if chars_per_line <= 0:
-            chars_per_line = 15  # 默认值
-        
-        # 计算需要的行数
-        # 考虑文本中可能包含的换行符
-        lines = text.split('\n')
-        total_lines = 0
-        for line in lines:
-            if line:
-                # 计算这一行需要多少行显示
-                line_count = (len(line) + chars_per_line - 1) // chars_per_line
-                total_lines += max(1, line_count)
-            else:
-                total_lines += 1  # 空行也算一行
-        
-        # 如果只有一行，确保至少显示一行
-        if total_lines == 0:
-            total_lines = 1
+        # 计算需要的行数（中文字符占2个位置，英文占1个位置；空行也算一行）
+        total_lines = count_lines(text, column_width)
         
         # 计算行高（点）
         # 行高 = 行数 * 字体大小 * 行距系数
@@ -111,7 +89,7 @@ class DHFIndexFiller(ExcelTemplateFiller):
             self._set_language(language)
 
             # 加载模板文件
-            workbook = load_workbook(template_path, data_only=False, keep_vba=False)
+            workbook = template_cache.load_workbook(template_path, data_only=False, keep_vba=False)
             worksheet = workbook.active
             
             # 填充基本信息单元格
@@ -121,25 +99,13 @@ class DHFIndexFiller(ExcelTemplateFiller):
             self._fill_file_list(worksheet, parameters)
             
             # 替换其他占位符
-            processed_cells = set()
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    # 合并单元格：统一落到左上角单元格处理，并且避免重复处理同一个左上角单元格
-                    target_cell = self._get_merged_cell_top_left(worksheet, cell.row, cell.column)
-                    cell_key = (target_cell.row, target_cell.column)
-                    if cell_key in processed_cells:
-                        continue
-                    processed_cells.add(cell_key)
-
-                    if target_cell.value and isinstance(target_cell.value, str):
-                        original_value = target_cell.value
-                        new_value = self._replace_placeholders(original_value, parameters)
-                        if new_value != original_value:
-                            target_cell.value = new_value
-                            self._apply_filled_background(target_cell)
+            # （合并单元格的值只保存在左上角单元格，索引中记录的即为左上角单元格）
+            index = template_cache.placeholder_index(template_path, data_only=False, keep_vba=False)
+            for cell in self._replace_indexed_placeholders(worksheet, index, parameters):
+                self._apply_filled_background(cell)
             
             # 保存工作簿
-            workbook.save(output_path)
+            self._save_workbook(workbook, template_path, output_path)
             
             return True
         except Exception as e:
@@ -236,23 +202,6 @@ class DHFIndexFiller(ExcelTemplateFiller):
             cell_c7.value = missing_text
             self._apply_filled_background(cell_c7)
 
-    def _get_merged_cell_top_left(self, worksheet, row, col):
-        """
-        获取合并单元格的左上角单元格
-        如果单元格不是合并单元格，返回该单元格本身
-        """
-        cell = worksheet.cell(row, col)
-        
-        # 如果是 MergedCell，找到它所属的合并区域
-        if isinstance(cell, MergedCell):
-            for merged_range in worksheet.merged_cells.ranges:
-                if (merged_range.min_row <= row <= merged_range.max_row and
-                    merged_range.min_col <= col <= merged_range.max_col):
-                    # 返回合并区域的左上角单元格
-                    return worksheet.cell(merged_range.min_row, merged_range.min_col)
-        
-        return cell
-
     def _copy_cell_style(self, source_cell, target_cell):
         """
         复制源单元格的样式到目标单元格
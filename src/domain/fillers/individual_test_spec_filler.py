@@ -13,17 +13,37 @@
 
 from __future__ import annotations
 
+import io
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from openpyxl import load_workbook
-from openpyxl.cell import MergedCell
 from openpyxl.styles import PatternFill, Alignment, Font, Border, Side
 from openpyxl.utils import get_column_letter
 
+from src.infrastructure.image_normalizer import normalize_image, target_pixels_for_screen_px
+from src.infrastructure.metrics import annotate
+from src.infrastructure.rich_content import (
+    PART_IMAGE,
+    PART_TABLE,
+    PART_TEXT,
+    ContentPart,
+    ParsedContent,
+    ParsedContentCache,
+    TableContent,
+)
+from src.infrastructure.text_metrics import (
+    column_line_counts,
+    count_lines,
+    line_capacity,
+    line_widths,
+    sheet_text_metrics,
+    wrapped_line_count,
+)
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import ExcelTemplateFiller
+from src.infrastructure.worksheet_layout import insert_row_blocks
 
 
 @dataclass
@@ -46,6 +66,9 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
     # 与 DHFIndexFiller 保持一致的高亮背景色（ARGB）
     _FILLED_BG_COLOR = "FF739FD7"  # RGB(115,159,215)
 
+    # 字段文本 -> 解析结果（各请求的填充器副本共享）
+    _parsed_contents = ParsedContentCache()
+
     def _apply_filled_background(self, cell) -> None:
         """将单元格背景色设置为填充高亮色。"""
         cell.fill = PatternFill(fill_type="solid", fgColor=self._FILLED_BG_COLOR)
@@ -61,18 +84,17 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             # 设置语言（用于空值兜底）
             self._set_language(language)
 
-            workbook = load_workbook(template_path)
+            workbook = template_cache.load_workbook(template_path)
             worksheet = workbook.active
 
             self._fill_fields(worksheet, parameters)
 
             # 替换其它占位符（如果模板里存在 {xxx} / {{xxx}}）
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        cell.value = self._replace_placeholders(cell.value, parameters)
+            self._replace_indexed_placeholders(
+                worksheet, template_cache.placeholder_index(template_path), parameters
+            )
 
-            workbook.save(output_path)
+            self._save_workbook(workbook, template_path, output_path)
             return True
         except Exception as e:
             print(f"个别试验要项书模板填充失败: {str(e)}")
@@ -140,22 +162,11 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         test_result                C90    - (边界，不填充)
 
         核心逻辑：
-        1. 保存 test_result 后面到模板原始最大行的内容
-        2. 按顺序处理每个区块，计算并插入需要的行
-        3. 填充内容
-        4. 恢复 test_result 后面的原始内容（只恢复模板原始内容，不覆盖填充内容）
+        1. 先解析全部区块的内容，计算各区块需要插入的行数（布局规划）
+        2. 一次性在各区块的下一个标题行前插入行，后续标题行与表尾内容
+           （含合并单元格、行高）整体下移
+        3. 按调整后的行号填充各区块内容
         """
-        # 保存 test_result 后面（行90之后）到模板原始最大行的内容
-        # 注意：只保存原始模板中的行，不包括后续可能插入的行
-        template_original_max_row = 90  # test_result 标题行之后的第一个需要恢复的行
-        saved_content = self._save_content_after_row(worksheet, 90, worksheet.max_row)
-
-        # 记录填充开始前的 C-P 列合并单元格
-        merged_cells_before_fill = {
-            str(mr): mr for mr in worksheet.merged_cells.ranges
-            if mr.min_col == 3 and mr.max_col == 16
-        }
-
         # 区块配置（标题行和填充起始行）
         blocks = [
             BlockConfig(title_row=41, fill_start_row=43, param_name="test_conditions"),
@@ -165,59 +176,46 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             BlockConfig(title_row=80, fill_start_row=82, param_name="source"),
             BlockConfig(title_row=90, fill_start_row=None, param_name="test_result", is_last=True),
         ]
+        planned = self._plan_dynamic_blocks(blocks, parameters, missing_text)
 
-        cumulative_insert_rows = 0
-
-        for i, block in enumerate(blocks):
-            if block.param_name == "test_result":
-                continue
-
-            next_block = blocks[i + 1]
-            next_title_row_adjusted = next_block.title_row + cumulative_insert_rows
-            current_fill_start = block.fill_start_row + cumulative_insert_rows
-            available_rows = next_title_row_adjusted - current_fill_start - 1
-
-            param_value = parameters.get(block.param_name, "")
-            text = str(param_value) if param_value else missing_text
-            parts = self._parse_mixed_content(text)
-            content_rows = self._calculate_content_rows(parts)
-
-            if content_rows > available_rows:
-                rows_to_insert = content_rows - available_rows
-                insert_row = next_title_row_adjusted
-                # 使用新的插入方法，保护后面的内容
-                self._insert_rows_protected(worksheet, insert_row, rows_to_insert)
-                cumulative_insert_rows += rows_to_insert
-                next_title_row_adjusted = next_block.title_row + cumulative_insert_rows
-                available_rows = next_title_row_adjusted - current_fill_start - 1
+        # 一次性插入所有区块需要的行（行号均为模板原始行号）
+        insertions = [(blocks[i + 1].title_row, block.rows_to_insert) for i, (block, _) in enumerate(planned)]
+        insert_row_blocks(worksheet, insertions)
+        annotate(rows_inserted=sum(amount for _, amount in insertions))
 
+        for block, parts in planned:
+            current_fill_start = block.fill_start_row + block.cumulative_insert_rows
             cell = worksheet.cell(current_fill_start, 3)
             self._apply_filled_background(cell)
             self._fill_mixed_content_with_tables(worksheet, cell, parts)
 
-        # 收集填充过程中新创建的 C-P 列合并单元格
-        new_merged_ranges = []
-        for mr in worksheet.merged_cells.ranges:
-            if mr.min_col == 3 and mr.max_col == 16:
-                range_str = str(mr)
-                if range_str not in merged_cells_before_fill:
-                    new_merged_ranges.append({
-                        'min_row': mr.min_row,
-                        'max_row': mr.max_row,
-                        'min_col': mr.min_col,
-                        'max_col': mr.max_col
-                    })
+    def _plan_dynamic_blocks(
+        self, blocks: List[BlockConfig], parameters: Dict[str, Any], missing_text: str
+    ) -> List[Tuple[BlockConfig, List[ContentPart]]]:
+        """
+        计算各区块的内容行数、可用行数、需插入行数及此前累计插入的行数
 
-        # 填充完成后，恢复 test_result 后面的原始内容
-        # 只恢复原始模板中的行（saved_content 中行号 <= template_original_max_row + rows_inserted）
-        # 不覆盖填充区域（行90之前）
-        self._restore_content_after_row(
-            worksheet, 90, cumulative_insert_rows, saved_content,
-            extra_merged_ranges=new_merged_ranges,
-            fill_end_row=90  # 填充结束行，低于此行的不恢复
-        )
+        区块之间的行距不受插入影响，可用行数直接按模板原始行号计算。
+
+        Returns:
+            [(区块配置, 解析后的内容), ...]（不含作为边界的最后一个区块）
+        """
+        planned = []
+        cumulative_insert_rows = 0
+        for block, next_block in zip(blocks, blocks[1:]):
+            param_value = parameters.get(block.param_name, "")
+            text = str(param_value) if param_value else missing_text
+            parts = list(self._parse_content(text).parts)
+
+            block.content_rows = self._calculate_content_rows(parts)
+            block.available_rows = next_block.title_row - block.fill_start_row - 1
+            block.rows_to_insert = max(0, block.content_rows - block.available_rows)
+            block.cumulative_insert_rows = cumulative_insert_rows
+            cumulative_insert_rows += block.rows_to_insert
+            planned.append((block, parts))
+        return planned
 
-    def _calculate_content_rows(self, parts: List[Dict[str, Any]]) -> int:
+    def _calculate_content_rows(self, parts: List[ContentPart]) -> int:
         """
         计算内容占用的行数（与 _fill_mixed_content_with_tables 逻辑一致）
 
@@ -226,183 +224,11 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         - 文本：1行（合并单元格），空文本跳过
         - 图片：1行
         - 表格：表头1行 + 数据行数
+        各片段的行数在解析时已计算（见 _parse_content）
         """
         if not parts:
             return 0
-
-        total_rows = 0
-        for idx, part in enumerate(parts):
-            # 1. 对象前间隔一行（第一个对象不需要）
-            if idx > 0:
-                total_rows += 1
-
-            if part["type"] == "text":
-                text = part.get("content", "").strip()
-                # 空文本跳过，不占用行数
-                if not text:
-                    continue
-                total_rows += 1
-
-            elif part["type"] == "image":
-                total_rows += 1
-
-            elif part["type"] == "table":
-                markdown_text = part.get("content", "")
-                if not markdown_text:
-                    continue
-                headers, rows, _ = self._parse_markdown_table(markdown_text)
-                if headers:
-                    total_rows += 1 + len(rows)  # 表头 + 数据行
-
-        return total_rows
-
-    def _insert_rows_protected(self, worksheet, insert_at_row: int, num_rows: int) -> None:
-        """
-        保护性插入行（供 _fill_dynamic_blocks 内部使用）
-
-        直接使用标准 insert_rows，后续由 _restore_content_after_row 恢复
-
-        Args:
-            worksheet: 工作表对象
-            insert_at_row: 插入位置
-            num_rows: 要插入的行数
-        """
-        if num_rows <= 0:
-            return
-        worksheet.insert_rows(insert_at_row, amount=num_rows)
-
-    def _save_content_after_row(self, worksheet, after_row: int, max_row: int) -> Dict[str, Any]:
-        """
-        保存指定行之后的所有内容
-
-        Args:
-            worksheet: 工作表对象
-            after_row: 保存此行之后的内容
-            max_row: 最大行号
-
-        Returns:
-            Dict: 保存的内容
-        """
-        saved = {
-            'rows': [],
-            'merged_ranges': [],
-            'column_dimensions': {},
-            'row_dimensions': {}
-        }
-
-        # 保存行数据
-        for row in range(after_row + 1, max_row + 1):
-            row_data = {
-                'row': row,
-                'cells': {},
-                'height': worksheet.row_dimensions[row].height
-            }
-            for col in range(1, worksheet.max_column + 1):
-                cell = worksheet.cell(row, col)
-                row_data['cells'][col] = {
-                    'value': cell.value,
-                    'data_type': cell.data_type,
-                }
-            saved['rows'].append(row_data)
-
-        # 保存合并单元格信息
-        for merged_range in list(worksheet.merged_cells.ranges):
-            if merged_range.min_row > after_row:
-                saved['merged_ranges'].append({
-                    'min_row': merged_range.min_row,
-                    'max_row': merged_range.max_row,
-                    'min_col': merged_range.min_col,
-                    'max_col': merged_range.max_col
-                })
-
-        # 保存列宽
-        for col in range(1, worksheet.max_column + 1):
-            col_letter = get_column_letter(col)
-            if col_letter in worksheet.column_dimensions:
-                saved['column_dimensions'][col] = worksheet.column_dimensions[col_letter].width
-
-        return saved
-
-    def _restore_content_after_row(
-        self, worksheet, after_row: int, rows_inserted: int, saved: Dict[str, Any],
-        extra_merged_ranges: List[Dict[str, int]] = None,
-        fill_end_row: int = None
-    ) -> None:
-        """
-        恢复保存的内容到正确位置
-
-        Args:
-            worksheet: 工作表对象
-            after_row: 原分隔行
-            rows_inserted: 插入的行数
-            saved: 保存的内容
-            extra_merged_ranges: 额外需要恢复的合并单元格列表（用于保留填充过程中新创建的合并）
-            fill_end_row: 填充结束行，低于此行号的恢复内容将被跳过（用于避免覆盖填充内容）
-        """
-        if not saved or not saved.get('rows'):
-            return
-
-        # 恢复合并单元格（先清除受影响的，但保留填充区域）
-        ranges_to_remove = []
-        for merged_range in list(worksheet.merged_cells.ranges):
-            if merged_range.min_row > after_row:
-                # 如果设置了 fill_end_row，跳过填充区域内的合并
-                if fill_end_row is not None and merged_range.min_row <= fill_end_row:
-                    continue
-                ranges_to_remove.append(str(merged_range))
-        for range_str in ranges_to_remove:
-            try:
-                worksheet.unmerge_cells(range_str)
-            except Exception:
-                pass
-
-        # 恢复行数据（跳过填充区域）
-        for row_data in saved['rows']:
-            original_row = row_data['row']
-            new_row = original_row + rows_inserted
-
-            # 跳过填充区域的行
-            if fill_end_row is not None and new_row <= fill_end_row:
-                continue
-
-            # 恢复单元格值（跳过合并单元格中的非左上角单元格）
-            for col, cell_data in row_data['cells'].items():
-                cell = worksheet.cell(new_row, col)
-                # 跳过合并单元格中的非左上角单元格
-                if isinstance(cell, MergedCell):
-                    continue
-                cell.value = cell_data['value']
-
-            # 恢复行高
-            if row_data.get('height'):
-                worksheet.row_dimensions[new_row].height = row_data['height']
-
-        # 恢复合并单元格（跳过填充区域）
-        for merged_info in saved['merged_ranges']:
-            # 跳过填充区域的合并
-            if fill_end_row is not None and merged_info['min_row'] <= fill_end_row:
-                continue
-            try:
-                new_min_row = merged_info['min_row'] + rows_inserted
-                new_max_row = merged_info['max_row'] + rows_inserted
-
-                col_letter_start = get_column_letter(merged_info['min_col'])
-                col_letter_end = get_column_letter(merged_info['max_col'])
-                merged_range_str = f"{col_letter_start}{new_min_row}:{col_letter_end}{new_max_row}"
-                worksheet.merge_cells(merged_range_str)
-            except Exception:
-                pass
-
-        # 恢复额外传入的合并单元格（填充过程中新创建的）
-        if extra_merged_ranges:
-            for merged_info in extra_merged_ranges:
-                try:
-                    col_letter_start = get_column_letter(merged_info['min_col'])
-                    col_letter_end = get_column_letter(merged_info['max_col'])
-                    merged_range_str = f"{col_letter_start}{merged_info['min_row']}:{col_letter_end}{merged_info['max_row']}"
-                    worksheet.merge_cells(merged_range_str)
-                except Exception:
-                    pass
+        return len(parts) - 1 + sum(part.rows for part in parts)
 
     def _set_wrap_text_and_adjust_row_height(self, worksheet, cell) -> None:
         """设置单元格自动换行并动态调整行高"""
@@ -433,34 +259,16 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         if not text:
             return
         
-        # 获取列宽（字符数），如果未设置则使用默认值
-        column_letter = get_column_letter(column)
-        column_width = worksheet.column_dimensions[column_letter].width
-        if not column_width or column_width == 0:
-            column_width = 15  # 默认列宽
+        # 获取列宽（字符数，合并单元格取合并区域总宽），如果未设置则使用默认值
+        column_width = sheet_text_metrics(worksheet).cell_width(row, column, 15)
         
         # 获取字体大小，如果未设置则使用默认值
         font_size = 9  # 默认字体大小
         if cell.font and cell.font.size:
             font_size = cell.font.size
         
-        # 估算每行可容纳的字符数（考虑中文字符占2个位置，英文占1个位置）
-        chars_per_line = int(column_width * 1.7)
-        if chars_per_line <= 0:
-            chars_per_line = 15
-        
-        # 计算需要的行数
-        lines = text.split('\n')
-        total_lines = 0
-        for line in lines:
-            if line:
-                line_count = (len(line) + chars_per_line - 1) // chars_per_line
-                total_lines += max(1, line_count)
-            else:
-                total_lines += 1
-        
-        if total_lines == 0:
-            total_lines = 1
+        # 计算需要的行数（中文字符占2个位置，英文占1个位置）
+        total_lines = count_lines(text, column_width)
         
         # 计算行高（点）
         row_height = total_lines * font_size * 1.5
@@ -510,7 +318,7 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             return
 
         # 解析混合内容（文本和表格）
-        parts = self._parse_mixed_content(text)
+        parts = list(self._parse_content(text).parts)
         
         if not parts:
             return
@@ -522,7 +330,7 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         self._fill_mixed_content_with_tables(worksheet, cell, parts)
 
     def _fill_mixed_content_with_tables(
-        self, worksheet, first_cell, parts: List[Dict[str, Any]]
+        self, worksheet, first_cell, parts: List[ContentPart]
     ) -> None:
         """
         填充混合内容（文本+表格+图片）
@@ -546,31 +354,28 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             if idx > 0:
                 current_row += 1
 
-            if part["type"] == "text":
-                text = part.get("content", "").strip()
-                # 剔除前后的空行
-                text = self._trim_empty_lines(text)
-                if not text:
+            if part.type == PART_TEXT:
+                # 解析时已剔除前后的空行
+                if not part.text:
                     continue
                 cell_range = f"C{current_row}:P{current_row}"
-                self._merge_and_set_text(worksheet, cell_range, text)
+                self._merge_and_set_text(worksheet, cell_range, part.text, part.line_widths)
                 current_row += 1  # 文本占一行
 
-            elif part["type"] == "image":
-                image_url = part.get("content", "")
+            elif part.type == PART_IMAGE:
+                image_url = part.content
                 if not image_url:
                     continue
-                image_path = self._download_image(image_url)
-                if image_path:
-                    self._insert_image_in_cell(worksheet, current_row, 3, image_path)
+                image_content = self._download_image(image_url)
+                if image_content:
+                    self._insert_image_in_cell(worksheet, current_row, 3, image_content, image_url)
                     current_row += 1  # 图片占一行
 
-            elif part["type"] == "table":
-                markdown_text = part.get("content", "")
-                if not markdown_text:
+            elif part.type == PART_TABLE:
+                if part.table is None:
                     continue
                 table_start_row = current_row
-                table_rows_count = self._insert_excel_table(worksheet, table_start_row, markdown_text)
+                table_rows_count = self._insert_excel_table(worksheet, table_start_row, part.table)
                 current_row = table_start_row + table_rows_count
 
     def _trim_empty_lines(self, text: str) -> str:
@@ -594,7 +399,9 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         print(f"[DEBUG] _trim_empty_lines: 处理后 {end_idx - start_idx + 1} 行, 结果长度={len(result)}")
         return result
 
-    def _adjust_row_height_for_merged_text(self, worksheet, row: int, text: str) -> None:
+    def _adjust_row_height_for_merged_text(
+        self, worksheet, row: int, text: str, widths: Optional[Tuple[int, ...]] = None
+    ) -> None:
         """
         根据文本内容动态调整合并单元格的行高
 
@@ -602,25 +409,14 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             worksheet: 工作表对象
             row: 行号
             text: 单元格文本
+            widths: 文本各行的显示宽度（解析时已计算，省略时按 text 计算）
         """
         if not text:
             worksheet.row_dimensions[row].height = 20
             return
 
-        # 获取列宽（C列到P列 = 14列）
-        # 使用列字母而不是通过 cell.column_letter 避免 MergedCell 问题
-        total_width = 0
-        from openpyxl.utils import get_column_letter
-        for col_idx in range(3, 17):  # C=3 到 P=16
-            col_letter = get_column_letter(col_idx)
-            col_width = worksheet.column_dimensions[col_letter].width
-            if col_width:
-                total_width += col_width
-            else:
-                total_width += 8  # 默认列宽
-
-        if total_width == 0:
-            total_width = 120  # 默认总宽度
+        # 获取列宽（C列到P列 = 14列，未设置的列按 8 计）
+        total_width = sheet_text_metrics(worksheet).span_width(3, 16, 8)
 
         # 获取字体大小
         font_size = 9  # 默认字体大小
@@ -628,23 +424,8 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         if cell.font and cell.font.size:
             font_size = cell.font.size
 
-        # 估算每行可容纳的字符数（考虑中文字符占2个位置）
-        chars_per_line = int(total_width * 1.7)
-        if chars_per_line <= 0:
-            chars_per_line = 120
-
-        # 计算需要的行数
-        lines = text.split('\n')
-        total_lines = 0
-        for line in lines:
-            if line:
-                line_count = (len(line) + chars_per_line - 1) // chars_per_line
-                total_lines += max(1, line_count)
-            else:
-                total_lines += 1
-
-        if total_lines == 0:
-            total_lines = 1
+        # 计算需要的行数（中文字符占2个位置）
+        total_lines = wrapped_line_count(line_widths(text) if widths is None else widths, line_capacity(total_width))
 
         # 计算行高
         row_height = total_lines * font_size * 1.5
@@ -657,7 +438,9 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
 
         worksheet.row_dimensions[row].height = row_height
 
-    def _merge_and_set_text(self, worksheet, cell_range: str, text: str) -> None:
+    def _merge_and_set_text(
+        self, worksheet, cell_range: str, text: str, widths: Optional[Tuple[int, ...]] = None
+    ) -> None:
         """
         合并单元格区域并设置文本，根据内容动态调整行高
 
@@ -665,15 +448,18 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             worksheet: 工作表对象
             cell_range: 单元格范围，如 "C5:P5"
             text: 要设置的文本
+            widths: 文本各行的显示宽度（可选，解析时已计算）
         """
+        merged_cells = self._merged_cells(worksheet)
+
         # 取消可能存在的合并
         try:
-            worksheet.unmerge_cells(cell_range)
+            merged_cells.unmerge(cell_range)
         except (ValueError, KeyError):
             pass
 
         # 合并单元格
-        worksheet.merge_cells(cell_range)
+        merged_cells.merge(cell_range)
 
         # 获取合并后的单元格（左上角）
         start_cell_addr = cell_range.split(":")[0]
@@ -693,21 +479,21 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         # 获取合并区域的起始行
         start_row = int(cell_range.split(":")[0][1:])
         # 根据内容动态调整行高
-        self._adjust_row_height_for_merged_text(worksheet, start_row, text)
+        self._adjust_row_height_for_merged_text(worksheet, start_row, text, widths)
 
-    def _insert_excel_table(self, worksheet, start_row: int, markdown_text: str) -> int:
+    def _insert_excel_table(self, worksheet, start_row: int, table: TableContent) -> int:
         """
         在指定位置插入 Excel 表格
 
         Args:
             worksheet: 工作表对象
             start_row: 起始行号
-            markdown_text: markdown 或 HTML 格式的表格文本
+            table: 解析后的 markdown 或 HTML 表格
 
         Returns:
             int: 插入的表格总行数
         """
-        headers, rows, merge_info = self._parse_markdown_table(markdown_text)
+        headers, rows, merge_info = table.headers, table.rows, table.merge_info
         if not headers:
             return 0
 
@@ -741,15 +527,8 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         if cell.font and cell.font.size:
             font_size = cell.font.size
 
-        # 计算列宽（用于行高估算）
-        col_widths = []
-        for col_idx in range(3, 3 + num_cols):
-            col_letter = get_column_letter(col_idx)
-            col_width = worksheet.column_dimensions[col_letter].width
-            if col_width:
-                col_widths.append(col_width)
-            else:
-                col_widths.append(10)  # 默认列宽
+        # 计算列宽（用于行高估算，未设置的列按 10 计）
+        col_widths = sheet_text_metrics(worksheet).column_widths(3, 2 + num_cols, 10)
 
         # 写入表头
         for col_idx, header in enumerate(headers, start=3):
@@ -792,7 +571,8 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         """
         计算并设置表格每行的行高（考虑合并单元格）
 
-        对于包含合并单元格的行，需要根据所有被合并列中最长的内容来计算行高
+        对于包含合并单元格的行，需要根据所有被合并列中最长的内容来计算行高；
+        未合并单元格的折行行数按列批量计算
 
         Args:
             worksheet: 工作表对象
@@ -803,12 +583,18 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             col_widths: 各列宽度列表
             font_size: 字体大小
         """
-        # 构建单元格内容的2D数组（用于行高计算）
-        all_rows_content = [headers] + rows
         num_cols = len(headers)
 
-        # 计算每行每列的宽度（考虑 colspan）
-        col_span_widths = self._calculate_col_span_widths(merge_info, col_widths, num_cols)
+        # 各列全部数据行的折行行数
+        column_lines = [
+            column_line_counts((row[col] if col < len(row) else "" for row in rows), col_widths[col])
+            for col in range(num_cols)
+        ]
+
+        # 按行分组合并信息
+        merges_by_row: Dict[int, List[Dict[str, Any]]] = {}
+        for merge in merge_info:
+            merges_by_row.setdefault(merge['row'], []).append(merge)
 
         # 设置表头行高
         header_height = self._calculate_row_height_for_list(
@@ -821,13 +607,11 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             excel_row = start_row + row_idx
 
             # 获取该行的合并范围
-            row_merges = [m for m in merge_info if m['row'] == row_idx]
-
-            # 计算该行需要的最大行高
-            max_height = font_size * 2  # 最小行高
+            row_merges = merges_by_row.get(row_idx)
 
             if row_merges:
                 # 有合并单元格，需要考虑合并范围
+                max_height = font_size * 2  # 最小行高
                 for merge in row_merges:
                     merge_col = merge['col']
                     merge_colspan = merge['colspan']
@@ -835,9 +619,6 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
                     # 获取合并单元格跨越的所有列的宽度
                     total_merge_width = sum(col_widths[merge_col:merge_col + merge_colspan])
 
-                    # 获取该行被合并单元格占据的列索引范围
-                    merged_cols = set(range(merge_col, merge_col + merge_colspan))
-
                     # 获取该行在合并单元格中的内容
                     cell_content = row_data[merge_col] if merge_col < len(row_data) else ""
 
@@ -848,20 +629,14 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
                     max_height = max(max_height, content_height)
 
                 # 同时检查该行非合并单元格的内容
+                merged_cols = {m['col'] for m in row_merges}
                 for col_idx in range(num_cols):
-                    if col_idx not in {m['col'] for m in row_merges}:
-                        # 这是一个非合并单元格
-                        cell_content = row_data[col_idx] if col_idx < len(row_data) else ""
-                        content_height = self._calculate_single_cell_height(
-                            cell_content, col_widths[col_idx], font_size
-                        )
-                        max_height = max(max_height, content_height)
+                    if col_idx not in merged_cols:
+                        max_height = max(max_height, column_lines[col_idx][row_idx - 1] * font_size * 1.5)
             else:
-                # 无合并单元格，使用原有逻辑
-                row_cells = [row_data[i] if i < len(row_data) else "" for i in range(num_cols)]
-                max_height = self._calculate_row_height_for_list(
-                    row_cells, col_widths, font_size, is_header=False
-                )
+                # 无合并单元格，取各列折行行数的最大值
+                max_lines = max([1] + [lines[row_idx - 1] for lines in column_lines])
+                max_height = self._row_height_for_lines(max_lines, font_size)
 
             # 设置最小和最大行高限制
             min_height = font_size * 1.5
@@ -871,41 +646,6 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
 
             worksheet.row_dimensions[excel_row].height = final_height
 
-    def _calculate_col_span_widths(
-        self, merge_info: List[Dict[str, Any]], col_widths: List[float], num_cols: int
-    ) -> List[float]:
-        """
-        计算每列的"计算宽度"（考虑colspan影响）
-
-        对于被colspan占据的列，需要分配宽度
-
-        Args:
-            merge_info: 合并信息列表
-            col_widths: 原始列宽列表
-            num_cols: 列数
-
-        Returns:
-            每列的计算宽度列表
-        """
-        # 复制原始列宽
-        calculated_widths = list(col_widths)
-
-        # 处理所有colspan
-        for merge in merge_info:
-            col_idx = merge['col']
-            colspan = merge['colspan']
-
-            if col_idx + colspan > num_cols:
-                continue
-
-            # 计算合并区域的总宽度
-            total_width = sum(col_widths[col_idx:col_idx + colspan])
-
-            # 将总宽度分配给起始列
-            calculated_widths[col_idx] = total_width
-
-        return calculated_widths
-
     def _calculate_single_cell_height(
         self, text: str, col_width: float, font_size: float
     ) -> float:
@@ -920,31 +660,7 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         Returns:
             需要的行高
         """
-        if not text:
-            return font_size * 1.5
-
-        # 计算每行可容纳的字符数（考虑中文字符占2个位置）
-        chars_per_line = int(col_width * 1.7)
-        if chars_per_line <= 0:
-            chars_per_line = 10
-
-        # 计算需要的行数
-        lines = text.split('\n')
-        total_lines = 0
-        for line in lines:
-            if line:
-                line_count = (len(line) + chars_per_line - 1) // chars_per_line
-                total_lines += max(1, line_count)
-            else:
-                total_lines += 1
-
-        if total_lines == 0:
-            total_lines = 1
-
-        # 计算行高
-        row_height = total_lines * font_size * 1.5
-
-        return row_height
+        return count_lines(text, col_width) * font_size * 1.5
 
     def _calculate_row_height_for_list(
         self, cells: List[str], col_widths: List[float], font_size: float, is_header: bool = False
@@ -964,25 +680,15 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
         if not cells:
             return font_size * 2
 
-        # 计算每列每行可容纳的字符数
-        chars_per_col = [int(w * 1.7) for w in col_widths]
-
-        # 计算每列需要的行数
-        max_lines = 1
-        for i, cell_text in enumerate(cells):
-            if i >= len(chars_per_col):
-                break
-            if not cell_text:
-                continue
-            chars_per_line = chars_per_col[i]
-            if chars_per_line <= 0:
-                chars_per_line = 10
-            lines_needed = (len(cell_text) + chars_per_line - 1) // chars_per_line
-            max_lines = max(max_lines, lines_needed)
+        # 计算每列需要的行数，取最大值
+        max_lines = max([1] + [count_lines(text, width) for text, width in zip(cells, col_widths) if text])
+        return self._row_height_for_lines(max_lines, font_size, is_header)
 
+    def _row_height_for_lines(self, lines: int, font_size: float, is_header: bool = False) -> float:
+        """按折行行数计算表格行的行高"""
         # 计算行高
         line_height = font_size * 1.5
-        row_height = max_lines * line_height
+        row_height = lines * line_height
 
         # 设置最小和最大行高限制
         min_height = font_size * 1.5
@@ -1008,6 +714,7 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             num_cols: 表格列数
             num_data_rows: 数据行数（不含表头）
         """
+        merged_cells = self._merged_cells(worksheet)
         for merge in merge_info:
             row_idx = merge['row']
             col_idx = merge['col']
@@ -1040,7 +747,7 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
                 col_letter_start = get_column_letter(min_col)
                 col_letter_end = get_column_letter(max_col)
                 merge_range = f"{col_letter_start}{min_row}:{col_letter_end}{max_row}"
-                worksheet.merge_cells(merge_range)
+                merged_cells.merge(merge_range)
 
                 # 设置合并后单元格的对齐和边框
                 cell = worksheet.cell(min_row, min_col)
@@ -1059,55 +766,6 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             except Exception as e:
                 print(f"[WARNING] 合并单元格失败: {merge_range}, 错误: {e}")
 
-    def _calculate_row_height_for_cells(
-        self, cells: List[str], col_widths: List[float], font_size: float, is_header: bool = False
-    ) -> float:
-        """
-        根据单元格内容计算需要的行高
-
-        Args:
-            cells: 单元格内容列表
-            col_widths: 对应列宽列表
-            font_size: 字体大小
-            is_header: 是否为表头行
-
-        Returns:
-            float: 需要的行高
-        """
-        if not cells:
-            return font_size * 2
-
-        # 计算每列每行可容纳的字符数（考虑中文字符占2个位置）
-        chars_per_col = [int(w * 1.7) for w in col_widths]
-
-        # 计算每列需要的行数
-        max_lines = 1
-        for i, cell_text in enumerate(cells):
-            if i >= len(chars_per_col):
-                break
-            if not cell_text:
-                continue
-            chars_per_line = chars_per_col[i]
-            if chars_per_line <= 0:
-                chars_per_line = 10
-            lines_needed = (len(cell_text) + chars_per_line - 1) // chars_per_line
-            max_lines = max(max_lines, lines_needed)
-
-        # 计算行高
-        line_height = font_size * 1.5
-        row_height = max_lines * line_height
-
-        # 设置最小和最大行高限制
-        min_height = font_size * 1.5
-        max_height = font_size * 10
-        row_height = max(min_height, min(row_height, max_height))
-
-        # 表头行高增加一些
-        if is_header:
-            row_height = max(row_height, font_size * 2.5)
-
-        return row_height
-
     def _unmerge_cells_in_range(
         self, worksheet, start_row: int, end_row: int, start_col: int, end_col: int
     ) -> None:
@@ -1121,21 +779,43 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             start_col: 起始列
             end_col: 结束列
         """
-        # 复制一份 ranges，避免迭代时修改集合
-        merged_ranges_to_remove = []
-        for merged_range in list(worksheet.merged_cells.ranges):
-            # 检查合并区域是否与目标区域重叠
-            if (merged_range.min_row <= end_row and merged_range.max_row >= start_row and
-                merged_range.min_col <= end_col and merged_range.max_col >= start_col):
-                merged_ranges_to_remove.append(str(merged_range))
+        # 通过合并区域索引只检查覆盖这些行的区域
+        merged_cells = self._merged_cells(worksheet)
+        merged_ranges_to_remove = [
+            str(merged_range)
+            for merged_range in merged_cells.overlapping(start_row, end_row, start_col, end_col)
+        ]
         
         # 取消合并
         for range_str in merged_ranges_to_remove:
             try:
-                worksheet.unmerge_cells(range_str)
+                merged_cells.unmerge(range_str)
             except (ValueError, KeyError):
                 pass
 
+    def _parse_content(self, text: str) -> ParsedContent:
+        """解析混合内容并预先计算各片段的行数（按文本缓存，行数计算与渲染共用）"""
+        return self._parsed_contents.get(text, lambda: self._build_parsed_content(text))
+
+    def _build_parsed_content(self, text: str) -> ParsedContent:
+        parts: List[ContentPart] = []
+        for raw in self._parse_mixed_content(text):
+            content = raw.get("content", "")
+            if raw["type"] == PART_TEXT:
+                # 剔除前后的空行；空文本不占用行数
+                trimmed = self._trim_empty_lines(content.strip())
+                parts.append(ContentPart(
+                    PART_TEXT, content, text=trimmed, rows=1 if trimmed else 0, line_widths=line_widths(trimmed)
+                ))
+            elif raw["type"] == PART_IMAGE:
+                parts.append(ContentPart(PART_IMAGE, content, rows=1))
+            else:
+                table = TableContent(*self._parse_markdown_table(content)) if content else None
+                parts.append(ContentPart(PART_TABLE, content, table=table, rows=table.row_count if table else 0))
+        return ParsedContent(
+            parts=tuple(parts), image_urls=tuple(part.content for part in parts if part.type == PART_IMAGE)
+        )
+
     def _parse_mixed_content(self, text: str) -> List[Dict[str, Any]]:
         """
         解析混合的 markdown/HTML 内容，识别文本段落、表格和图片
@@ -1518,59 +1198,36 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
 
         return None
 
-    def _download_image(self, url: str) -> Optional[Path]:
+    def _collect_image_urls(self, parameters: Dict[str, Any]) -> List[str]:
+        """参数文本中以图片语法出现的全部 URL（用于渲染前预取）"""
+        urls: List[str] = []
+        for value in parameters.values():
+            if not isinstance(value, str):
+                continue
+            for line in value.splitlines():
+                image_url = self._extract_image_url(line.strip())
+                if image_url:
+                    urls.append(image_url)
+        return urls
+
+    def _download_image(self, url: str) -> bytes:
         """
-        下载图片到临时目录
+        获取图片内容（经由共享图片缓存，优先使用预取结果）
 
         Args:
             url: 图片 URL
 
         Returns:
-            下载后的图片路径，失败返回 None
+            图片内容，失败返回空字节串
         """
-        import tempfile
-        import urllib.request
-        import uuid
-
         if not url:
-            return None
+            return b""
+        content = self._fetch_image(url)
+        if not content:
+            print(f"图片下载失败: {url}")
+        return content
 
-        try:
-            # 创建临时目录
-            temp_dir = Path(tempfile.gettempdir()) / "ohc_images"
-            temp_dir.mkdir(parents=True, exist_ok=True)
-
-            # 生成唯一文件名
-            ext = self._get_image_extension(url)
-            filename = f"{uuid.uuid4().hex}{ext}"
-            file_path = temp_dir / filename
-
-            # 下载图片
-            req = urllib.request.Request(
-                url,
-                headers={
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-            )
-            with urllib.request.urlopen(req, timeout=10) as response:
-                file_path.write_bytes(response.read())
-
-            return file_path
-        except Exception as e:
-            print(f"图片下载失败: {url}, 错误: {e}")
-            return None
-
-    def _get_image_extension(self, url: str) -> str:
-        """从 URL 中提取图片扩展名"""
-        # 常见图片扩展名
-        extensions = ['.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp', '.svg']
-        url_lower = url.lower()
-        for ext in extensions:
-            if ext in url_lower:
-                return ext
-        return '.png'  # 默认扩展名
-
-    def _insert_image_in_cell(self, worksheet, row: int, col: int, image_path: Path) -> None:
+    def _insert_image_in_cell(self, worksheet, row: int, col: int, image_content: bytes, url: Optional[str] = None) -> None:
         """
         在指定单元格插入图片
 
@@ -1581,11 +1238,12 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             worksheet: 工作表对象
             row: 行号
             col: 列号（C列 = 3，但实际使用 C～I 列）
-            image_path: 图片路径
+            image_content: 图片内容
+            url: 图片 URL（用作规格化结果的缓存键）
         """
         from openpyxl.drawing.image import Image as XLImage
 
-        if not image_path or not image_path.exists():
+        if not image_content:
             return
 
         try:
@@ -1593,20 +1251,13 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             self._unmerge_cells_in_range(worksheet, row, row, 3, 9)
 
             # 加载图片
-            img = XLImage(str(image_path))
+            img = XLImage(io.BytesIO(image_content))
             img_width = img.width
             img_height = img.height
 
             # 计算 C～I 列的总宽度（单位：字符数）
             # Excel 中列宽单位是"字符数"，中文字符约等于 2 个单位
-            total_col_width_chars = 0
-            for col_idx in range(3, 10):  # C=3 到 I=9
-                col_letter = get_column_letter(col_idx)
-                col_width = worksheet.column_dimensions[col_letter].width
-                if col_width and col_width > 0:
-                    total_col_width_chars += col_width
-                else:
-                    total_col_width_chars += 12  # 默认列宽
+            total_col_width_chars = sheet_text_metrics(worksheet).span_width(3, 9, 12)  # C=3 到 I=9，默认列宽 12
 
             # 将字符宽度转换为像素（Excel 中约 7 像素/字符）
             total_pixel_width = total_col_width_chars * 7
@@ -1627,6 +1278,11 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             new_width = int(img_width * scale)
             new_height = int(img_height * scale)
 
+            # 按显示宽度与输出 DPI 缩小并重新编码，避免嵌入超大原图
+            normalized = normalize_image(image_content, target_pixels_for_screen_px(new_width), url)
+            if normalized is not image_content:
+                img = XLImage(io.BytesIO(normalized))
+
             # 设置图片尺寸
             img.width = new_width
             img.height = new_height
@@ -1647,4 +1303,4 @@ class IndividualTestSpecFiller(ExcelTemplateFiller):
             img.anchor = cell_ref
 
         except Exception as e:
-            print(f"插入图片失败: {image_path}, 错误: {e}")
+            print(f"插入图片失败: 第{row}行, 错误: {e}")
@@ -2,9 +2,9 @@
 
 from pathlib import Path
 from typing import Any, Dict, Optional
-from openpyxl import load_workbook
 from openpyxl.styles import PatternFill
 
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import ExcelTemplateFiller
 
 
@@ -42,19 +42,16 @@ class LabelingSpecificationFiller(ExcelTemplateFiller):
             # 设置语言（用于空值兜底）
             self._set_language(resolved_language)
 
-            workbook = load_workbook(template_path)
-            worksheet = workbook.active
+            index = template_cache.placeholder_index(template_path)
 
-            # 填充字段
-            self._fill_fields(worksheet, parameters, resolved_language)
+            def fill(worksheet) -> None:
+                # 填充字段
+                self._fill_fields(worksheet, parameters, resolved_language)
 
-            # 替换其他占位符
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        cell.value = self._replace_placeholders(cell.value, parameters)
+                # 替换其他占位符
+                self._replace_indexed_placeholders(worksheet, index, parameters)
 
-            workbook.save(output_path)
+            self._fill_active_sheet(template_path, output_path, fill)
             return True
         except Exception as e:
             print(f"标签仕様書模板填充失败: {str(e)}")
@@ -5,9 +5,9 @@ import re
 from copy import copy
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-from openpyxl import load_workbook
 from openpyxl.styles import PatternFill
 
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import ExcelTemplateFiller
 
 logger = logging.getLogger(__name__)
@@ -70,24 +70,20 @@ class PackagingDesignSpecificationFiller(ExcelTemplateFiller):
         non_empty_fields = [k for k, v in parameters.items() if v]
         logger.info("[PackagingDesignSpecificationFiller] 填充字段: %s", non_empty_fields)
         try:
-            workbook = load_workbook(template_path)
-            worksheet = workbook.active
-
             # 优先使用外部传入语言，否则从模板路径提取
             language = (language or self._extract_language_from_path(template_path)).strip().lower() or "zh"
             # 设置语言（用于空值兜底）
             self._set_language(language)
+            index = template_cache.placeholder_index(template_path)
 
-            # 填充字段
-            self._fill_fields(worksheet, parameters, language)
+            def fill(worksheet) -> None:
+                # 填充字段
+                self._fill_fields(worksheet, parameters, language)
 
-            # 替换其他占位符
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        cell.value = self._replace_placeholders(cell.value, parameters)
+                # 替换其他占位符
+                self._replace_indexed_placeholders(worksheet, index, parameters)
 
-            workbook.save(output_path)
+            self._fill_active_sheet(template_path, output_path, fill)
             return True
         except Exception as e:
             logger.error("包装设计仕样书模板填充失败: %s", str(e), exc_info=True)
@@ -3,10 +3,11 @@
 import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional
-from openpyxl import load_workbook
 from openpyxl.styles import Font, Alignment, Border, PatternFill, Side
 from openpyxl.utils import get_column_letter, range_boundaries
 
+from src.infrastructure.metrics import annotate
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import ExcelTemplateFiller
 
 logger = logging.getLogger(__name__)
@@ -43,7 +44,7 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             # 设置语言（用于空值兜底）
             self._set_language(language)
 
-            workbook = load_workbook(template_path)
+            workbook = template_cache.load_workbook(template_path)
             worksheet = workbook.active
 
             # 1. 填充简单拼接字段
@@ -53,16 +54,11 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             self._fill_table_data(worksheet, parameters)
             
             # 替换其他占位符
-            for row in worksheet.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str):
-                        original_value = cell.value
-                        replaced_value = self._replace_placeholders(original_value, parameters)
-                        if replaced_value != original_value:
-                            cell.value = replaced_value
-                            self._apply_filled_background_to_cell(cell)
+            index = template_cache.placeholder_index(template_path)
+            for cell in self._replace_indexed_placeholders(worksheet, index, parameters):
+                self._apply_filled_background_to_cell(cell)
             
-            workbook.save(output_path)
+            self._save_workbook(workbook, template_path, output_path)
             return True
         except Exception as e:
             logger.error("产品环境评估模板填充失败: %s", str(e), exc_info=True)
@@ -159,9 +155,13 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
         # 如果需要插入行，在表尾行之前插入
         if rows_to_insert > 0:
             worksheet.insert_rows(FOOTER_ROW, amount=rows_to_insert)
+            annotate(rows_inserted=rows_to_insert)
             # 插入行后，表尾行位置会下移
             # 但这里我们不需要更新FOOTER_ROW，因为后续操作不涉及表尾行
         
+        # 合并区域索引：逐行检查跨行合并时无需遍历全部合并区域
+        merged_cells = self._merged_cells(worksheet)
+
         # 填充数据
         for i in range(data_count):
             current_row = START_DATA_ROW + i
@@ -176,22 +176,20 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             cell_b = worksheet.cell(current_row, 2)  # B列
             # 检查并取消可能存在的跨行合并（只取消跨行的，不取消单行的）
             merged_ranges_to_remove = []
-            for merged_range in list(worksheet.merged_cells.ranges):
-                # 检查是否涉及B或C列，且是跨行合并（min_row != max_row）
-                if (merged_range.min_col <= 3 and merged_range.max_col >= 2 and 
-                    merged_range.min_row <= current_row <= merged_range.max_row and
-                    merged_range.min_row != merged_range.max_row):
+            for merged_range in merged_cells.overlapping(current_row, current_row, 2, 3):
+                # 只取消跨行合并（min_row != max_row）
+                if merged_range.min_row != merged_range.max_row:
                     merged_ranges_to_remove.append(str(merged_range))
             # 安全地取消合并，捕获可能的KeyError
             for range_str in merged_ranges_to_remove:
                 try:
-                    worksheet.unmerge_cells(range_str)
+                    merged_cells.unmerge(range_str)
                 except (KeyError, ValueError):
                     # 如果取消合并失败（单元格不存在等），忽略错误继续执行
                     pass
             cell_b.value = ''
             merge_range_bc = f'B{current_row}:C{current_row}'
-            worksheet.merge_cells(merge_range_bc)
+            merged_cells.merge(merge_range_bc)
             self._apply_merged_cell_style(worksheet, merge_range_bc, header_style)
             self._apply_filled_background_to_range(worksheet, merge_range_bc)
             
@@ -199,7 +197,7 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             cell_d = worksheet.cell(current_row, 4)  # D列
             cell_d.value = product_model
             merge_range_dh = f'D{current_row}:H{current_row}'
-            worksheet.merge_cells(merge_range_dh)
+            merged_cells.merge(merge_range_dh)
             self._apply_merged_cell_style(worksheet, merge_range_dh, header_style)
             self._apply_filled_background_to_range(worksheet, merge_range_dh)
             
@@ -207,7 +205,7 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             cell_i = worksheet.cell(current_row, 9)  # I列
             cell_i.value = sales_name
             merge_range_ij = f'I{current_row}:J{current_row}'
-            worksheet.merge_cells(merge_range_ij)
+            merged_cells.merge(merge_range_ij)
             self._apply_merged_cell_style(worksheet, merge_range_ij, header_style)
             self._apply_filled_background_to_range(worksheet, merge_range_ij)
             
@@ -215,7 +213,7 @@ class ProductEnvironmentAssessmentFiller(ExcelTemplateFiller):
             cell_k = worksheet.cell(current_row, 11)  # K列
             cell_k.value = target_area
             merge_range_km = f'K{current_row}:M{current_row}'
-            worksheet.merge_cells(merge_range_km)
+            merged_cells.merge(merge_range_km)
             self._apply_merged_cell_style(worksheet, merge_range_km, header_style)
             self._apply_filled_background_to_range(worksheet, merge_range_km)
             
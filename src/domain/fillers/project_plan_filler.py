@@ -4,15 +4,28 @@ from copy import deepcopy
 import io
 import logging
 import re
-import urllib.request
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from docx import Document
 from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 from docx.shared import Cm, Pt, RGBColor
 
+from src.infrastructure.docx_fill_plan import BoundFillPlan
+from src.infrastructure.image_normalizer import normalize_image, target_pixels_for_cm
+from src.infrastructure.placeholders import DOCX_PLACEHOLDERS, render_segments
+from src.infrastructure.rich_content import (
+    PART_IMAGE,
+    PART_TABLE,
+    PART_TEXT,
+    ContentPart,
+    InlineSegment,
+    ParsedContent,
+    ParsedContentCache,
+    TableContent,
+)
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import TemplateFillerStrategy
 
 logger = logging.getLogger(__name__)
@@ -38,33 +51,37 @@ class ProjectPlanFiller(TemplateFillerStrategy):
     填充流程：遍历各字段 → 判断是否富内容 → 分支渲染 → 最后批量纯文本替换
     """
 
+    # 字段值 -> 解析结果（各请求的填充器副本共享；非富内容为 None）
+    _parsed_contents = ParsedContentCache()
+
     def fill_template(self, template_path: Path, parameters: Dict[str, Any], output_path: Path, language: Optional[str] = None) -> bool:
         """填充项目计划书模板"""
         self._set_language(language)
         non_empty_fields = [k for k, v in parameters.items() if v]
         logger.info("[ProjectPlanFiller] 填充字段: %s", non_empty_fields)
         try:
-            doc = Document(template_path)
-            self._fill_all_fields(doc, parameters)
-            doc.save(output_path)
+            doc = template_cache.load_document(template_path)
+            plan = template_cache.docx_fill_plan(template_path).bind(doc)
+            self._fill_all_fields(doc, parameters, plan)
+            self._save_document(doc, template_path, output_path)
             return True
         except Exception as e:
             logger.error("项目计划书模板填充失败: %s", str(e), exc_info=True)
             return False
 
-    def _fill_all_fields(self, doc: Document, parameters: Dict[str, Any]) -> None:
+    def _fill_all_fields(self, doc: Document, parameters: Dict[str, Any], plan: BoundFillPlan) -> None:
         """遍历字段：富内容走混排渲染，纯文本收集后统一替换"""
         flat_parameters: Dict[str, str] = {}
 
         for key, raw in self._build_param_lookup(parameters).items():
-            if self._is_rich_content(raw):
+            parsed = self._parse_content(raw)
+            if parsed is not None:
                 # 富内容分支：结构性替换（段落/表格/图片）
-                parts = self._build_content_parts(raw)
-                if parts and self._replace_rich_placeholder(doc, f"{{{{{key}}}}}", parts):
+                if parsed.parts and self._replace_rich_placeholder(doc, f"{{{{{key}}}}}", parsed.parts, plan):
                     logger.info(
                         "[ProjectPlanFiller] 字段 %s 富内容已处理，插入 %d 张图片",
                         key,
-                        self._count_images_in_parts(parts),
+                        parsed.image_count,
                     )
                     continue
                 # 未能结构性替换（无片段或未找到占位符）→ 降级为纯文本 fallback
@@ -73,34 +90,66 @@ class ProjectPlanFiller(TemplateFillerStrategy):
                 # 纯文本分支：收集后整文档一次性替换
                 flat_parameters[key] = self._param_value_to_text(raw)
 
-        self._fallback_text_replace(doc, flat_parameters)
+        self._fallback_text_replace(doc, flat_parameters, plan)
 
     # ------------------------------------------------------------------
     # 富内容解析与占位符替换
     # ------------------------------------------------------------------
 
-    def _build_content_parts(self, raw: Any) -> List[Dict[str, Any]]:
+    def _parse_content(self, raw: Any) -> Optional[ParsedContent]:
+        """解析富内容字段（按字段值缓存，图片预取与渲染共用）；非富内容返回 None"""
+        if raw is None:
+            return None
+        key = ("list",) + tuple(str(item) for item in raw) if isinstance(raw, list) else str(raw)
+        return self._parsed_contents.get(key, lambda: self._build_parsed_content(raw))
+
+    def _build_parsed_content(self, raw: Any) -> Optional[ParsedContent]:
+        source_segments = self._parse_image_segments(raw)
+        if not self._is_rich_content(raw, source_segments):
+            return None
+        parts: List[ContentPart] = []
+        for part in self._build_content_parts(raw, source_segments):
+            content = part["content"]
+            if part["type"] == PART_TABLE:
+                parts.append(ContentPart(PART_TABLE, content, table=TableContent(*self._parse_table_content(content))))
+            elif part["type"] == PART_IMAGE:
+                parts.append(ContentPart(PART_IMAGE, content))
+            else:
+                # 先剥离 HTML，再拆出段内的 inline 图片
+                text_content = self._prepare_text_content(content)
+                parts.append(ContentPart(
+                    PART_TEXT, content, text=text_content, segments=tuple(self._parse_image_segments(text_content))
+                ))
+        return ParsedContent(
+            parts=tuple(parts),
+            image_urls=tuple(seg.url for seg in source_segments if seg.type == PART_IMAGE),
+        )
+
+    def _build_content_parts(
+        self, raw: Any, segments: Optional[List[InlineSegment]] = None
+    ) -> List[Dict[str, Any]]:
         """将字段值转为 text / table / image 片段列表"""
         # 值为 URL 列表时：每项视为一张独立图片，按顺序排列
         if isinstance(raw, list):
-            segments = self._parse_image_segments(raw)
+            if segments is None:
+                segments = self._parse_image_segments(raw)
             parts: List[Dict[str, Any]] = []
             for seg in segments:
-                if seg["type"] == "image":
-                    parts.append({"type": "image", "content": seg["url"]})
+                if seg.type == PART_IMAGE:
+                    parts.append({"type": "image", "content": seg.url})
                 else:
-                    parts.append({"type": "text", "content": seg["content"]})
+                    parts.append({"type": "text", "content": seg.text})
             return parts
         # 字符串：逐行扫描，拆出文本块、Markdown/HTML 表格、独立图片行
         text = str(raw).strip()
         return self._parse_mixed_content(text) if text else []
 
     def _replace_rich_placeholder(
-        self, doc: Document, placeholder: str, parts: List[Dict[str, Any]]
+        self, doc: Document, placeholder: str, parts: Sequence[ContentPart], plan: BoundFillPlan
     ) -> bool:
-        """定位占位符并渲染富内容，找到并替换返回 True"""
+        """定位占位符并渲染富内容，找到并替换返回 True（只在填充计划记录的模板段落/单元格中查找）"""
         # 优先在正文段落中查找（占位符通常独占一段）
-        for paragraph in list(doc.paragraphs):
+        for paragraph in plan.live_paragraphs():
             if placeholder not in (paragraph.text or ""):
                 continue
             # 继承占位符段落的字体，用于图片下载失败时的兜底文字
@@ -112,32 +161,16 @@ class ProjectPlanFiller(TemplateFillerStrategy):
             return True
 
         # 段落未命中时，在模板已有表格的单元格内查找
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    if placeholder not in (cell.text or ""):
-                        continue
-                    self._clear_cell(cell)
-                    self._render_mixed_into_cell(doc, cell, parts)
-                    return True
+        for cell in plan.cells:
+            if placeholder not in (cell.text or ""):
+                continue
+            self._clear_cell(cell)
+            self._render_mixed_into_cell(doc, cell, parts)
+            return True
         return False
 
-    def _count_images_in_parts(self, parts: List[Dict[str, Any]]) -> int:
-        """统计片段中的图片数量（含 text 片段内的 inline 图片）"""
-        count = 0
-        for part in parts:
-            if part["type"] == "image":
-                count += 1
-            elif part["type"] == "text":
-                # 表格单元格或段落内嵌的 ![image](url) 也计入
-                count += sum(
-                    1 for seg in self._parse_image_segments(part["content"])
-                    if seg["type"] == "image"
-                )
-        return count
-
-    def _is_rich_content(self, value: Any) -> bool:
-        """检测字段值是否含 Markdown / HTML / 图片，需走富内容渲染"""
+    def _is_rich_content(self, value: Any, segments: Optional[List[InlineSegment]] = None) -> bool:
+        """检测字段值是否含 Markdown / HTML / 图片，需走富内容渲染（segments 为已拆分的图文片段，可省略）"""
         if value is None:
             return False
         # 多 URL 列表：每张图单独占一块
@@ -157,7 +190,9 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         # --- 图片：Markdown 语法、裸 URL、或图文混排 ---
         if _MD_IMAGE_RE.search(text):
             return True
-        if any(seg["type"] == "image" for seg in self._parse_image_segments(text)):
+        if segments is None:
+            segments = self._parse_image_segments(text)
+        if any(seg.type == PART_IMAGE for seg in segments):
             return True
         # --- 表格：整段 HTML 表，或混排中的 Markdown 管道表 ---
         if self._is_markdown_table(text) or self._contains_pipe_table(text):
@@ -195,16 +230,16 @@ class ProjectPlanFiller(TemplateFillerStrategy):
                 lookup[key] = value
         return lookup
 
-    def _parse_image_segments(self, value: Any) -> List[Dict[str, Any]]:
+    def _parse_image_segments(self, value: Any) -> List[InlineSegment]:
         """将字段值拆分为按顺序排列的 text / image 片段（用于段落内图文混排）"""
         if value is None:
             return []
         if isinstance(value, list):
-            segments: List[Dict[str, Any]] = []
+            segments: List[InlineSegment] = []
             for item in value:
                 url = str(item).strip().strip("'\"")
                 if url.startswith("http://") or url.startswith("https://"):
-                    segments.append({"type": "image", "url": url})
+                    segments.append(InlineSegment(PART_IMAGE, url=url))
             return segments
 
         text = str(value)
@@ -234,14 +269,14 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         pos = 0
         for start, end, url in spans:
             if start > pos:
-                segments.append({"type": "text", "content": text[pos:start]})
-            segments.append({"type": "image", "url": url})
+                segments.append(InlineSegment(PART_TEXT, text=text[pos:start]))
+            segments.append(InlineSegment(PART_IMAGE, url=url))
             pos = end
         if pos < len(text):
-            segments.append({"type": "text", "content": text[pos:]})
+            segments.append(InlineSegment(PART_TEXT, text=text[pos:]))
 
         # 过滤掉空 text 片段
-        return [seg for seg in segments if seg["type"] != "text" or seg["content"]]
+        return [seg for seg in segments if seg.type != PART_TEXT or seg.text]
 
     def _append_filled_inline(self, paragraph, text: str, ref_font: Dict[str, Any]) -> None:
         """填充值样式：继承模板字体 + 蓝色，支持 **加粗**"""
@@ -261,7 +296,7 @@ class ProjectPlanFiller(TemplateFillerStrategy):
             self._apply_font(run, ref_font)
             run.font.color.rgb = _FILL_COLOR
 
-    def _create_scaled_image_paragraph(self, doc: Document, content: bytes):
+    def _create_scaled_image_paragraph(self, doc: Document, content: bytes, url: Optional[str] = None):
         """创建按页宽等比缩放的图片段落（含左右缩进）"""
         section = doc.sections[0]
         # 可用宽度 = 页宽 - 左右页边距 - 段落左右缩进（与模板版式对齐）
@@ -296,6 +331,9 @@ class ProjectPlanFiller(TemplateFillerStrategy):
             # PIL 不可用时仅按宽度插入，高度由 Word 自动推算
             target_height_cm = None
 
+        # 按显示宽度与输出 DPI 缩小并重新编码，避免嵌入超大原图
+        content = normalize_image(content, target_pixels_for_cm(target_width_cm), url)
+
         paragraph = doc.add_paragraph()
         paragraph.paragraph_format.left_indent = Cm(0.74)
         paragraph.paragraph_format.right_indent = Cm(1.48)
@@ -307,20 +345,17 @@ class ProjectPlanFiller(TemplateFillerStrategy):
             run.add_picture(image_stream, width=Cm(target_width_cm))
         return paragraph
 
+    def _collect_image_urls(self, parameters: Dict[str, Any]) -> List[str]:
+        """富内容字段中的全部图片 URL（用于渲染前预取）"""
+        urls: List[str] = []
+        for raw in self._build_param_lookup(parameters).values():
+            parsed = self._parse_content(raw)
+            if parsed is not None:
+                urls.extend(parsed.image_urls)
+        return urls
+
     def _download_image(self, url: str) -> bytes:
-        try:
-            req = urllib.request.Request(
-                url,
-                headers={"User-Agent": "ohc-account-invoice/1.0 (+python urllib)"},
-                method="GET",
-            )
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                status = getattr(resp, "status", None)
-                if status is not None and int(status) != 200:
-                    return b""
-                return resp.read()
-        except Exception:
-            return b""
+        return self._fetch_image(url)
 
     def _format_image_fallback(self, url: str) -> str:
         prefix = _IMAGE_DOWNLOAD_FAILED_PREFIX.get(self._language, _IMAGE_DOWNLOAD_FAILED_PREFIX["zh"])
@@ -491,54 +526,50 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         doc: Document,
         parent,
         insert_idx: int,
-        parts: List[Dict[str, Any]],
+        parts: Sequence[ContentPart],
         ref_font: Optional[Dict[str, Any]] = None,
     ) -> None:
         """在文档块级位置依次渲染 text / table / image 片段"""
         cur = insert_idx
         ref_font = ref_font or {}
         for part in parts:
-            if part["type"] == "table":
-                headers, rows, merge_info = self._parse_table_content(part["content"])
-                if headers:
-                    cur += self._insert_table_at(doc, parent, cur, headers, rows, merge_info)
-            elif part["type"] == "image":
+            if part.type == PART_TABLE:
+                table = part.table
+                if table is not None and table.headers:
+                    cur += self._insert_table_at(doc, parent, cur, table.headers, table.rows, table.merge_info)
+            elif part.type == PART_IMAGE:
                 # 独立图片行：下载后插入缩放段落，失败则写多语言兜底文字
                 added, _ = self._insert_image_block_at(
-                    doc, parent, cur, part["content"], ref_font, markdown_style=True
+                    doc, parent, cur, part.content, ref_font, markdown_style=True
                 )
                 cur += added
             else:
-                # text 片段：先剥离 HTML，再判断段内是否还有 inline 图片
-                text_content = self._prepare_text_content(part["content"])
-                segments = self._parse_image_segments(text_content)
-                if any(seg["type"] == "image" for seg in segments):
+                # text 片段：解析时已剥离 HTML 并拆出段内的 inline 图片
+                if part.has_inline_images:
                     cur += self._render_text_with_images_at_position(
-                        doc, parent, cur, segments, ref_font, markdown_style=True
+                        doc, parent, cur, part.segments, ref_font, markdown_style=True
                     )
                 else:
                     # 纯文本：按 Markdown 标题/列表/加粗渲染为多个段落元素
-                    elements = self._render_text_to_elements(doc, text_content)
+                    elements = self._render_text_to_elements(doc, part.text)
                     for el in elements:
                         parent.insert(cur, el)
                         cur += 1
 
-    def _render_mixed_into_cell(self, doc: Document, cell, parts: List[Dict[str, Any]]) -> None:
+    def _render_mixed_into_cell(self, doc: Document, cell, parts: Sequence[ContentPart]) -> None:
         """在模板表格单元格内依次渲染 text / table / image 片段（可嵌套子表格）"""
         for part in parts:
-            if part["type"] == "table":
-                headers, rows, merge_info = self._parse_table_content(part["content"])
-                if headers:
-                    self._insert_table_into_cell(doc, cell, headers, rows, merge_info)
-            elif part["type"] == "image":
-                self._insert_image_into_cell(doc, cell, part["content"])
+            if part.type == PART_TABLE:
+                table = part.table
+                if table is not None and table.headers:
+                    self._insert_table_into_cell(doc, cell, table.headers, table.rows, table.merge_info)
+            elif part.type == PART_IMAGE:
+                self._insert_image_into_cell(doc, cell, part.content)
             else:
-                text_content = self._prepare_text_content(part["content"])
-                segments = self._parse_image_segments(text_content)
-                if any(seg["type"] == "image" for seg in segments):
-                    self._render_text_with_images_into_cell(doc, cell, segments)
+                if part.has_inline_images:
+                    self._render_text_with_images_into_cell(doc, cell, part.segments)
                 else:
-                    for raw_line in text_content.splitlines():
+                    for raw_line in part.text.splitlines():
                         line = raw_line.strip()
                         if not line:
                             continue
@@ -550,40 +581,40 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         doc: Document,
         parent,
         insert_idx: int,
-        segments: List[Dict[str, Any]],
+        segments: Sequence[InlineSegment],
         ref_font: Dict[str, Any],
         markdown_style: bool = False,
     ) -> int:
         """渲染 text/image 混排片段，返回插入的元素数量"""
         cur = insert_idx
         for segment in segments:
-            if segment["type"] == "text":
+            if segment.type == PART_TEXT:
                 elements = self._render_text_to_elements(
-                    doc, self._prepare_text_content(segment["content"])
+                    doc, self._prepare_text_content(segment.text)
                 )
                 for el in elements:
                     parent.insert(cur, el)
                     cur += 1
             else:
                 added, _ = self._insert_image_block_at(
-                    doc, parent, cur, segment["url"], ref_font, markdown_style=markdown_style
+                    doc, parent, cur, segment.url, ref_font, markdown_style=markdown_style
                 )
                 cur += added
         return cur - insert_idx
 
     def _render_text_with_images_into_cell(
-        self, doc: Document, cell, segments: List[Dict[str, Any]]
+        self, doc: Document, cell, segments: Sequence[InlineSegment]
     ) -> None:
         for segment in segments:
-            if segment["type"] == "text":
-                for raw_line in self._prepare_text_content(segment["content"]).splitlines():
+            if segment.type == PART_TEXT:
+                for raw_line in self._prepare_text_content(segment.text).splitlines():
                     line = raw_line.strip()
                     if not line:
                         continue
                     p = cell.add_paragraph("")
                     self._append_markdown_inline(p, line)
             else:
-                self._insert_image_into_cell(doc, cell, segment["url"])
+                self._insert_image_into_cell(doc, cell, segment.url)
 
     def _insert_image_block_at(
         self,
@@ -597,7 +628,7 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         """下载并插入单张图片（或失败兜底），返回 (新增块级元素数, 成功插入图片数)"""
         content = self._download_image(url)
         if content:
-            paragraph = self._create_scaled_image_paragraph(doc, content)
+            paragraph = self._create_scaled_image_paragraph(doc, content, url)
             parent.insert(insert_idx, paragraph._element)
             return 1, 1
 
@@ -621,6 +652,7 @@ class ProjectPlanFiller(TemplateFillerStrategy):
             section = doc.sections[0]
             available_width = section.page_width - section.left_margin - section.right_margin
             available_width_cm = max(available_width / 360000.0, 1.0)
+            content = normalize_image(content, target_pixels_for_cm(available_width_cm), url)
             image_stream = io.BytesIO(content)
             run.add_picture(image_stream, width=Cm(available_width_cm))
             return
@@ -758,7 +790,7 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         """填充表格单元格：支持行内 Markdown 与 ![image](url)"""
         paragraph = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph("")
         segments = self._parse_image_segments(val)
-        if any(seg["type"] == "image" for seg in segments):
+        if any(seg.type == PART_IMAGE for seg in segments):
             # 含图片时需清空默认段落再逐段插入
             cell.text = ""
             for para in list(cell.paragraphs):
@@ -954,16 +986,13 @@ class ProjectPlanFiller(TemplateFillerStrategy):
     # 兜底占位符替换（正文 + 表格 + 页眉页脚）
     # ------------------------------------------------------------------
 
-    def _fallback_text_replace(self, doc: Document, flat_parameters: Dict[str, str]) -> None:
+    def _fallback_text_replace(self, doc: Document, flat_parameters: Dict[str, str], plan: BoundFillPlan) -> None:
         """对未走富内容路径的字段，将 {{key}} 替换为纯文本（蓝色）"""
-        for paragraph in doc.paragraphs:
+        for paragraph in plan.live_paragraphs():
             self._replace_in_paragraph(paragraph, flat_parameters)
 
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        self._replace_in_paragraph(paragraph, flat_parameters)
+        for paragraph in plan.cell_paragraphs():
+            self._replace_in_paragraph(paragraph, flat_parameters)
 
         # 页眉页脚同样支持占位符，但不处理图片/表格混排
         for section in doc.sections:
@@ -983,29 +1012,10 @@ class ProjectPlanFiller(TemplateFillerStrategy):
         if not full_text:
             return
 
-        ideal_text = full_text
-        for key, value in flat_parameters.items():
-            ideal_text = ideal_text.replace(f"{{{{{key}}}}}", value)
-
-        if ideal_text == full_text:
-            return
-
-        placeholder_re = re.compile(
-            r"\{\{(" + "|".join(re.escape(k) for k in flat_parameters) + r")\}\}"
-        )
-
         # 对整段拼合文本做拆分，确保跨 run 场景也能精确定位
-        parts = placeholder_re.split(full_text)
-        # parts: [普通文字, key, 普通文字, key, ...]
-        segments: List[Tuple[str, bool]] = []
-        for i, part in enumerate(parts):
-            if i % 2 == 0:
-                if part:
-                    segments.append((part, False))
-            else:
-                value = flat_parameters.get(part, "")
-                if value:
-                    segments.append((value, True))
+        segments = render_segments(DOCX_PLACEHOLDERS.split(full_text), flat_parameters.get)
+        if "".join(text for text, _ in segments) == full_text:
+            return
 
         font = self._extract_run_font_from_run(paragraph.runs[0]) if paragraph.runs else {}
 
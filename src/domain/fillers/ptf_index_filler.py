@@ -4,10 +4,10 @@ import logging
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
-from openpyxl import load_workbook
 from openpyxl.cell.cell import MergedCell
 from openpyxl.styles import PatternFill
 
+from src.infrastructure.substring_matcher import SubstringMatcher
 from src.infrastructure.template_service import ExcelTemplateFiller
 
 logger = logging.getLogger(__name__)
@@ -23,19 +23,6 @@ class PTFIndexFiller(ExcelTemplateFiller):
         """将单元格背景色设置为填充高亮色"""
         cell.fill = PatternFill(fill_type="solid", fgColor=self._FILLED_BG_COLOR)
 
-    def _get_merged_cell_top_left(self, worksheet, row, col):
-        """
-        获取合并单元格的左上角单元格
-        如果单元格不是合并单元格，返回该单元格本身
-        """
-        cell = worksheet.cell(row, col)
-        if isinstance(cell, MergedCell):
-            for merged_range in worksheet.merged_cells.ranges:
-                if (merged_range.min_row <= row <= merged_range.max_row and
-                        merged_range.min_col <= col <= merged_range.max_col):
-                    return worksheet.cell(merged_range.min_row, merged_range.min_col)
-        return cell
-
     def fill_template(
         self,
         template_path: Path,
@@ -49,9 +36,9 @@ class PTFIndexFiller(ExcelTemplateFiller):
         执行步骤：
         1. 记录本次填充涉及的非空字段，便于排查。
         2. 设置语言（用于空值兜底文案）。
-        3. 加载模板文件并取到活动工作表。
-        4. 调用 _fill_data_by_area 根据 target_area 与 file_number_map 执行具体填充。
-        5. 将填充后的工作簿保存到输出路径；任何异常都记录日志并返回 False。
+        3. 在模板的活动工作表上（按 engine 直接修补 XML 或经 openpyxl）
+           调用 _fill_data_by_area，根据 target_area 与 file_number_map 执行具体填充。
+        4. 将填充后的工作簿保存到输出路径；任何异常都记录日志并返回 False。
 
         Args:
             template_path: 模板文件路径
@@ -69,15 +56,10 @@ class PTFIndexFiller(ExcelTemplateFiller):
             # 步骤 2：设置语言（用于空值兜底）
             self._set_language(language)
 
-            # 步骤 3：加载模板并取活动工作表
-            workbook = load_workbook(template_path)
-            worksheet = workbook.active
-
-            # 步骤 4：执行具体填充逻辑
-            self._fill_data_by_area(worksheet, parameters)
-
-            # 步骤 5：保存工作簿
-            workbook.save(output_path)
+            # 步骤 3、4：在活动工作表上执行具体填充逻辑并保存工作簿
+            self._fill_active_sheet(
+                template_path, output_path, lambda worksheet: self._fill_data_by_area(worksheet, parameters)
+            )
             return True
         except Exception as e:
             logger.error("PTF INDEX模板填充失败: %s", str(e), exc_info=True)
@@ -125,16 +107,18 @@ class PTFIndexFiller(ExcelTemplateFiller):
            C 列为空的行直接跳过，不参与后续匹配与写入。
         5. 解析 file_number_map：将每一项的 short_name 按 '|' 分割成多个名字，
            整理为 [(file_number, [name1, name2, ...]), ...]。
-        6. 对每个 matched_cols × data_rows 的单元格：
-           a) 若目标格是合并区的从属格（MergedCell），直接跳过。
-           b) 取 C 列文本，依次判断是否"包含"任一名字，命中则收集 (首名字, file_number)。
-           c) 写入策略（"首名字"取 short_name 以 '|' 分割后的第一个名字）：
+        6. 用全部名字构建多模式匹配自动机，每个数据行的 C 列文本只扫描一次：
+           a) 收集 C 列文本"包含"任一名字的 entry，得到 (首名字, file_number)。
+           b) 写入文本按行计算一次，供所有命中列复用。
+           写入策略（"首名字"取 short_name 以 '|' 分割后的第一个名字）：
               - 无命中：写入兜底文本。
               - 仅命中 1 个 entry：只写 file_number（不带首名字）。
               - 命中 >= 2 个 entry 且首名字全部相同：省略名字前缀，逐行列出 file_number。
               - 命中 >= 2 个 entry 且首名字存在差异：按"首名字"分组，每组先写一行
                 "首名字:"，随后逐行列出该组的 file_number；多组之间用空行分隔。
-           d) 写入后设置高亮背景色。
+        7. 对每个 matched_cols × data_rows 的单元格：
+           a) 若目标格是合并区的从属格（MergedCell），直接跳过。
+           b) 写入该行的文本并设置高亮背景色。
         """
         # 步骤 1：读取并校验 target_area，按半角逗号分割
         target_area_raw: str = parameters.get("target_area", "")
@@ -183,41 +167,54 @@ class PTFIndexFiller(ExcelTemplateFiller):
         entries = self._parse_map_entries(file_number_map)
         missing_text = self._missing_text()
 
-        # 步骤 6：对命中列 × 数据行做"包含"匹配并写入
+        # 步骤 6：名字 -> 包含该名字的 entry 序号；每行文本单次扫描得到命中的 entry
+        name_entries: Dict[str, List[int]] = {}
+        for entry_index, (_, names) in enumerate(entries):
+            for name in names:
+                name_entries.setdefault(name, []).append(entry_index)
+        matcher = SubstringMatcher(name_entries)
+
+        row_values: List[Tuple[int, str]] = []
+        for row, c_text in data_rows:
+            matched_entries = sorted({
+                entry_index
+                for name in matcher.find(c_text)
+                for entry_index in name_entries[name]
+            })
+            # 6a：收集所有"包含命中"的 (首名字, file_number)（按 entries 顺序去重）
+            matched_items = list(dict.fromkeys(
+                (entries[entry_index][1][0], entries[entry_index][0]) for entry_index in matched_entries
+            ))
+            # 6b：按命中数量决定写入格式
+            row_values.append((row, self._format_matched_items(matched_items, missing_text)))
+
+        # 步骤 7：写入命中列 × 数据行
         for col in matched_cols:
-            for row, c_text in data_rows:
-                # 6a：遇到合并区从属格（只读）直接跳过
+            for row, value in row_values:
+                # 7a：遇到合并区从属格（只读）直接跳过
                 cell = worksheet.cell(row, col)
                 if isinstance(cell, MergedCell):
                     continue
-
-                # 6b：收集所有"包含命中"的 (首名字, file_number)（按 entries 顺序去重）
-                matched_items: List[Tuple[str, str]] = []
-                for fn, names in entries:
-                    if any(name in c_text for name in names):
-                        first_name = names[0]
-                        pair = (first_name, fn)
-                        if pair not in matched_items:
-                            matched_items.append(pair)
-
-                # 6c：按命中数量决定写入格式
-                if not matched_items:
-                    cell.value = missing_text
-                elif len(matched_items) == 1:
-                    cell.value = matched_items[0][1]
-                else:
-                    unique_names = {name for name, _ in matched_items}
-                    if len(unique_names) == 1:
-                        # 全部命中同一首名字 → 省略前缀，仅列出 file_number
-                        cell.value = "\n".join(fn for _, fn in matched_items)
-                    else:
-                        # 名字混合 → 按首名字分组，组内 file_number 顺序写在名字下方
-                        groups: Dict[str, List[str]] = {}
-                        for name, fn in matched_items:
-                            groups.setdefault(name, []).append(fn)
-                        blocks: List[str] = []
-                        for name, fns in groups.items():
-                            blocks.append("\n".join([f"{name}:", *fns]))
-                        cell.value = "\n\n".join(blocks)
-                # 6d：设置高亮背景色
+                # 7b：写入并设置高亮背景色
+                cell.value = value
                 self._apply_filled_background(cell)
+
+    @staticmethod
+    def _format_matched_items(matched_items: List[Tuple[str, str]], missing_text: str) -> str:
+        """按命中数量生成写入文本"""
+        if not matched_items:
+            return missing_text
+        if len(matched_items) == 1:
+            return matched_items[0][1]
+        unique_names = {name for name, _ in matched_items}
+        if len(unique_names) == 1:
+            # 全部命中同一首名字 → 省略前缀，仅列出 file_number
+            return "\n".join(fn for _, fn in matched_items)
+        # 名字混合 → 按首名字分组，组内 file_number 顺序写在名字下方
+        groups: Dict[str, List[str]] = {}
+        for name, fn in matched_items:
+            groups.setdefault(name, []).append(fn)
+        blocks: List[str] = []
+        for name, fns in groups.items():
+            blocks.append("\n".join([f"{name}:", *fns]))
+        return "\n\n".join(blocks)
@@ -2,14 +2,15 @@
 
 from copy import deepcopy
 import logging
-import re
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional
 
 from docx import Document
 from docx.oxml.ns import qn
 from docx.shared import Pt, RGBColor
 
+from src.infrastructure.placeholders import DOCX_PLACEHOLDERS, render_segments
+from src.infrastructure.template_cache import template_cache
 from src.infrastructure.template_service import TemplateFillerStrategy
 from src.interfaces.schemas.templates import VerificationTestItem
 
@@ -25,7 +26,7 @@ class VerificationPlanFiller(TemplateFillerStrategy):
         non_empty_fields = [k for k, v in parameters.items() if v]
         logger.info("[VerificationPlanFiller] 填充字段: %s", non_empty_fields)
         try:
-            doc = Document(template_path)
+            doc = template_cache.load_document(template_path)
 
             for table in doc.tables:
                 table.autofit = False
@@ -41,7 +42,7 @@ class VerificationPlanFiller(TemplateFillerStrategy):
                     flat_parameters[field] = self._missing_text()
             self._fallback_text_replace(doc, flat_parameters)
 
-            doc.save(output_path)
+            self._save_document(doc, template_path, output_path)
             return True
         except Exception as e:
             logger.error("验证计划书模板填充失败: %s", str(e), exc_info=True)
@@ -132,17 +133,11 @@ class VerificationPlanFiller(TemplateFillerStrategy):
         if not full_text:
             return
 
-        ideal_text = full_text
-        for key, value in flat_parameters.items():
-            ideal_text = ideal_text.replace(f"{{{{{key}}}}}", value)
-
+        segments = render_segments(DOCX_PLACEHOLDERS.split(full_text), flat_parameters.get)
+        ideal_text = "".join(text for text, _ in segments)
         if ideal_text == full_text:
             return
 
-        placeholder_re = re.compile(
-            r"\{\{(" + "|".join(re.escape(k) for k in flat_parameters) + r")\}\}"
-        )
-
         if not paragraph.runs:
             paragraph.text = ideal_text
             for run in paragraph.runs:
@@ -151,17 +146,6 @@ class VerificationPlanFiller(TemplateFillerStrategy):
 
         font = self._extract_run_font_from_run(paragraph.runs[0])
 
-        parts = placeholder_re.split(full_text)
-        segments: List[Tuple[str, bool]] = []
-        for i, part in enumerate(parts):
-            if i % 2 == 0:
-                if part:
-                    segments.append((part, False))
-            else:
-                value = flat_parameters.get(part, "")
-                if value:
-                    segments.append((value, True))
-
         for run in list(paragraph.runs):
             run.clear()
 
@@ -1,5 +1,6 @@
 """模板填充服务模块（已迁移到 infrastructure 层）"""
 
+import copy
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
@@ -9,7 +10,15 @@ from docx import Document
 from openpyxl import load_workbook
 
 from src.config import settings
-from src.infrastructure.template_service import TemplateFillerStrategy, ExcelTemplateFiller, WordTemplateFiller
+from src.infrastructure.template_service import (
+    XLSX_ENGINE_PATCH,
+    TemplateFillerStrategy,
+    ExcelTemplateFiller,
+    WordTemplateFiller,
+)
+from src.infrastructure.metrics import span
+from src.infrastructure.profiling import profile
+from src.infrastructure.template_catalog import TemplateCatalog
 
 from src.domain.fillers.dhf_index_filler import DHFIndexFiller
 from src.domain.fillers.product_environment_assessment_filler import ProductEnvironmentAssessmentFiller
@@ -136,16 +145,18 @@ class TemplateService:
         }
     }
 
+    # 只写入单元格值与背景色/自动换行的 Excel 模板使用 XML 修补引擎（不支持时自动改用 openpyxl）；
+    # DHF INDEX 需要复制整套单元格样式并调整行高，仍使用 openpyxl
     TEMPLATE_FILLER_MAPPING = {
         "DHF_INDEX": DHFIndexFiller(),
-        "PTF_INDEX": PTFIndexFiller(),
+        "PTF_INDEX": PTFIndexFiller(engine=XLSX_ENGINE_PATCH),
         "PRODUCT_ENVIRONMENT_ASSESSMENT": ProductEnvironmentAssessmentFiller(),
         "BASIC_SPECIFICATION": BasicSpecificationFiller(),
         "VERIFICATION_PLAN": VerificationPlanFiller(),
         "VERIFICATION_RESULT": VerificationPlanFiller(),
-        "LABELING_SPECIFICATION": LabelingSpecificationFiller(),
-        "PACKAGING_DESIGN_SPECIFICATION": PackagingDesignSpecificationFiller(),
-        "USER_MANUAL_SPECIFICATION": UserManualSpecificationFiller(),
+        "LABELING_SPECIFICATION": LabelingSpecificationFiller(engine=XLSX_ENGINE_PATCH),
+        "PACKAGING_DESIGN_SPECIFICATION": PackagingDesignSpecificationFiller(engine=XLSX_ENGINE_PATCH),
+        "USER_MANUAL_SPECIFICATION": UserManualSpecificationFiller(engine=XLSX_ENGINE_PATCH),
         "PROJECT_PLAN": ProjectPlanFiller(),
         "INDIVIDUAL_TEST_SPEC": IndividualTestSpecFiller(),
         "INDIVIDUAL_TEST_RESULT": IndividualTestSpecFiller(),
@@ -154,6 +165,15 @@ class TemplateService:
 
     def __init__(self):
         self.template_base_path = Path(settings.template_base_path)
+        # 模板文件索引：启动时扫描一次，之后所有查找直接查表
+        self.catalog = TemplateCatalog(
+            self.template_base_path,
+            {name: config["display_names"] for name, config in self.SUPPORTED_TEMPLATES.items()},
+        )
+
+    def reload_templates(self) -> int:
+        """重新扫描模板目录（模板文件增删后调用），返回索引条目数"""
+        return self.catalog.reload()
 
     def get_supported_templates(self, language: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -197,48 +217,8 @@ class TemplateService:
         """
         if not self.validate_template_name(template_name):
             return None
-        
-        template_config = self.SUPPORTED_TEMPLATES[template_name]
-        display_names = template_config["display_names"]
-        
-        # 支持的语言列表
-        supported_languages = ["zh", "ja", "en"]
-        
-        # 确定要查找的语言列表
-        if language and language in supported_languages:
-            languages_to_try = [language]
-        else:
-            languages_to_try = supported_languages
-        
-        # 确定要查找的文件类型列表
-        if file_type:
-            file_types_to_try = [file_type]
-        else:
-            # 自动检测：先尝试excel，再尝试word
-            file_types_to_try = ["excel", "word"]
-        
-        # 按优先级查找：先按语言，再按文件类型
-        for lang in languages_to_try:
-            # 获取该语言的显示名称（即文件名，不含扩展名）
-            file_name_base = display_names.get(lang)
-            if not file_name_base:
-                continue
-            
-            for ft in file_types_to_try:
-                # 构建模板目录路径
-                if Path(self.template_base_path).is_absolute():
-                    template_dir = Path(self.template_base_path) / ft / lang
-                else:
-                    template_dir = Path.cwd() / self.template_base_path / ft / lang
-                
-                # 构建文件路径（使用display_name作为文件名）
-                extension = "xlsx" if ft == "excel" else "docx" if ft == "word" else ft
-                template_file = template_dir / f"{file_name_base}.{extension}"
-                
-                if template_file.exists():
-                    return template_file
-        
-        return None
+        found = self.catalog.lookup(template_name, language, file_type)
+        return found[0] if found else None
 
     def fill_excel_template(
         self,
@@ -273,7 +253,12 @@ class TemplateService:
         # 自动检测文件类型（先尝试excel，再尝试word）
         template_path = self.get_template_path(template_name, None, language)
         if template_path:
-            return filler.fill_template(template_path, parameters, output_path, language)
+            # 填充器会在实例上保存语言等请求级状态，并发生成时每次使用独立副本
+            filler = copy.copy(filler)
+            # 渲染前并发预取图片，填充过程中不再逐张同步下载
+            filler.prefetch_images(parameters)
+            with span("fill"), profile("fill"):
+                return filler.fill_template(template_path, parameters, output_path, language)
         return False
 
     def _generate_with_default_strategy(self, template_name: str, parameters: Dict[str, Any], 
@@ -284,10 +269,11 @@ class TemplateService:
             return False
         
         # 根据文件扩展名选择填充器
-        if template_path.suffix == ".xlsx":
-            return self.fill_excel_template(template_path, parameters, output_path, language)
-        elif template_path.suffix == ".docx":
-            return self.fill_word_template(template_path, parameters, output_path, language)
+        with span("fill"), profile("fill"):
+            if template_path.suffix == ".xlsx":
+                return self.fill_excel_template(template_path, parameters, output_path, language)
+            elif template_path.suffix == ".docx":
+                return self.fill_word_template(template_path, parameters, output_path, language)
         return False
 
     def get_template_info(self, template_name: str, parameters: Optional[Dict[str, Any]] = None, language: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -350,21 +336,7 @@ class TemplateService:
     
     def _get_available_languages(self, template_name: str) -> list:
         """获取模板可用的语言列表"""
-        available_languages = []
-        supported_languages = ["zh", "ja", "en"]
-        
-        for lang in supported_languages:
-            template_path = self.get_template_path(template_name, None, lang)
-            if template_path:
-                available_languages.append(lang)
-        
-        # 如果没有找到任何语言版本，检查根目录是否有模板（向后兼容）
-        if not available_languages:
-            template_path = self.get_template_path(template_name, None, None)
-            if template_path:
-                available_languages.append("default")
-        
-        return available_languages
+        return self.catalog.languages(template_name)
 
     def _get_filler_strategy_name(self, template_name: str) -> str:
         filler = self.TEMPLATE_FILLER_MAPPING.get(template_name)
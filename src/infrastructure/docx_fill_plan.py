@@ -0,0 +1,109 @@
+"""Word 模板填充计划
+
+Word 填充器原先在每次请求中多次遍历整个文档（全部段落、全部表格 -> 行 -> 单元格），
+并反复读取 paragraph.text / cell.text —— python-docx 每次都要拼接全部 run 才能得到文本。
+ProjectPlanFiller 甚至为每个富内容字段各遍历一次全文。
+
+填充计划在模板首次使用时建立一次（随模板缓存复用），记录可能含占位符（含 "{{"）的
+正文段落与顶层表格单元格在 XML 中的位置（自 body 起逐级的子元素下标）。
+每次渲染时先在克隆出的文档上把这些位置解析为元素引用（bind），之后填充过程中
+插入/删除兄弟元素也不影响已解析的引用，填充器直接处理这些目标即可。
+
+填充器写入的内容（参数值渲染出的段落、表格）不会再被当作模板扫描占位符。
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from docx.oxml.ns import qn
+from docx.table import Table, _Cell
+from docx.text.paragraph import Paragraph
+
+_P = qn("w:p")
+_TBL = qn("w:tbl")
+_TR = qn("w:tr")
+_TC = qn("w:tc")
+
+
+@dataclass(frozen=True)
+class PlannedCell:
+    """顶层表格中的单元格位置：(表格, 行, 单元格) 在各自父元素中的下标"""
+    table_index: int
+    row_index: int
+    cell_index: int
+
+
+@dataclass(frozen=True)
+class DocxFillPlan:
+    """模板中可能含占位符的正文段落与顶层表格单元格（按文档顺序）"""
+    body_paragraphs: Tuple[int, ...]
+    table_cells: Tuple[PlannedCell, ...]
+
+    @classmethod
+    def from_document(cls, document) -> "DocxFillPlan":
+        body = document.element.body
+        paragraphs: List[int] = []
+        cells: List[PlannedCell] = []
+        for index, child in enumerate(body):
+            if child.tag == _P:
+                if "{{" in child.text:
+                    paragraphs.append(index)
+            elif child.tag == _TBL:
+                cells.extend(_plan_table(child, index))
+        return cls(tuple(paragraphs), tuple(cells))
+
+    def bind(self, document) -> "BoundFillPlan":
+        """在（克隆出的）文档上解析计划中的位置"""
+        return BoundFillPlan(self, document)
+
+    def estimated_size(self) -> int:
+        """估算内存占用（字节），用于模板缓存的内存预算"""
+        return 512 + 64 * (len(self.body_paragraphs) + len(self.table_cells))
+
+
+def _plan_table(tbl, table_index: int) -> Iterator[PlannedCell]:
+    for row_index, tr in enumerate(tbl):
+        if tr.tag != _TR:
+            continue
+        for cell_index, tc in enumerate(tr):
+            # 纵向合并的后续单元格在 python-docx 中指向首个单元格，内容只在首个单元格中
+            if tc.tag != _TC or tc.vMerge == "continue":
+                continue
+            if any("{{" in p.text for p in tc.iterchildren(_P)):
+                yield PlannedCell(table_index, row_index, cell_index)
+
+
+class BoundFillPlan:
+    """绑定到某个文档实例的填充计划：paragraphs / cells 为该文档中的对象"""
+
+    def __init__(self, plan: DocxFillPlan, document):
+        self._body = document.element.body
+        children = list(self._body)
+        self.paragraphs: List[Paragraph] = [
+            Paragraph(children[index], document._body) for index in plan.body_paragraphs
+        ]
+        self.cells: List[_Cell] = []
+        tables = {}
+        for planned in plan.table_cells:
+            table = tables.get(planned.table_index)
+            if table is None:
+                table = tables[planned.table_index] = Table(children[planned.table_index], document._body)
+            tc = table._tbl[planned.row_index][planned.cell_index]
+            self.cells.append(_Cell(tc, table))
+
+    def attached(self, element) -> bool:
+        """元素是否仍在文档中（填充过程中可能已被删除或替换）"""
+        while element is not None:
+            if element is self._body:
+                return True
+            element = element.getparent()
+        return False
+
+    def live_paragraphs(self) -> List[Paragraph]:
+        """仍在文档中的计划段落"""
+        return [p for p in self.paragraphs if self.attached(p._element)]
+
+    def cell_paragraphs(self) -> Iterator[Paragraph]:
+        """计划单元格当前的全部段落"""
+        for cell in self.cells:
+            yield from cell.paragraphs
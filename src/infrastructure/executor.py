@@ -0,0 +1,139 @@
+"""文档生成执行器
+
+将同步、CPU 密集的文档生成逻辑从事件循环卸载到线程池或进程池中执行，
+并通过"工作线程数 + 等待队列长度"限制同时在途的任务数量，超出时立即拒绝。
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when the generation executor has no free worker or queue slot."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class GenerationExecutor:
+    """有界的文档生成执行器（线程池/进程池）"""
+
+    SUPPORTED_TYPES = ("thread", "process")
+
+    def __init__(
+        self,
+        executor_type: str = "thread",
+        max_workers: int = 4,
+        max_queue: int = 16,
+        retry_after: int = 5,
+    ):
+        if executor_type not in self.SUPPORTED_TYPES:
+            raise ValueError(f"不支持的执行器类型: {executor_type}")
+        if max_workers < 1:
+            raise ValueError("max_workers 必须大于 0")
+        if max_queue < 0:
+            raise ValueError("max_queue 不能小于 0")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+
+        # 在途任务（执行中 + 排队中）的上限
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "GenerationExecutor":
+        """根据配置创建执行器"""
+        return cls(
+            executor_type=settings.executor_type,
+            max_workers=settings.executor_max_workers,
+            max_queue=settings.executor_max_queue,
+            retry_after=settings.executor_retry_after,
+        )
+
+    @property
+    def capacity(self) -> int:
+        """允许同时在途的最大任务数"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        """当前在途任务数（执行中 + 排队中）"""
+        return self._in_flight
+
+    def _get_executor(self) -> Executor:
+        """延迟创建底层执行器，避免在模块导入（包括子进程导入）时启动工作池"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.executor_type == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix="generate",
+                        )
+        return self._executor
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, func: Callable[..., Any], *args: Any) -> Future:
+        """
+        提交 func(*args) 到执行器，立即返回 concurrent.futures.Future
+
+        Raises:
+            ExecutorSaturatedError: 工作线程与等待队列均已占满
+        """
+        if not self._slots.acquire(blocking=False):
+            logger.warning(
+                "Generation executor saturated: in_flight=%s capacity=%s",
+                self._in_flight, self.capacity,
+            )
+            raise ExecutorSaturatedError("服务繁忙，请稍后重试", retry_after=self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            if self.executor_type == "thread":
+                # 与 asyncio.to_thread 相同，工作线程继承调用方的 contextvars（如生成追踪）
+                future = self._get_executor().submit(contextvars.copy_context().run, func, *args)
+            else:
+                future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+
+        # 在任务真正结束时释放名额：即使调用方被取消（客户端断开），
+        # 仍在运行的任务也继续占用名额，保证在途数量不超过上限
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        在执行器中运行 func(*args) 并等待结果
+
+        Raises:
+            ExecutorSaturatedError: 工作线程与等待队列均已占满
+        """
+        return await asyncio.wrap_future(self.submit(func, *args))
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭底层执行器"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,308 @@
+"""跨请求共享的图片缓存
+
+同一项目的文档经常引用相同的图片（外观图、功能框图等），每次渲染都重新下载很浪费。
+本模块按 URL 缓存下载结果，图片内容按 SHA-256 内容寻址存储（不同 URL 的相同图片只存一份）：
+- 内存层：最近使用的图片内容，按字节数上限 LRU 淘汰
+- 磁盘层：{cache_dir}/blobs/{hash}，按总大小上限淘汰最久未访问的文件；
+  {cache_dir}/urls/{hash(url)}.json 记录 URL 对应的内容哈希与 ETag/Last-Modified，
+  进程重启或多个渲染进程之间可以共用。元数据文件同样计入磁盘上限，
+  内容被淘汰时指向它的元数据一并删除；内存中的元数据按条目数 LRU 淘汰
+缓存超过 revalidate_seconds 后，使用 If-None-Match / If-Modified-Since 条件请求重新验证，
+服务器返回 304 时直接复用缓存内容。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_URL_LOCK_STRIPES = 64
+# 内存中保留的 URL 元数据条目上限（预签名 URL 每次都不同，不能无限增长）
+_META_MEMORY_ENTRIES = 4096
+# _atomic_write 的临时文件前缀；淘汰时跳过，避免删除其他线程正在写入的文件
+_TMP_PREFIX = ".tmp-"
+
+
+@dataclass
+class ImageMeta:
+    """URL 对应的缓存元数据"""
+    url: str
+    digest: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float = 0.0
+
+
+@dataclass
+class FetchResult:
+    """一次（条件）HTTP 请求的结果；not_modified 为 True 表示服务器返回 304"""
+    content: bytes = b""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    not_modified: bool = False
+
+
+# fetch(url, etag, last_modified) -> FetchResult；失败时返回 content 为空的结果
+Fetcher = Callable[[str, Optional[str], Optional[str]], FetchResult]
+
+
+class ImageCache:
+    """线程安全的两级图片缓存"""
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+        revalidate_seconds: float = 300,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.revalidate_seconds = revalidate_seconds
+
+        self._blob_dir = self.cache_dir / "blobs"
+        self._url_dir = self.cache_dir / "urls"
+        self._blob_dir.mkdir(parents=True, exist_ok=True)
+        self._url_dir.mkdir(parents=True, exist_ok=True)
+
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._meta: "OrderedDict[str, ImageMeta]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 同一 URL 同时只允许一个下载，其余请求等待其结果（按 URL 哈希分段加锁）
+        self._url_locks = [threading.Lock() for _ in range(_URL_LOCK_STRIPES)]
+        self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def get(self, url: str, fetch: Fetcher) -> bytes:
+        """获取图片内容：命中且未过期直接返回，过期则条件请求重新验证，未命中则下载"""
+        with self._url_lock(url):
+            meta = self._load_meta(url)
+            cached = self._read_blob(meta.digest) if meta is not None else None
+            if cached is not None and time.time() - meta.fetched_at < self.revalidate_seconds:
+                self._count("hits")
+                return cached
+
+            if cached is not None:
+                result = fetch(url, meta.etag, meta.last_modified)
+                if result.not_modified:
+                    self._count("revalidated")
+                    meta.fetched_at = time.time()
+                    self._save_meta(meta)
+                    return cached
+            else:
+                result = fetch(url, None, None)
+
+            if not result.content:
+                # 重新验证失败（网络错误等）时继续使用旧内容
+                return cached or b""
+
+            self._count("misses")
+            digest = hashlib.sha256(result.content).hexdigest()
+            self._write_blob(digest, result.content)
+            self._save_meta(ImageMeta(
+                url=url,
+                digest=digest,
+                etag=result.etag,
+                last_modified=result.last_modified,
+                fetched_at=time.time(),
+            ))
+            return result.content
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def clear_memory(self) -> None:
+        """清空内存层（磁盘层保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._meta.clear()
+
+    # ---- URL 元数据 ----
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        return self._url_locks[hash(url) % _URL_LOCK_STRIPES]
+
+    def _meta_path(self, url: str) -> Path:
+        return self._url_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _load_meta(self, url: str) -> Optional[ImageMeta]:
+        with self._lock:
+            meta = self._meta.get(url)
+            if meta is not None:
+                self._meta.move_to_end(url)
+                return meta
+        try:
+            meta = ImageMeta(**json.loads(self._meta_path(url).read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        self._remember_meta(meta)
+        return meta
+
+    def _save_meta(self, meta: ImageMeta) -> None:
+        self._remember_meta(meta)
+        path = self._meta_path(meta.url)
+        data = json.dumps(asdict(meta)).encode("utf-8")
+        try:
+            previous_size = path.stat().st_size
+        except OSError:
+            previous_size = 0
+        self._atomic_write(path, data)
+        self._add_disk_bytes(len(data) - previous_size)
+
+    def _remember_meta(self, meta: ImageMeta) -> None:
+        """写入内存中的元数据并按条目数 LRU 淘汰"""
+        with self._lock:
+            self._meta[meta.url] = meta
+            self._meta.move_to_end(meta.url)
+            while len(self._meta) > _META_MEMORY_ENTRIES:
+                self._meta.popitem(last=False)
+
+    # ---- 内容存储（内存层 + 磁盘层）----
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            content = self._memory.get(digest)
+            if content is not None:
+                self._memory.move_to_end(digest)
+                return content
+        path = self._blob_dir / digest
+        try:
+            content = path.read_bytes()
+            # 更新修改时间，作为磁盘层 LRU 的访问时间
+            os.utime(path)
+        except OSError:
+            return None
+        self._remember(digest, content)
+        return content
+
+    def _write_blob(self, digest: str, content: bytes) -> None:
+        self._remember(digest, content)
+        path = self._blob_dir / digest
+        if path.exists():
+            os.utime(path)
+            return
+        self._atomic_write(path, content)
+        self._add_disk_bytes(len(content))
+
+    def _add_disk_bytes(self, size: int) -> None:
+        with self._lock:
+            self._disk_bytes += size
+            over_limit = self._disk_bytes > self.disk_max_bytes
+        if over_limit:
+            self._evict_disk()
+
+    def _remember(self, digest: str, content: bytes) -> None:
+        """写入内存层并按 LRU 淘汰"""
+        if len(content) > self.memory_max_bytes:
+            return
+        with self._lock:
+            if digest in self._memory:
+                self._memory.move_to_end(digest)
+                return
+            self._memory[digest] = content
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.memory_max_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _disk_entries(self) -> List[Tuple[float, int, Path]]:
+        """磁盘层的内容文件与元数据文件：(修改时间, 大小, 路径)；跳过正在写入的临时文件"""
+        entries = []
+        for directory in (self._blob_dir, self._url_dir):
+            for path in directory.iterdir():
+                if path.name.startswith(_TMP_PREFIX):
+                    continue
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _evict_disk(self) -> None:
+        """删除最久未访问的文件，直到磁盘层回到上限的 90% 以内，并清理指向已删除内容的元数据"""
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9
+        evicted_digests = set()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            if path.parent == self._blob_dir:
+                evicted_digests.add(path.name)
+
+        if evicted_digests:
+            for path in self._url_dir.iterdir():
+                if path.name.startswith(_TMP_PREFIX):
+                    continue
+                try:
+                    size = path.stat().st_size
+                    digest = json.loads(path.read_text(encoding="utf-8"))["digest"]
+                except (OSError, ValueError, TypeError, KeyError):
+                    continue
+                if digest in evicted_digests:
+                    path.unlink(missing_ok=True)
+                    total -= size
+            with self._lock:
+                for url in [url for url, meta in self._meta.items() if meta.digest in evicted_digests]:
+                    del self._meta[url]
+
+        with self._lock:
+            self._disk_bytes = total
+        logger.info("Image cache disk tier evicted to %s bytes", total)
+
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        """先写临时文件再原子替换，避免并发读取到半写入的文件"""
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=_TMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+    @classmethod
+    def from_settings(cls, settings) -> "ImageCache":
+        """根据配置创建缓存"""
+        cache_dir = settings.image_cache_dir or os.path.join(tempfile.gettempdir(), "ohc_image_cache")
+        return cls(
+            cache_dir=Path(cache_dir),
+            memory_max_bytes=int(settings.image_cache_memory_mb * 1024 * 1024),
+            disk_max_bytes=int(settings.image_cache_disk_mb * 1024 * 1024),
+            revalidate_seconds=settings.image_cache_revalidate_seconds,
+        )
+
+
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """所有填充器共享的图片缓存实例（首次使用时创建缓存目录）"""
+    global _image_cache
+    if _image_cache is None and settings.image_cache_enabled:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageCache.from_settings(settings)
+    return _image_cache
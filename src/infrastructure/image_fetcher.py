@@ -0,0 +1,119 @@
+"""图片下载
+
+填充器原先在渲染过程中逐张同步下载图片（每张最多等待 10 秒）。
+本模块提供统一的下载函数，以及渲染前的并发预取：
+先扫描参数中的全部图片 URL，以有限并发一次性下载，并受总截止时间约束，
+之后填充器直接从 URL -> bytes 映射中取图。
+下载结果经由共享图片缓存（见 image_cache），跨请求复用。
+"""
+
+import logging
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from typing import Dict, Iterable, Optional
+
+from src.config import settings
+from src.infrastructure.image_cache import FetchResult, get_image_cache
+
+logger = logging.getLogger(__name__)
+
+_USER_AGENT = "ohc-account-invoice/1.0 (+python urllib)"
+
+
+def download_image(url: str, timeout: Optional[float] = None) -> bytes:
+    """下载图片内容（经由共享图片缓存），失败时返回空字节串"""
+    if not url:
+        return b""
+    cache = get_image_cache()
+    fetch = partial(_http_get, timeout=timeout)
+    if cache is None:
+        return fetch(url, None, None).content
+    return cache.get(url, fetch)
+
+
+def _http_get(
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    timeout: Optional[float] = None,
+) -> FetchResult:
+    """GET 图片；带 ETag/Last-Modified 时发送条件请求，服务器返回 304 时 not_modified 为 True"""
+    # Some hosts block requests without UA
+    headers = {"User-Agent": _USER_AGENT}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    try:
+        req = urllib.request.Request(url, headers=headers, method="GET")
+        with urllib.request.urlopen(req, timeout=timeout or settings.image_download_timeout) as resp:
+            status = getattr(resp, "status", None)
+            if status is not None and int(status) != 200:
+                return FetchResult()
+            return FetchResult(
+                content=resp.read(),
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+            )
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return FetchResult(not_modified=True)
+        logger.warning("Image download failed: %s (%s)", url, e)
+        return FetchResult()
+    except Exception as e:
+        logger.warning("Image download failed: %s (%s)", url, e)
+        return FetchResult()
+
+
+def prefetch_images(
+    urls: Iterable[str],
+    max_workers: Optional[int] = None,
+    deadline: Optional[float] = None,
+) -> Dict[str, bytes]:
+    """
+    并发下载一组图片
+
+    Args:
+        urls: 图片 URL（重复项只下载一次）
+        max_workers: 最大并发数（默认 images.prefetch_workers）
+        deadline: 全部下载的总时限（秒，默认 images.prefetch_deadline），
+            超时仍未完成的图片视为下载失败
+
+    Returns:
+        URL -> 图片内容；下载失败或超时的 URL 对应空字节串
+    """
+    unique_urls = list(dict.fromkeys(u for u in urls if u))
+    if not unique_urls:
+        return {}
+
+    max_workers = max_workers or settings.image_prefetch_workers
+    deadline = settings.image_prefetch_deadline if deadline is None else deadline
+    results: Dict[str, bytes] = {url: b"" for url in unique_urls}
+    started = time.monotonic()
+
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(unique_urls)), thread_name_prefix="image-prefetch")
+    try:
+        pending = {executor.submit(download_image, url): url for url in unique_urls}
+        while pending:
+            remaining = deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                logger.warning(
+                    "Image prefetch deadline (%ss) exceeded, %s of %s images not downloaded",
+                    deadline, len(pending), len(unique_urls),
+                )
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+    finally:
+        # 不等待超时未完成的下载（urlopen 无法中断，线程会在各自超时后结束）
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    logger.info(
+        "Prefetched %s images in %.2fs",
+        sum(1 for content in results.values() if content), time.monotonic() - started,
+    )
+    return results
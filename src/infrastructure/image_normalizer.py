@@ -0,0 +1,158 @@
+"""图片规格化
+
+填充器原先把原图（常见为数百万像素的照片）原样嵌入文档，只通过显示尺寸缩放，
+导致输出文件巨大、保存和上传都很慢。本模块在嵌入前按目标显示尺寸与输出 DPI
+计算所需像素宽度，超出时用 PIL 缩小并重新编码：
+- 含透明通道或颜色较少（图表、截图）的图片编码为 PNG
+- 其余（照片）编码为 JPEG
+只有结果更小时才替换原图；不放大图片。结果按 (URL, 目标像素宽度) 缓存。
+"""
+
+import hashlib
+import io
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CM_PER_INCH = 2.54
+# Excel 图片尺寸以 96 DPI 下的像素计
+_SCREEN_DPI = 96.0
+
+
+def target_pixels_for_cm(width_cm: float) -> int:
+    """显示宽度（cm）在输出 DPI 下所需的像素宽度"""
+    return max(1, int(round(width_cm / _CM_PER_INCH * settings.image_render_dpi)))
+
+
+def target_pixels_for_screen_px(width_px: float) -> int:
+    """显示宽度（96 DPI 像素，Excel 图片尺寸单位）在输出 DPI 下所需的像素宽度"""
+    return max(1, int(round(width_px * settings.image_render_dpi / _SCREEN_DPI)))
+
+
+class _NormalizedCache:
+    """规格化结果的 LRU 缓存（按字节数上限淘汰）"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[str, bytes]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int], source_digest: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            # 同一 URL 的源图片已变化时视为未命中
+            if entry is None or entry[0] != source_digest:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Tuple[str, int], source_digest: str, content: bytes) -> None:
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous[1])
+            self._entries[key] = (source_digest, content)
+            self._total_bytes += len(content)
+            while self._total_bytes > self.max_bytes and self._entries:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+
+_cache = _NormalizedCache(int(settings.image_normalize_cache_mb * 1024 * 1024))
+
+
+def normalize_image(content: bytes, target_width_px: int, url: Optional[str] = None) -> bytes:
+    """
+    把图片缩小到目标像素宽度并重新编码；无需处理或处理失败时返回原图
+
+    Args:
+        content: 原图内容
+        target_width_px: 目标像素宽度（由显示尺寸与输出 DPI 计算）
+        url: 图片 URL，用作缓存键（为 None 时以内容哈希代替）
+    """
+    if not content or not settings.image_normalize_enabled or target_width_px <= 0:
+        return content
+
+    source_digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    key = (url or source_digest, target_width_px)
+    cached = _cache.get(key, source_digest)
+    if cached is not None:
+        return cached
+
+    result = _resize_and_encode(content, target_width_px)
+    _cache.put(key, source_digest, result)
+    return result
+
+
+def _resize_and_encode(content: bytes, target_width_px: int) -> bytes:
+    try:
+        from PIL import Image
+    except ImportError:
+        return content
+
+    try:
+        img = Image.open(io.BytesIO(content))
+        width, height = img.size
+        if width <= target_width_px:
+            return content
+
+        target_height_px = max(1, int(round(height * target_width_px / width)))
+        exif = img.info.get("exif")
+        use_png = _prefers_png(img)
+        if use_png:
+            img = img.convert("RGBA" if _has_alpha(img) else "RGB")
+        else:
+            img = img.convert("RGB")
+        img = img.resize((target_width_px, target_height_px), Image.LANCZOS)
+
+        out = io.BytesIO()
+        if use_png:
+            img.save(out, format="PNG", optimize=True)
+        else:
+            save_kwargs = {"quality": settings.image_jpeg_quality, "optimize": True}
+            if exif:
+                # 保留方向等 EXIF 信息，避免显示方向变化
+                save_kwargs["exif"] = exif
+            img.save(out, format="JPEG", **save_kwargs)
+        data = out.getvalue()
+        if len(data) >= len(content):
+            return content
+        logger.debug(
+            "Image normalized: %sx%s -> %sx%s, %s -> %s bytes",
+            width, height, target_width_px, target_height_px, len(content), len(data),
+        )
+        return data
+    except Exception as e:
+        logger.warning("Image normalization failed, embedding original: %s", e)
+        return content
+
+
+def _has_alpha(img) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info)
+
+
+def _prefers_png(img) -> bool:
+    """透明图片或颜色较少的图片（图表、截图、线稿）使用 PNG，照片使用 JPEG"""
+    if _has_alpha(img):
+        return True
+    if img.format == "JPEG":
+        return False
+    if img.mode in ("1", "P", "L"):
+        return True
+    # 缩略图上统计颜色数，不超过 256 色视为非照片
+    sample = img.copy()
+    sample.thumbnail((256, 256))
+    return sample.convert("RGB").getcolors(256) is not None
@@ -0,0 +1,190 @@
+"""异步生成任务存储
+
+保存 POST /jobs 提交的生成任务状态与结果，过期任务（TTL）自动淘汰。
+后端可插拔：默认进程内内存存储，也可使用本地 SQLite（测试或单机多进程场景）。
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
+from src.config import settings
+
+
+class JobStatus:
+    """任务状态常量"""
+    PENDING = "pending"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    FINISHED = (SUCCEEDED, FAILED)
+
+
+@dataclass
+class JobRecord:
+    """生成任务记录"""
+    job_id: str
+    template_name: str
+    status: str = JobStatus.PENDING
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in JobStatus.FINISHED
+
+    @staticmethod
+    def new(template_name: str) -> "JobRecord":
+        return JobRecord(job_id=uuid.uuid4().hex, template_name=template_name)
+
+
+class JobStore(ABC):
+    """任务存储抽象基类"""
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def create(self, record: JobRecord) -> None:
+        """保存新任务"""
+        pass
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        """获取任务，不存在或已过期时返回 None"""
+        pass
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, result: Dict[str, Any]) -> None:
+        """记录任务结束状态与结果"""
+        pass
+
+    @abstractmethod
+    def evict_expired(self) -> int:
+        """淘汰过期任务，返回淘汰数量"""
+        pass
+
+    def _is_expired(self, record: JobRecord, now: float) -> bool:
+        return now - record.updated_at > self.ttl_seconds
+
+
+class InMemoryJobStore(JobStore):
+    """进程内内存任务存储"""
+
+    def __init__(self, ttl_seconds: int = 3600):
+        super().__init__(ttl_seconds)
+        self._records: Dict[str, JobRecord] = {}
+        self._lock = threading.Lock()
+
+    def create(self, record: JobRecord) -> None:
+        self.evict_expired()
+        with self._lock:
+            self._records[record.job_id] = record
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return None
+            if self._is_expired(record, time.time()):
+                del self._records[job_id]
+                return None
+            return JobRecord(**asdict(record))
+
+    def finish(self, job_id: str, status: str, result: Dict[str, Any]) -> None:
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return
+            record.status = status
+            record.result = result
+            record.updated_at = time.time()
+
+    def evict_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, record in self._records.items() if self._is_expired(record, now)]
+            for job_id in expired:
+                del self._records[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """本地 SQLite 任务存储"""
+
+    def __init__(self, path: str = ":memory:", ttl_seconds: int = 3600):
+        super().__init__(ttl_seconds)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, template_name TEXT NOT NULL, status TEXT NOT NULL, "
+                "result TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def create(self, record: JobRecord) -> None:
+        self.evict_expired()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, template_name, status, result, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record.job_id,
+                    record.template_name,
+                    record.status,
+                    json.dumps(record.result) if record.result is not None else None,
+                    record.created_at,
+                    record.updated_at,
+                ),
+            )
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT job_id, template_name, status, result, created_at, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        record = JobRecord(
+            job_id=row[0],
+            template_name=row[1],
+            status=row[2],
+            result=json.loads(row[3]) if row[3] is not None else None,
+            created_at=row[4],
+            updated_at=row[5],
+        )
+        if self._is_expired(record, time.time()):
+            return None
+        return record
+
+    def finish(self, job_id: str, status: str, result: Dict[str, Any]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE job_id = ?",
+                (status, json.dumps(result), time.time(), job_id),
+            )
+
+    def evict_expired(self) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE updated_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+        return cursor.rowcount
+
+
+class JobStoreFactory:
+    @staticmethod
+    def create_job_store() -> JobStore:
+        backend = str(getattr(settings, "jobs_backend", "memory")).lower()
+        ttl_seconds = getattr(settings, "jobs_ttl_seconds", 3600)
+        if backend == "sqlite":
+            return SQLiteJobStore(settings.jobs_sqlite_path, ttl_seconds=ttl_seconds)
+        return InMemoryJobStore(ttl_seconds=ttl_seconds)
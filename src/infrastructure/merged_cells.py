@@ -0,0 +1,135 @@
+"""工作表合并区域索引
+
+openpyxl 只以集合形式保存合并区域（worksheet.merged_cells.ranges），判断某个单元格属于哪个
+合并区域需要遍历全部区域；填充器逐行、逐单元格查询时开销为 单元格数 × 合并区域数。
+本模块按行分桶建立索引，查询只检查覆盖该行的少数区域；合并 / 取消合并通过索引执行，
+索引与工作表同步更新。
+"""
+
+import threading
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from openpyxl.cell.cell import MergedCell
+from openpyxl.worksheet.cell_range import CellRange
+
+_Bounds = Tuple[int, int, int, int]
+
+
+def _bounds(cell_range: CellRange) -> _Bounds:
+    return cell_range.min_row, cell_range.min_col, cell_range.max_row, cell_range.max_col
+
+
+class MergedCellIndex:
+    """工作表合并区域的行分桶索引（单个请求内使用，不跨线程共享）"""
+
+    def __init__(self, worksheet: Any):
+        self._worksheet = worksheet
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """按工作表当前的合并区域重建索引（批量移动合并区域后调用）"""
+        # 区域边界 -> 区域（保持加入顺序）；行号 -> 覆盖该行的区域
+        self._ranges: Dict[_Bounds, CellRange] = {}
+        self._by_row: Dict[int, List[CellRange]] = {}
+        for cell_range in self._worksheet.merged_cells.ranges:
+            self._add(cell_range)
+
+    def _add(self, cell_range: CellRange) -> None:
+        bounds = _bounds(cell_range)
+        if bounds in self._ranges:
+            return
+        self._ranges[bounds] = cell_range
+        for row in range(cell_range.min_row, cell_range.max_row + 1):
+            self._by_row.setdefault(row, []).append(cell_range)
+
+    def _remove(self, cell_range: CellRange) -> None:
+        existing = self._ranges.pop(_bounds(cell_range), None)
+        if existing is None:
+            return
+        for row in range(existing.min_row, existing.max_row + 1):
+            bucket = self._by_row.get(row)
+            if bucket is None:
+                continue
+            bucket[:] = [r for r in bucket if r is not existing]
+            if not bucket:
+                del self._by_row[row]
+
+    def sync(self) -> "MergedCellIndex":
+        """区域数量与工作表不一致（绕过索引直接合并 / 取消合并）时重建"""
+        if len(self._ranges) != len(self._worksheet.merged_cells.ranges):
+            self.rebuild()
+        return self
+
+    def __len__(self) -> int:
+        return len(self._ranges)
+
+    @property
+    def ranges(self) -> List[CellRange]:
+        return list(self._ranges.values())
+
+    def find(self, row: int, col: int) -> Optional[CellRange]:
+        """包含 (row, col) 的合并区域"""
+        for cell_range in self._by_row.get(row, ()):
+            if cell_range.min_col <= col <= cell_range.max_col:
+                return cell_range
+        return None
+
+    def top_left(self, row: int, col: int) -> Any:
+        """
+        获取合并单元格的左上角单元格
+        如果单元格不是合并单元格，返回该单元格本身
+        """
+        cell = self._worksheet.cell(row, col)
+        if isinstance(cell, MergedCell):
+            cell_range = self.find(row, col)
+            if cell_range is not None:
+                return self._worksheet.cell(cell_range.min_row, cell_range.min_col)
+        return cell
+
+    def overlapping(self, min_row: int, max_row: int, min_col: int, max_col: int) -> List[CellRange]:
+        """与指定区域重叠的合并区域（按加入顺序，不重复）"""
+        found: Dict[_Bounds, CellRange] = {}
+        for row in self._rows_in(min_row, max_row):
+            for cell_range in self._by_row[row]:
+                if cell_range.min_col <= max_col and cell_range.max_col >= min_col:
+                    found.setdefault(_bounds(cell_range), cell_range)
+        return list(found.values())
+
+    def _rows_in(self, min_row: int, max_row: int) -> Iterable[int]:
+        # 查询范围比已索引的行数还大时，直接遍历已有的行
+        if max_row - min_row + 1 > len(self._by_row):
+            return sorted(row for row in self._by_row if min_row <= row <= max_row)
+        return (row for row in range(min_row, max_row + 1) if row in self._by_row)
+
+    def merge(self, range_string: str) -> None:
+        """合并单元格（同 worksheet.merge_cells）并更新索引"""
+        cell_range = CellRange(range_string)
+        # 与 openpyxl 一致：已被某个合并区域包含的区域不会加入 merged_cells
+        contained = any(
+            cell_range.issubset(existing)
+            for existing in self.overlapping(
+                cell_range.min_row, cell_range.max_row, cell_range.min_col, cell_range.max_col
+            )
+        )
+        self._worksheet.merge_cells(range_string)
+        if not contained:
+            self._add(cell_range)
+
+    def unmerge(self, range_string: str) -> None:
+        """取消合并（同 worksheet.unmerge_cells，区域不存在时抛出 ValueError）并更新索引"""
+        self._worksheet.unmerge_cells(range_string)
+        self._remove(CellRange(range_string))
+
+
+_indexes: "weakref.WeakKeyDictionary[Any, MergedCellIndex]" = weakref.WeakKeyDictionary()
+_indexes_lock = threading.Lock()
+
+
+def merged_cell_index(worksheet: Any) -> MergedCellIndex:
+    """获取工作表的合并区域索引（首次访问时建立，随工作表一起释放）"""
+    with _indexes_lock:
+        index = _indexes.get(worksheet)
+        if index is None:
+            index = _indexes[worksheet] = MergedCellIndex(worksheet)
+    return index.sync()
@@ -0,0 +1,271 @@
+"""文档生成流水线的分阶段耗时统计
+
+generate_document_internal 原先只记录开始与成功日志，无法区分慢请求耗在模板加载、填充、
+图片下载、保存还是上传。本模块提供：
+- Trace：一次生成请求的追踪（模板名、语言、输出大小、图片数、插入行数等属性 + 各阶段耗时），
+  保存在 contextvars 中；执行器线程通过复制调用方上下文继承（见 GenerationExecutor.submit）
+- span(stage)：记录一个阶段的耗时，当前没有 Trace 时不做任何记录；同名阶段嵌套时只计外层
+- MetricsRegistry：按模板 / 阶段汇总的直方图与计数器，以 Prometheus 文本格式输出（/metrics）
+
+在进程池中执行的阶段（executor.type = "process" 或 render.engine = "process" 的工作进程内）
+不会汇总到主进程，只统计主进程中可见的外层阶段（如 render、upload）。
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图的桶上界（秒）
+DURATION_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# 输出文件大小直方图的桶上界（字节）
+SIZE_BUCKETS: Tuple[float, ...] = tuple(float(1024 * 2 ** n) for n in range(4, 17, 2))  # 16KiB～64MiB
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """按标签累加的计数器"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Sequence[Any], amount: float = 1) -> None:
+        key = tuple(str(v) for v in labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels: Sequence[Any]) -> float:
+        return self._values.get(tuple(str(v) for v in labels), 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """按标签分组的累积直方图（Prometheus histogram 语义）"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累积）..., +Inf 桶计数], 总和
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Sequence[Any], value: float) -> None:
+        key = tuple(str(v) for v in labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            counts, total = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, labels: Sequence[Any]) -> int:
+        series = self._series.get(tuple(str(v) for v in labels))
+        return sum(series[0]) if series else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+        lines: List[str] = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序输出 Prometheus 文本格式"""
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str]) -> Counter:
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float] = DURATION_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+generation_duration = registry.histogram(
+    "ohc_generation_duration_seconds", "文档生成总耗时", ("template", "language", "outcome")
+)
+stage_duration = registry.histogram(
+    "ohc_generation_stage_duration_seconds", "文档生成各阶段耗时", ("template", "stage")
+)
+output_size = registry.histogram(
+    "ohc_generation_output_bytes", "生成文档的大小", ("template",), buckets=SIZE_BUCKETS
+)
+images_total = registry.counter("ohc_generation_images_total", "渲染前预取的图片数", ("template",))
+rows_inserted_total = registry.counter("ohc_generation_rows_inserted_total", "填充时插入的行数", ("template",))
+
+
+@dataclass
+class Span:
+    """一个阶段的耗时记录"""
+    name: str
+    duration: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Trace:
+    """一次文档生成的追踪：请求属性 + 各阶段耗时"""
+
+    def __init__(self, **attributes: Any):
+        self.attributes: Dict[str, Any] = dict(attributes)
+        self.spans: List[Span] = []
+        self.duration: Optional[float] = None
+        self._active: List[str] = []
+
+    def annotate(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def stage_durations(self) -> Dict[str, float]:
+        """各阶段的累计耗时（秒，按首次出现的顺序）"""
+        durations: Dict[str, float] = {}
+        for span in self.spans:
+            durations[span.name] = durations.get(span.name, 0.0) + span.duration
+        return durations
+
+    def server_timing(self) -> str:
+        """Server-Timing 响应头的值（毫秒）"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stage_durations().items()]
+        if self.duration is not None:
+            entries.append(f"total;dur={self.duration * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("ohc_generation_trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def annotate(**attributes: Any) -> None:
+    """为当前追踪补充属性（如插入行数）；当前没有追踪时忽略"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.annotate(**attributes)
+
+
+@contextmanager
+def start_trace(**attributes: Any) -> Iterator[Trace]:
+    """在当前上下文开始一个追踪（调用方需要在生成结束后读取耗时，如 Server-Timing）"""
+    trace = Trace(**attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[None]:
+    """记录一个阶段的耗时；当前没有追踪或已处于同名阶段内时不记录"""
+    trace = _current_trace.get()
+    if trace is None or name in trace._active:
+        yield
+        return
+    trace._active.append(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace._active.remove(name)
+        trace.spans.append(Span(name, time.perf_counter() - started, attributes))
+
+
+@contextmanager
+def trace_generation(template_name: str, language: Optional[str], enabled: bool = True) -> Iterator[Trace]:
+    """
+    追踪一次文档生成：沿用调用方已开始的追踪（见 start_trace），否则新建；
+    结束时（enabled 为 True）把总耗时、各阶段耗时与属性汇总到指标中。
+
+    调用方通过 trace.annotate(outcome=...) 标记结果，未标记时按 error 统计。
+    """
+    trace = _current_trace.get()
+    token = None
+    if trace is None:
+        trace = Trace()
+        token = _current_trace.set(trace)
+    trace.annotate(template=template_name, language=language or "")
+    started = time.perf_counter()
+    try:
+        yield trace
+    finally:
+        trace.duration = time.perf_counter() - started
+        if token is not None:
+            _current_trace.reset(token)
+        if enabled:
+            record(trace)
+
+
+def record(trace: Trace) -> None:
+    """把一次生成的追踪结果汇总到指标中"""
+    attributes = trace.attributes
+    template = attributes.get("template", "")
+    generation_duration.observe(
+        (template, attributes.get("language", ""), attributes.get("outcome", "error")), trace.duration or 0.0
+    )
+    for span_ in trace.spans:
+        stage_duration.observe((template, span_.name), span_.duration)
+    if attributes.get("output_size") is not None:
+        output_size.observe((template,), attributes["output_size"])
+    if attributes.get("image_count"):
+        images_total.inc((template,), attributes["image_count"])
+    if attributes.get("rows_inserted"):
+        rows_inserted_total.inc((template,), attributes["rows_inserted"])
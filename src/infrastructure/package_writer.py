@@ -0,0 +1,204 @@
+"""OOXML 输出写入：未修改的部件直接复用模板压缩包中的原始数据
+
+openpyxl / python-docx 保存时会重新序列化并重新压缩全部部件，包括模板中体积最大、
+却从未被修改的部分（嵌入图片、主题、样式等；标签仕样书模板中单张图片即达数百 KB）。
+本模块在保存时替换写入用的 ZipFile：
+- 写入的数据与模板中某个条目完全相同（先比较长度，再比较内容摘要）时，
+  直接把模板条目的压缩数据原样写入输出，跳过压缩
+- Word 模板中填充器只读的部件（样式、编号、设置，克隆时共享 XML 树）不再序列化，
+  直接复制模板中的对应条目
+其余部件（工作表、正文、关系等填充器修改过的内容）照常序列化。
+"""
+
+import datetime
+import hashlib
+import io
+import logging
+import struct
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Union
+from zipfile import ZIP64_LIMIT, ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.pkgwriter import _ContentTypesItem
+from docx.parts.numbering import NumberingPart
+from docx.parts.settings import SettingsPart
+from docx.parts.styles import StylesPart
+from openpyxl.writer.excel import ExcelWriter
+
+logger = logging.getLogger(__name__)
+
+# 填充器只读取、不修改的 Word 部件：模板缓存克隆时共享其 XML 树，保存时直接复制模板条目
+READ_ONLY_DOCX_PARTS = (StylesPart, NumberingPart, SettingsPart)
+
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+OutputTarget = Union[str, Path, IO[bytes]]
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class _RawEntry:
+    """模板中的一个条目：中央目录信息与压缩数据在压缩包中的位置"""
+    __slots__ = ("info", "start", "digest")
+
+    def __init__(self, info: ZipInfo, start: int, digest: bytes):
+        self.info = info
+        self.start = start
+        self.digest = digest
+
+
+class TemplateArchive:
+    """模板压缩包的原始内容与条目索引（建立后只读，可被多个请求并发使用）"""
+
+    def __init__(self, blob: bytes):
+        self._blob = blob
+        # 全部条目名称（按压缩包中的顺序）；skipped 为无法直通的条目
+        self.names: List[str] = []
+        self.skipped: List[str] = []
+        self._by_name: Dict[str, _RawEntry] = {}
+        # 未压缩长度 -> 条目；匹配时先按长度筛选，长度相同才计算摘要
+        self._by_size: Dict[int, List[_RawEntry]] = {}
+        with ZipFile(io.BytesIO(blob)) as archive:
+            for info in archive.infolist():
+                self.names.append(info.filename)
+                # 加密条目与不常见的压缩算法不参与直通
+                if info.flag_bits & 0x1 or info.compress_type not in (ZIP_STORED, ZIP_DEFLATED):
+                    self.skipped.append(info.filename)
+                    continue
+                signature, name_length, extra_length = _LOCAL_HEADER.unpack_from(blob, info.header_offset)
+                if signature != _LOCAL_HEADER_SIGNATURE:
+                    self.skipped.append(info.filename)
+                    continue
+                start = info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+                entry = _RawEntry(info, start, _digest(archive.read(info)))
+                self._by_name[info.filename] = entry
+                self._by_size.setdefault(info.file_size, []).append(entry)
+
+    @classmethod
+    def from_path(cls, template_path: Union[str, Path]) -> "TemplateArchive":
+        return cls(Path(template_path).read_bytes())
+
+    def read(self, name: str) -> bytes:
+        """条目解压后的内容"""
+        with ZipFile(io.BytesIO(self._blob)) as archive:
+            return archive.read(name)
+
+    def entry(self, name: str) -> Optional[_RawEntry]:
+        """按条目名称查找"""
+        return self._by_name.get(name)
+
+    def find(self, data: bytes) -> Optional[_RawEntry]:
+        """查找内容与 data 完全相同的条目（与条目名称无关，openpyxl 会重新编号图片）"""
+        candidates = self._by_size.get(len(data))
+        if not candidates:
+            return None
+        digest = _digest(data)
+        for entry in candidates:
+            if entry.digest == digest:
+                return entry
+        return None
+
+    def raw_data(self, entry: _RawEntry) -> memoryview:
+        """条目的压缩数据（不解压）"""
+        return memoryview(self._blob)[entry.start:entry.start + entry.info.compress_size]
+
+    def estimated_size(self) -> int:
+        """估算内存占用（字节），用于模板缓存的内存预算"""
+        return len(self._blob) + 256 * len(self._by_name)
+
+
+class PassthroughZipFile(ZipFile):
+    """输出用 ZipFile：与模板条目内容相同的数据直接写入模板中的压缩数据"""
+
+    def __init__(self, file: OutputTarget, archive: Optional[TemplateArchive]):
+        super().__init__(file, "w", ZIP_DEFLATED, allowZip64=True)
+        self.template_archive = archive
+        self.passthrough_count = 0
+        self.passthrough_bytes = 0
+
+    def writestr(self, zinfo_or_arcname, data, compress_type=None, compresslevel=None):
+        if self.template_archive is not None and isinstance(zinfo_or_arcname, str):
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            entry = self.template_archive.find(data)
+            if entry is not None:
+                self.write_template_entry(zinfo_or_arcname, entry)
+                return
+        super().writestr(zinfo_or_arcname, data, compress_type, compresslevel)
+
+    def write_template_entry(self, arcname: str, entry: _RawEntry) -> None:
+        """以 arcname 写入模板条目的原始压缩数据（CRC、长度沿用模板中的值）"""
+        source = entry.info
+        zinfo = ZipInfo(arcname, date_time=source.date_time)
+        zinfo.compress_type = source.compress_type
+        zinfo.CRC = source.CRC
+        zinfo.compress_size = source.compress_size
+        zinfo.file_size = source.file_size
+        zinfo.external_attr = 0o600 << 16
+        raw = self.template_archive.raw_data(entry)
+
+        # 与 ZipFile.writestr 写入已知大小数据时的步骤一致：本地文件头 + 数据，
+        # 再登记到中央目录（close 时统一写出）
+        with self._lock:
+            if self._writing:
+                raise ValueError("Can't write to ZIP archive while an open writing handle exists")
+            self._writecheck(zinfo)
+            self._didModify = True
+            zinfo.header_offset = self.fp.tell()
+            zip64 = zinfo.file_size > ZIP64_LIMIT or zinfo.compress_size > ZIP64_LIMIT
+            self.fp.write(zinfo.FileHeader(zip64))
+            self.fp.write(raw)
+            self.filelist.append(zinfo)
+            self.NameToInfo[zinfo.filename] = zinfo
+            self.start_dir = self.fp.tell()
+
+        self.passthrough_count += 1
+        self.passthrough_bytes += zinfo.file_size
+
+
+def save_workbook(workbook: Any, output: OutputTarget, archive: Optional[TemplateArchive] = None) -> None:
+    """保存工作簿（同 openpyxl.writer.excel.save_workbook，未修改的部件直通）"""
+    if workbook.read_only:
+        raise TypeError("""Workbook is read-only""")
+    if workbook.write_only and not workbook.worksheets:
+        workbook.create_sheet()
+    zip_file = PassthroughZipFile(output, archive)
+    workbook.properties.modified = datetime.datetime.now(tz=datetime.timezone.utc).replace(tzinfo=None)
+    ExcelWriter(workbook, zip_file).save()
+    _log_passthrough(zip_file)
+
+
+def save_document(document: Any, output: OutputTarget, archive: Optional[TemplateArchive] = None) -> None:
+    """保存 Word 文档（同 python-docx 的 OpcPackage.save，未修改的部件直通）"""
+    package = document.part.package
+    parts = list(package.iter_parts())
+    for part in parts:
+        part.before_marshal()
+
+    with PassthroughZipFile(output, archive) as zip_file:
+        zip_file.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        zip_file.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            membername = part.partname.membername
+            template_entry = archive.entry(membername) if archive is not None else None
+            if template_entry is not None and isinstance(part, READ_ONLY_DOCX_PARTS):
+                # 只读部件与模板中的内容一致，无需序列化
+                zip_file.write_template_entry(membername, template_entry)
+            else:
+                zip_file.writestr(membername, part.blob)
+            if len(part.rels):
+                zip_file.writestr(part.partname.rels_uri.membername, part.rels.xml)
+    _log_passthrough(zip_file)
+
+
+def _log_passthrough(zip_file: PassthroughZipFile) -> None:
+    if zip_file.passthrough_count:
+        logger.debug(
+            "Copied %s unchanged template entries (%s bytes) without recompression",
+            zip_file.passthrough_count,
+            zip_file.passthrough_bytes,
+        )
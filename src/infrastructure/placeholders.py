@@ -0,0 +1,190 @@
+"""占位符解析与索引
+
+模板中的占位符写作 {{key}} 或 {key}。填充器原先每次请求都遍历工作表的全部单元格，
+对每段文本执行两次 re.sub（每次调用都重新编译正则），Word 填充器则对每个段落逐个 key
+做 str.replace 并临时拼出一个包含全部 key 的大正则。
+本模块提供统一的替换引擎：
+- PlaceholderSyntax：一种占位符语法，正则只编译一次，文本的拆分结果
+  （"字面量片段 + 占位符" 序列）按文本缓存，模板中的同一段文本之后的请求直接复用；
+  替换时单次扫描拆分结果，同时处理 {{x}} 与 {x}
+- WorkbookPlaceholderIndex：Excel 模板的占位符索引（每个工作表中哪些单元格含占位符），
+  随模板缓存一起复用，填充时只处理这些单元格
+"""
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+# 先匹配 {{key}}，再匹配 {key}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{([^}]+)\}\}|\{([^}]+)\}")
+
+
+@dataclass(frozen=True)
+class Placeholder:
+    """文本中的一个占位符：key 为占位符名称，raw 为原始文本（含花括号）"""
+    key: str
+    raw: str
+
+
+Fragment = Union[str, Placeholder]
+
+# key -> 替换文本；返回 None 表示保留占位符原文
+Resolver = Callable[[str], Optional[str]]
+
+
+class PlaceholderSyntax:
+    """一种占位符语法：正则编译一次，拆分结果按文本缓存（线程安全）"""
+
+    def __init__(self, pattern: str, strip_keys: bool = True, cache_size: int = 8192):
+        self.pattern = re.compile(pattern)
+        self.strip_keys = strip_keys
+        self._split_cached = lru_cache(maxsize=cache_size)(self._split)
+
+    def split(self, text: str) -> Tuple[Fragment, ...]:
+        """把文本拆分为字面量片段与占位符的序列"""
+        if "{" not in text:
+            # 不含花括号的文本不进入缓存
+            return (text,) if text else ()
+        return self._split_cached(text)
+
+    def keys(self, text: str) -> List[str]:
+        """文本中出现的占位符名称（按出现顺序）"""
+        return [f.key for f in self.split(text) if isinstance(f, Placeholder)]
+
+    def substitute(self, text: str, resolve: Resolver) -> str:
+        """单次扫描替换文本中的占位符"""
+        fragments = self.split(text)
+        if not any(isinstance(fragment, Placeholder) for fragment in fragments):
+            return text
+        return render_fragments(fragments, resolve)
+
+    def cache_info(self):
+        """拆分结果缓存的命中统计"""
+        return self._split_cached.cache_info()
+
+    def _split(self, text: str) -> Tuple[Fragment, ...]:
+        fragments: List[Fragment] = []
+        pos = 0
+        for match in self.pattern.finditer(text):
+            if match.start() > pos:
+                fragments.append(text[pos:match.start()])
+            key = next(group for group in match.groups() if group is not None)
+            fragments.append(Placeholder(key.strip() if self.strip_keys else key, match.group(0)))
+            pos = match.end()
+        if pos < len(text):
+            fragments.append(text[pos:])
+        return tuple(fragments)
+
+
+# 通用语法（Excel 单元格、纯文本）：{{key}} 与 {key}，key 两侧空白忽略
+TEXT_PLACEHOLDERS = PlaceholderSyntax(PLACEHOLDER_PATTERN.pattern)
+# Word 段落语法：只识别 {{key}}，key 需精确匹配
+DOCX_PLACEHOLDERS = PlaceholderSyntax(r"\{\{([^{}]+)\}\}", strip_keys=False)
+
+
+def split_placeholders(text: str) -> Tuple[Fragment, ...]:
+    """按通用语法拆分文本"""
+    return TEXT_PLACEHOLDERS.split(text)
+
+
+def render_fragments(fragments: Tuple[Fragment, ...], resolve: Resolver) -> str:
+    """
+    拼接拆分结果
+
+    Args:
+        fragments: 拆分结果
+        resolve: key -> 替换文本；返回 None 表示保留占位符原文
+    """
+    parts = []
+    for fragment in fragments:
+        if isinstance(fragment, str):
+            parts.append(fragment)
+            continue
+        value = resolve(fragment.key)
+        parts.append(fragment.raw if value is None else value)
+    return "".join(parts)
+
+
+def render_segments(fragments: Tuple[Fragment, ...], resolve: Resolver) -> List[Tuple[str, bool]]:
+    """
+    拼接为 (文本, 是否为填充值) 序列，供 Word 填充器按段着色
+
+    相邻的原文片段（含未解析的占位符）合并为一段；解析为空字符串的占位符省略。
+    """
+    segments: List[Tuple[str, bool]] = []
+    for fragment in fragments:
+        if isinstance(fragment, str):
+            text, filled = fragment, False
+        else:
+            value = resolve(fragment.key)
+            if value is None:
+                text, filled = fragment.raw, False
+            elif value:
+                text, filled = value, True
+            else:
+                continue
+        if not filled and segments and not segments[-1][1]:
+            segments[-1] = (segments[-1][0] + text, False)
+        else:
+            segments.append((text, filled))
+    return segments
+
+
+@dataclass(frozen=True)
+class IndexedCell:
+    """含占位符的单元格：坐标、模板原文及其拆分结果"""
+    row: int
+    column: int
+    text: str
+    fragments: Tuple[Fragment, ...]
+
+
+@dataclass(frozen=True)
+class SheetPlaceholders:
+    """单个工作表的占位符索引；max_row/max_column 用于判断填充过程中是否插入或删除了行列"""
+    max_row: int
+    max_column: int
+    cells: Tuple[IndexedCell, ...]
+
+
+class WorkbookPlaceholderIndex:
+    """Excel 模板的占位符索引（按工作表名称组织，建立后只读）"""
+
+    def __init__(self, sheets: Dict[str, SheetPlaceholders]):
+        self.sheets = sheets
+        # key -> [(工作表名称, 行, 列)]
+        self.keys: Dict[str, List[Tuple[str, int, int]]] = {}
+        for title, sheet in sheets.items():
+            for cell in sheet.cells:
+                for fragment in cell.fragments:
+                    if isinstance(fragment, Placeholder):
+                        self.keys.setdefault(fragment.key, []).append((title, cell.row, cell.column))
+
+    @classmethod
+    def from_workbook(cls, workbook) -> "WorkbookPlaceholderIndex":
+        """扫描工作簿中的全部字符串单元格建立索引"""
+        sheets: Dict[str, SheetPlaceholders] = {}
+        for worksheet in workbook.worksheets:
+            cells = []
+            # 只读取已存在的单元格，不像 iter_rows 那样补齐整个区域
+            for (row, column), cell in sorted(getattr(worksheet, "_cells", {}).items()):
+                value = cell.value
+                if not value or not isinstance(value, str) or "{" not in value:
+                    continue
+                fragments = split_placeholders(value)
+                if any(isinstance(fragment, Placeholder) for fragment in fragments):
+                    cells.append(IndexedCell(row, column, value, fragments))
+            sheets[worksheet.title] = SheetPlaceholders(worksheet.max_row, worksheet.max_column, tuple(cells))
+        return cls(sheets)
+
+    def sheet(self, title: str) -> Optional[SheetPlaceholders]:
+        return self.sheets.get(title)
+
+    def estimated_size(self) -> int:
+        """估算内存占用（字节），用于模板缓存的内存预算"""
+        return 1024 + sum(
+            256 + len(cell.text) * 8
+            for sheet in self.sheets.values()
+            for cell in sheet.cells
+        )
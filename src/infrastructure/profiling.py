@@ -0,0 +1,196 @@
+"""按需采集填充阶段的性能剖析数据
+
+线上个别 PROJECT_PLAN / INDIVIDUAL_TEST_SPEC 渲染很慢，但换成测试数据无法复现。本模块提供可选的剖析模式：
+- 管理员请求头（X-OHC-Profile，值为 profiling.admin_token）强制剖析单个请求，
+  或按 profiling.sample_rate 随机抽样（可用 profiling.templates 限定模板）
+- 被选中的生成请求在 filler.fill_template 期间同时运行 cProfile 与调用栈采样：
+  cProfile 结果保存为 pstats（可用 pstats / snakeviz 查看），
+  调用栈采样保存为 collapsed stack 文本（每行 "帧;帧;... 次数"，可直接交给 flamegraph.pl / speedscope）
+- 剖析结果由生成服务保存在生成文件旁边，文件名中带请求 ID
+
+cProfile 在同一时间只对一个请求开启（Python 3.12 起性能剖析钩子是进程全局的），
+其他被选中的请求在此期间跳过剖析。在渲染进程池中执行的填充（render.engine = "process"）不做剖析。
+"""
+
+import contextlib
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-OHC-Profile"
+PROFILE_ID_HEADER = "X-OHC-Profile-Id"
+
+# 调用栈采样间隔（秒）
+STACK_SAMPLE_INTERVAL = 0.005
+# 采到目标线程正在进出 profile() 本身时丢弃该样本
+_CONTEXT_MANAGER_CODES = (
+    contextlib._GeneratorContextManager.__enter__.__code__,
+    contextlib._GeneratorContextManager.__exit__.__code__,
+)
+
+
+@dataclass
+class ProfileRequest:
+    """由管理员请求头强制开启的剖析；artifacts 为生成服务保存的剖析文件位置"""
+    request_id: str
+    artifacts: List[str] = field(default_factory=list)
+
+
+class ProfileCapture:
+    """一次文档生成的剖析数据"""
+
+    def __init__(self, request_id: str, template_name: str):
+        self.request_id = request_id
+        self.template_name = template_name
+        self.profiler = cProfile.Profile()
+        self.stacks: "Counter[str]" = Counter()
+        self.captured = False
+
+    def pstats_bytes(self) -> bytes:
+        """pstats 文件内容（与 Profile.dump_stats 写出的格式相同）"""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+    def collapsed_stacks(self) -> str:
+        """collapsed stack 文本（flamegraph.pl 的输入格式）"""
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+    def artifacts(self) -> Dict[str, bytes]:
+        """剖析文件后缀 -> 内容"""
+        return {
+            "pstats": self.pstats_bytes(),
+            "collapsed.txt": self.collapsed_stacks().encode("utf-8"),
+        }
+
+    def summary(self, limit: int = 15) -> str:
+        """按累计耗时排序的前 limit 个函数（用于日志）"""
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+_requested: ContextVar[Optional[ProfileRequest]] = ContextVar("ohc_profile_request", default=None)
+_current_capture: ContextVar[Optional[ProfileCapture]] = ContextVar("ohc_profile_capture", default=None)
+# 同一时间只允许一个 cProfile 处于开启状态
+_profiler_lock = threading.Lock()
+
+
+def current_capture() -> Optional[ProfileCapture]:
+    return _current_capture.get()
+
+
+def requested_profile() -> Optional[ProfileRequest]:
+    return _requested.get()
+
+
+@contextmanager
+def request_profile(header_value: Optional[str], admin_token: Optional[str]) -> Iterator[Optional[ProfileRequest]]:
+    """
+    根据管理员请求头强制剖析当前请求中的文档生成
+
+    admin_token 为空（未配置）或请求头不匹配时不开启，返回 None。
+    """
+    if not admin_token or header_value != admin_token:
+        yield None
+        return
+    profile_request = ProfileRequest(request_id=uuid.uuid4().hex)
+    token = _requested.set(profile_request)
+    try:
+        yield profile_request
+    finally:
+        _requested.reset(token)
+
+
+@contextmanager
+def profile_generation(
+    template_name: str,
+    sample_rate: float = 0.0,
+    templates: Sequence[str] = (),
+) -> Iterator[Optional[ProfileCapture]]:
+    """
+    决定本次文档生成是否剖析：管理员请求头强制开启，或按 sample_rate 随机抽样
+    （templates 不为空时只抽样其中的模板）。选中时在当前上下文开始一次采集。
+    """
+    profile_request = _requested.get()
+    if profile_request is not None:
+        request_id = profile_request.request_id
+    elif sample_rate > 0 and (not templates or template_name in templates) and random.random() < sample_rate:
+        request_id = uuid.uuid4().hex
+    else:
+        yield None
+        return
+    capture = ProfileCapture(request_id, template_name)
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+class _StackSampler(threading.Thread):
+    """定时采样目标线程的调用栈（只记录 base_frame 以下的帧）"""
+
+    def __init__(self, thread_id: int, base_frame, stacks: "Counter[str]", interval: float):
+        super().__init__(name="ohc-profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.base_frame = base_frame
+        self.stacks = stacks
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names: List[str] = []
+            code = None
+            while frame is not None and frame is not self.base_frame:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names and code not in _CONTEXT_MANAGER_CODES:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+@contextmanager
+def profile(stage: str) -> Iterator[None]:
+    """剖析一段代码（如 filler.fill_template）；当前生成未被选中时不做任何事"""
+    capture = _current_capture.get()
+    if capture is None:
+        yield
+        return
+    if not _profiler_lock.acquire(blocking=False):
+        logger.warning("另一个请求正在剖析，跳过: template=%s request_id=%s", capture.template_name, capture.request_id)
+        yield
+        return
+    # sys._getframe(2) 为 with 语句所在的调用方帧（中间隔着 _GeneratorContextManager.__enter__）
+    sampler = _StackSampler(threading.get_ident(), sys._getframe(2), capture.stacks, STACK_SAMPLE_INTERVAL)
+    try:
+        sampler.start()
+        capture.profiler.enable()
+        try:
+            yield
+        finally:
+            capture.profiler.disable()
+            sampler.stop()
+            capture.captured = True
+            logger.debug("剖析完成: template=%s stage=%s request_id=%s", capture.template_name, stage, capture.request_id)
+    finally:
+        _profiler_lock.release()
@@ -0,0 +1,163 @@
+"""进程池渲染引擎
+
+openpyxl / python-docx 的模板填充是持有 GIL 的纯 Python CPU 计算，线程池无法利用多核。
+本模块将 (template_name, parameters, language) 发送给常驻的工作进程渲染：
+- 工作进程启动时（进程池 initializer 中）一次性导入 TEMPLATE_FILLER_MAPPING 中的全部填充器（预热），
+  启动引擎时向每个工作进程各提交一个预热任务，确保全部进程都已创建并完成初始化
+- 渲染结果写入共享临时目录，只把文件路径返回给主进程
+- 任务附带主进程模板索引的版本，工作进程的索引落后时先重新扫描模板目录
+- 每个工作进程处理 N 个任务后自动回收，限制 openpyxl 带来的内存增长
+"""
+
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait as wait_futures
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 等待工作进程完成初始化的超时时间（秒）
+WORKER_START_TIMEOUT = 60
+
+# 工作进程内的模板服务实例（由 _init_worker 创建）
+_worker_template_service = None
+# 预热任务之间的屏障：每个预热任务都要等到全部工作进程各领取一个后才返回
+_warm_up_barrier = None
+
+
+def _init_worker(barrier=None) -> None:
+    """工作进程初始化：导入并实例化模板服务（包含全部填充器）"""
+    global _worker_template_service, _warm_up_barrier
+    from src.domain.template_filler_service import TemplateService
+
+    _worker_template_service = TemplateService()
+    _warm_up_barrier = barrier
+
+
+def _warm_up_worker() -> int:
+    """预热任务：在屏障处等待其他工作进程，保证每个进程恰好领取一个预热任务"""
+    if _warm_up_barrier is not None:
+        try:
+            _warm_up_barrier.wait(timeout=WORKER_START_TIMEOUT)
+        except threading.BrokenBarrierError:
+            pass
+    return os.getpid()
+
+
+def _render_in_worker(
+    template_name: str,
+    parameters: Dict[str, Any],
+    language: Optional[str],
+    output_dir: str,
+    suffix: str,
+    catalog_version: Optional[str] = None,
+) -> Optional[str]:
+    """在工作进程中渲染文档，成功时返回共享临时目录中的文件路径"""
+    catalog = _worker_template_service.catalog
+    if catalog_version is not None and catalog.version != catalog_version:
+        # 主进程已重新加载模板索引（模板文件增删、重命名），工作进程跟进
+        catalog.reload()
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=output_dir)
+    os.close(fd)
+    output_path = Path(path)
+    try:
+        success = _worker_template_service.generate_document(template_name, parameters, output_path, language)
+    except Exception:
+        logger.exception("Render failed in worker: template=%s", template_name)
+        success = False
+    if not success:
+        output_path.unlink(missing_ok=True)
+        return None
+    return path
+
+
+class ProcessRenderEngine:
+    """基于进程池的文档渲染引擎"""
+
+    def __init__(self, max_workers: int = 2, max_jobs_per_worker: int = 50, temp_dir: Optional[str] = None):
+        if max_workers < 1:
+            raise ValueError("max_workers 必须大于 0")
+        if max_jobs_per_worker < 1:
+            raise ValueError("max_jobs_per_worker 必须大于 0")
+
+        self.max_workers = max_workers
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.temp_dir = Path(temp_dir) if temp_dir else Path(tempfile.gettempdir()) / "ohc_render"
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings) -> "ProcessRenderEngine":
+        """根据配置创建渲染引擎"""
+        return cls(
+            max_workers=settings.render_workers,
+            max_jobs_per_worker=settings.render_max_jobs_per_worker,
+            temp_dir=settings.render_temp_dir,
+        )
+
+    def start(self) -> None:
+        """创建进程池，启动全部工作进程并等待其完成初始化"""
+        with self._lock:
+            if self._pool is not None:
+                return
+            self.temp_dir.mkdir(parents=True, exist_ok=True)
+            # max_tasks_per_child 不支持 fork 启动方式，统一使用 spawn
+            context = multiprocessing.get_context("spawn")
+            pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(context.Barrier(self.max_workers),),
+                max_tasks_per_child=self.max_jobs_per_worker,
+            )
+            self._warm_up(pool)
+            self._pool = pool
+        logger.info("Render engine started: workers=%s max_jobs_per_worker=%s", self.max_workers, self.max_jobs_per_worker)
+
+    def _warm_up(self, pool: ProcessPoolExecutor) -> List[int]:
+        """
+        向每个工作进程提交一个预热任务并等待完成，返回完成预热的进程 PID
+
+        spawn 方式下进程池按提交的任务逐个创建进程；预热任务在屏障处互相等待，
+        因此每个进程恰好处理一个（占用 max_tasks_per_child 的一个名额）。
+        """
+        futures = [pool.submit(_warm_up_worker) for _ in range(self.max_workers)]
+        done, not_done = wait_futures(futures, timeout=WORKER_START_TIMEOUT * 2)
+        if not_done:
+            logger.warning("Render workers did not finish warming up within %ss", WORKER_START_TIMEOUT * 2)
+        return [future.result() for future in done if future.exception() is None]
+
+    def render(
+        self,
+        template_name: str,
+        parameters: Dict[str, Any],
+        language: Optional[str] = None,
+        suffix: str = "",
+        catalog_version: Optional[str] = None,
+    ) -> Optional[Path]:
+        """
+        在工作进程中渲染文档（阻塞直到完成）
+
+        Args:
+            catalog_version: 主进程模板索引的版本（TemplateCatalog.version），工作进程不一致时重新加载
+
+        Returns:
+            渲染成功时返回共享临时目录中的文件路径（调用方负责删除），失败返回 None
+        """
+        self.start()
+        future = self._pool.submit(
+            _render_in_worker, template_name, parameters, language, str(self.temp_dir), suffix, catalog_version
+        )
+        path = future.result()
+        return Path(path) if path else None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,110 @@
+"""富内容（Markdown / HTML 图文表格混排）的解析结果
+
+填充器把字段值拆分为文本 / 表格 / 图片片段后，行数计算、图片预取与渲染原先各自重新解析：
+表格文本在计算行数与写入时各解析一次，文本中的行内图片在判断、计数与渲染时各扫描一次。
+本模块定义统一的解析结果：
+- ContentPart：一个片段；表格在解析时即拆分为表头、数据行与合并信息，
+  文本预先完成渲染前的预处理并拆出行内图文片段，同时记录布局所需的行数与各行显示宽度
+- ParsedContent：一个字段值的全部片段
+- ParsedContentCache：按原文缓存解析结果（结果不可变，可被多个请求并发复用）
+具体的拆分规则仍由各填充器实现（Excel 与 Word 的渲染方式不同）。
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.infrastructure.text_metrics import wrapped_line_count
+
+PART_TEXT = "text"
+PART_TABLE = "table"
+PART_IMAGE = "image"
+
+
+@dataclass(frozen=True)
+class InlineSegment:
+    """段落内的一个图文片段：文本（text）或图片（url）"""
+    type: str
+    text: str = ""
+    url: str = ""
+
+
+@dataclass(frozen=True)
+class TableContent:
+    """解析后的表格（各行已对齐到表头列数，合并信息中 row 为 0 表示表头）"""
+    headers: List[str]
+    rows: List[List[str]]
+    merge_info: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def row_count(self) -> int:
+        """表头 + 数据行数；无表头时为 0（不渲染）"""
+        return 1 + len(self.rows) if self.headers else 0
+
+
+@dataclass(frozen=True)
+class ContentPart:
+    """
+    富内容中的一个片段
+
+    content 为原文（文本、表格源码或图片 URL）；text 为渲染用的预处理文本；
+    rows 为该片段在 Excel 布局中占用的行数（不含片段之间的间隔行）。
+    """
+    type: str
+    content: str
+    text: str = ""
+    table: Optional[TableContent] = None
+    segments: Tuple[InlineSegment, ...] = ()
+    rows: int = 0
+    line_widths: Tuple[int, ...] = ()
+
+    @property
+    def has_inline_images(self) -> bool:
+        return any(segment.type == PART_IMAGE for segment in self.segments)
+
+    def wrapped_line_count(self, capacity: int) -> int:
+        """按每行容量（显示宽度，见 text_metrics）折行后的总行数"""
+        return wrapped_line_count(self.line_widths, capacity)
+
+
+@dataclass(frozen=True)
+class ParsedContent:
+    """一个字段值的解析结果；image_urls 为原文中引用的图片（用于渲染前预取）"""
+    parts: Tuple[ContentPart, ...]
+    image_urls: Tuple[str, ...] = ()
+
+    @property
+    def image_count(self) -> int:
+        """图片数量（独立图片片段 + 文本中的行内图片）"""
+        return sum(
+            1 if part.type == PART_IMAGE else sum(1 for s in part.segments if s.type == PART_IMAGE)
+            for part in self.parts
+        )
+
+
+class ParsedContentCache:
+    """按原文缓存解析结果（LRU，线程安全）"""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, parse: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        # 解析在锁外进行；并发解析同一文本时结果相同，后写入者覆盖
+        value = parse()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
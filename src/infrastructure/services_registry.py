@@ -3,10 +3,22 @@ import os
 from src.config import settings
 from src.domain.template_filler_service import TemplateService
 from src.infrastructure.storage_service import StorageServiceFactory
+from src.infrastructure.executor import GenerationExecutor
+from src.infrastructure.render_engine import ProcessRenderEngine
+from src.infrastructure.job_store import JobStoreFactory
 
 # 在此处实例化应用级别的单例服务
 template_service = TemplateService()
 
+# 文档生成执行器（底层线程池/进程池在首次提交任务时才创建）
+generation_executor = GenerationExecutor.from_settings(settings)
+
+# 进程池渲染引擎（仅在 render.engine = "process" 时启用，否则在执行器线程内直接渲染）
+render_engine = ProcessRenderEngine.from_settings(settings) if settings.render_engine == "process" else None
+
+# 异步生成任务存储
+job_store = JobStoreFactory.create_job_store()
+
 # 在 CI 或受限环境中，可能需要跳过初始化会进行网络访问的外部资源（例如 MinIO）。
 # 当环境变量 SKIP_INFRA_INIT 设置为 "1"/"true"/"yes" 时，将跳过 storage_service 的初始化，
 # 以避免在模块导入时发生网络调用或抛出配置相关的错误。
@@ -1,10 +1,11 @@
 """MinIO 存储服务（已迁移到 infrastructure 层）"""
 
 import os
+import re
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple
 
 from minio import Minio
 from minio.error import S3Error
@@ -22,11 +23,36 @@ class StorageService(ABC):
     def save_file(self, file_path: Path, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
         pass
 
+    @abstractmethod
+    def save_stream(self, stream: BinaryIO, length: int, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
+        """从内存/溢写缓冲区直接保存文件（stream 需位于起始位置，length 为字节数）"""
+        pass
+
     @abstractmethod
     def get_file_url(self, file_name: str) -> Optional[str]:
         pass
 
 
+def _object_key(file_name: str, project_id: str = None, version: str = None) -> str:
+    """生成对象存储的 key：{project_id}/{version}/{文件名}，文件名不含时间戳时追加时间戳"""
+    name, ext = os.path.splitext(file_name)
+    # 检查是否已经包含时间戳格式（YYYYMMDD-HHMMSS 或 YYYYMMDD_HHMMSS）
+    timestamp_pattern = r'\d{8}[-_]\d{6}$'
+    if re.search(timestamp_pattern, name):
+        # 文件名已经包含时间戳，直接使用
+        unique_name = file_name
+    else:
+        # 文件名不包含时间戳，添加时间戳
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_name = f"{name}_{timestamp}{ext}"
+
+    if project_id and version:
+        return f"{project_id}/{version}/{unique_name}"
+    elif project_id:
+        return f"{project_id}/default/{unique_name}"
+    return f"default/default/{unique_name}"
+
+
 class MinIOStorageService(StorageService):
     def __init__(self):
         if not settings.validate_minio_config():
@@ -50,35 +76,28 @@ class MinIOStorageService(StorageService):
 
     def save_file(self, file_path: Path, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
         try:
-            # 检查文件名是否已经包含时间戳（格式：YYYYMMDD-HHMMSS 或 YYYYMMDD_HHMMSS）
-            import re
-            name, ext = os.path.splitext(file_name)
-            # 检查是否已经包含时间戳格式（YYYYMMDD-HHMMSS 或 YYYYMMDD_HHMMSS）
-            timestamp_pattern = r'\d{8}[-_]\d{6}$'
-            if re.search(timestamp_pattern, name):
-                # 文件名已经包含时间戳，直接使用
-                unique_name = file_name
-            else:
-                # 文件名不包含时间戳，添加时间戳
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                unique_name = f"{name}_{timestamp}{ext}"
-
-            if project_id and version:
-                object_key = f"{project_id}/{version}/{unique_name}"
-            elif project_id:
-                object_key = f"{project_id}/default/{unique_name}"
-            else:
-                object_key = f"default/default/{unique_name}"
-
+            object_key = _object_key(file_name, project_id, version)
             self.minio_client.fput_object(self.bucket_name, object_key, str(file_path))
-            from datetime import timedelta
-            file_url = self.minio_client.presigned_get_object(self.bucket_name, object_key, expires=timedelta(days=7))
-            return True, file_url, "文件上传成功"
+            return True, self._presigned_url(object_key), "文件上传成功"
         except S3Error as e:
             return False, None, f"MinIO上传失败: {str(e)}"
         except Exception as e:
             return False, None, f"文件上传失败: {str(e)}"
 
+    def save_stream(self, stream: BinaryIO, length: int, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
+        try:
+            object_key = _object_key(file_name, project_id, version)
+            self.minio_client.put_object(self.bucket_name, object_key, stream, length)
+            return True, self._presigned_url(object_key), "文件上传成功"
+        except S3Error as e:
+            return False, None, f"MinIO上传失败: {str(e)}"
+        except Exception as e:
+            return False, None, f"文件上传失败: {str(e)}"
+
+    def _presigned_url(self, object_key: str) -> str:
+        from datetime import timedelta
+        return self.minio_client.presigned_get_object(self.bucket_name, object_key, expires=timedelta(days=7))
+
     def get_file_url(self, file_name: str) -> Optional[str]:
         try:
             self.minio_client.stat_object(self.bucket_name, file_name)
@@ -125,6 +144,17 @@ class LocalStorageService(StorageService):
         except Exception as e:
             return False, None, f"本地保存失败: {str(e)}"
 
+    def save_stream(self, stream: BinaryIO, length: int, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
+        try:
+            target_dir = self.base_path / (project_id or "default") / (version or "default")
+            target_dir.mkdir(parents=True, exist_ok=True)
+            target_path = target_dir / file_name
+            with open(target_path, "wb") as f:
+                shutil.copyfileobj(stream, f)
+            return True, str(target_path), "文件保存到本地成功"
+        except Exception as e:
+            return False, None, f"本地保存失败: {str(e)}"
+
     def get_file_url(self, file_name: str) -> Optional[str]:
         # return filesystem path for local files
         candidate = self.base_path / file_name
@@ -170,37 +200,28 @@ class S3StorageService(StorageService):
 
     def save_file(self, file_path: Path, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
         try:
-            import time
-            import re
-            # 检查文件名是否已经包含时间戳（格式：YYYYMMDD-HHMMSS 或 YYYYMMDD_HHMMSS）
-            name, ext = os.path.splitext(file_name)
-            # 检查是否已经包含时间戳格式（YYYYMMDD-HHMMSS 或 YYYYMMDD_HHMMSS）
-            timestamp_pattern = r'\d{8}[-_]\d{6}$'
-            if re.search(timestamp_pattern, name):
-                # 文件名已经包含时间戳，直接使用
-                unique_name = file_name
-            else:
-                # 文件名不包含时间戳，添加时间戳
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                unique_name = f"{name}_{timestamp}{ext}"
-            if project_id and version:
-                key = f"{project_id}/{version}/{unique_name}"
-            elif project_id:
-                key = f"{project_id}/default/{unique_name}"
-            else:
-                key = f"default/default/{unique_name}"
-
+            key = _object_key(file_name, project_id, version)
             self.client.upload_file(str(file_path), self.bucket, key)
-            # presigned url 7 days
-            url = self.client.generate_presigned_url(
-                "get_object",
-                Params={"Bucket": self.bucket, "Key": key},
-                ExpiresIn=7 * 24 * 3600,
-            )
-            return True, url, "文件上传到 S3 成功"
+            return True, self._presigned_url(key), "文件上传到 S3 成功"
+        except Exception as e:
+            return False, None, f"S3 上传失败: {str(e)}"
+
+    def save_stream(self, stream: BinaryIO, length: int, file_name: str, project_id: str = None, version: str = None) -> Tuple[bool, Optional[str], str]:
+        try:
+            key = _object_key(file_name, project_id, version)
+            self.client.upload_fileobj(stream, self.bucket, key)
+            return True, self._presigned_url(key), "文件上传到 S3 成功"
         except Exception as e:
             return False, None, f"S3 上传失败: {str(e)}"
 
+    def _presigned_url(self, key: str) -> str:
+        # presigned url 7 days
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=7 * 24 * 3600,
+        )
+
     def get_file_url(self, file_name: str) -> Optional[str]:
         try:
             url = self.client.generate_presigned_url(
@@ -0,0 +1,70 @@
+"""多模式子串匹配（Aho–Corasick 自动机）
+
+PTF INDEX 填充器需要判断每行名称文本包含 file_number_map 中的哪些简称：逐个简称做
+`name in text` 的开销为 行数 × 简称数 × 文本长度。本模块把全部简称构建为一个自动机，
+每段文本只扫描一遍即可得到其中出现的全部简称。
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class SubstringMatcher:
+    """
+    Aho–Corasick 自动机：找出文本中出现的全部模式串
+
+    构建后只读，可在多个线程中同时使用。空模式串被忽略。
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        # 模式串（去重，保持首次出现顺序）-> 编号
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+        # 状态 0 为根；_goto[state][char] -> 下一状态
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 到达该状态时已匹配的模式串编号（含失败链上的输出）
+        self._output: List[Set[int]] = [set()]
+
+        for pattern_id, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(set())
+                state = next_state
+            self._output[state].add(pattern_id)
+
+        # 广度优先计算失败指针，并把失败状态的输出并入当前状态
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def find_ids(self, text: str) -> Set[int]:
+        """文本中出现的模式串编号"""
+        found: Set[int] = set()
+        if not self.patterns or not text:
+            return found
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+    def find(self, text: str) -> Set[str]:
+        """文本中出现的模式串"""
+        return {self.patterns[pattern_id] for pattern_id in self.find_ids(text)}
@@ -0,0 +1,232 @@
+"""模板解析缓存
+
+每次填充都从磁盘重新解析模板（load_workbook / Document）开销很大，
+本模块按 "路径 + 修改时间" 缓存解析后的原始模板，每个请求拿到一个独立的克隆：
+- Excel：缓存 Workbook 的 pickle 序列化结果，克隆即反序列化（远快于重新解析 XML）
+- Word：缓存解析后的 Document，克隆时只深拷贝填充器会修改的部件（正文、页眉、页脚），
+  样式/编号/设置等只读部件共享同一棵 XML 树，图片、主题、字体等二进制部件按引用共享
+此外缓存 Excel 模板的占位符索引（见 placeholders）与 Word 模板的填充计划（见 docx_fill_plan），
+填充时只处理含占位符的单元格/段落；模板压缩包本身（见 package_writer），
+保存时未修改的部件直接复制其中的压缩数据；以及 Excel 修补引擎的模板解析结果（见 xlsx_patch）。
+缓存按估算内存占用做 LRU 淘汰，模板文件被修改后自动失效。
+"""
+
+import copy
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Tuple
+
+from docx import Document
+from openpyxl import Workbook, load_workbook
+
+from src.config import settings
+from src.infrastructure.docx_fill_plan import DocxFillPlan
+from src.infrastructure.metrics import span
+from src.infrastructure.package_writer import READ_ONLY_DOCX_PARTS, TemplateArchive
+from src.infrastructure.placeholders import WorkbookPlaceholderIndex
+from src.infrastructure.xlsx_patch import XlsxPatchTemplate
+
+logger = logging.getLogger(__name__)
+
+# Document 对象内存占用的估算系数（相对 docx 压缩包大小，XML 解析后通常膨胀数倍）
+_DOCX_MEMORY_FACTOR = 8
+
+
+def _clone_workbook(blob: bytes) -> Workbook:
+    """反序列化得到 Workbook 副本
+
+    DimensionHolder 的 default_factory（绑定到工作表的方法）不会随 pickle 保留，
+    反序列化后需重新绑定，否则访问不存在的行/列尺寸会抛出 KeyError。
+    """
+    workbook = pickle.loads(blob)
+    for worksheet in workbook.worksheets:
+        if hasattr(worksheet, "row_dimensions"):
+            worksheet.row_dimensions.default_factory = worksheet._add_row
+            worksheet.column_dimensions.default_factory = worksheet._add_column
+    return workbook
+
+
+def _shared_docx_elements(document: Any) -> Tuple[Any, ...]:
+    """收集克隆时可共享的只读部件 XML 树"""
+    return tuple(
+        part._element
+        for part in document.part.package.iter_parts()
+        if isinstance(part, READ_ONLY_DOCX_PARTS)
+    )
+
+
+def _clone_document(cached: Tuple[Any, Tuple[Any, ...]]) -> Any:
+    """深拷贝 Document，只读部件的 XML 树通过 memo 直接复用
+
+    包、部件、关系等 Python 对象仍逐个复制（新增图片/页眉等部件不会影响缓存的模板），
+    二进制部件的 blob 是不可变的 bytes，deepcopy 本身即按引用共享。
+    共享的 XML 树在保存时只会被序列化（只读），多个请求并发使用是安全的。
+    """
+    document, shared_elements = cached
+    memo = {id(element): element for element in shared_elements}
+    return copy.deepcopy(document, memo)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "clone")
+
+    def __init__(self, value: Any, size: int, clone: Callable[[Any], Any]):
+        self.value = value
+        self.size = size
+        self.clone = clone
+
+
+class TemplateCache:
+    """线程安全的模板解析缓存（LRU，按内存预算淘汰）"""
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, enabled: bool = True):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def total_bytes(self) -> int:
+        """当前缓存的估算内存占用（字节）"""
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load_workbook(self, template_path: Path, **kwargs: Any) -> Workbook:
+        """获取 Excel 模板的独立副本（参数同 openpyxl.load_workbook）"""
+        with span("template_load"):
+            if not self.enabled:
+                return load_workbook(template_path, **kwargs)
+
+            def parse() -> Tuple[bytes, int]:
+                blob = pickle.dumps(load_workbook(template_path, **kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+                return blob, len(blob)
+
+            key = ("xlsx", tuple(sorted(kwargs.items())))
+            return self._get(template_path, key, parse, _clone_workbook)
+
+    def placeholder_index(self, template_path: Path, **kwargs: Any) -> WorkbookPlaceholderIndex:
+        """获取 Excel 模板的占位符索引（参数同 load_workbook，索引只读、无需克隆）"""
+        if not self.enabled:
+            return WorkbookPlaceholderIndex.from_workbook(load_workbook(template_path, **kwargs))
+
+        def parse() -> Tuple[WorkbookPlaceholderIndex, int]:
+            index = WorkbookPlaceholderIndex.from_workbook(self.load_workbook(template_path, **kwargs))
+            return index, index.estimated_size()
+
+        key = ("xlsx-placeholders", tuple(sorted(kwargs.items())))
+        return self._get(template_path, key, parse, lambda index: index)
+
+    def load_document(self, template_path: Path) -> Any:
+        """获取 Word 模板的独立副本"""
+        with span("template_load"):
+            if not self.enabled:
+                return Document(template_path)
+
+            def parse() -> Tuple[Any, int]:
+                document = Document(template_path)
+                size = Path(template_path).stat().st_size * _DOCX_MEMORY_FACTOR
+                return (document, _shared_docx_elements(document)), size
+
+            return self._get(template_path, ("docx",), parse, _clone_document)
+
+    def docx_fill_plan(self, template_path: Path) -> DocxFillPlan:
+        """获取 Word 模板的填充计划（只读、无需克隆）"""
+        if not self.enabled:
+            return DocxFillPlan.from_document(Document(template_path))
+
+        def parse() -> Tuple[DocxFillPlan, int]:
+            plan = DocxFillPlan.from_document(self.load_document(template_path))
+            return plan, plan.estimated_size()
+
+        return self._get(template_path, ("docx-plan",), parse, lambda plan: plan)
+
+    def template_archive(self, template_path: Path) -> TemplateArchive:
+        """获取模板压缩包的原始内容与条目索引（只读、无需克隆）"""
+        if not self.enabled:
+            return TemplateArchive.from_path(template_path)
+
+        def parse() -> Tuple[TemplateArchive, int]:
+            archive = TemplateArchive.from_path(template_path)
+            return archive, archive.estimated_size()
+
+        return self._get(template_path, ("archive",), parse, lambda archive: archive)
+
+    def xlsx_patch_template(self, template_path: Path) -> XlsxPatchTemplate:
+        """获取 Excel 修补引擎的模板解析结果（只读、无需克隆）"""
+        with span("template_load"):
+            if not self.enabled:
+                return XlsxPatchTemplate(TemplateArchive.from_path(template_path), load_workbook(template_path))
+
+            def parse() -> Tuple[XlsxPatchTemplate, int]:
+                template = XlsxPatchTemplate(self.template_archive(template_path), self.load_workbook(template_path))
+                return template, template.estimated_size()
+
+            return self._get(template_path, ("xlsx-patch",), parse, lambda template: template)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _get(
+        self,
+        template_path: Path,
+        kind: Tuple,
+        parse: Callable[[], Tuple[Any, int]],
+        clone: Callable[[Any], Any],
+    ) -> Any:
+        path = Path(template_path).resolve()
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size) + kind
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            return entry.clone(entry.value)
+
+        # 未命中：在锁外解析，避免阻塞其他模板的读取
+        value, size = parse()
+        entry = _CacheEntry(value, size, clone)
+        with self._lock:
+            self.misses += 1
+            self._store(key, entry)
+        return clone(value)
+
+    def _store(self, key: Hashable, entry: _CacheEntry) -> None:
+        """写入缓存并按 LRU 淘汰（调用方需持有锁）"""
+        if entry.size > self.max_bytes:
+            logger.info("Template too large to cache: %s (%s bytes)", key[0], entry.size)
+            return
+
+        # 同一路径的旧版本（模板被修改）直接移除
+        for stale_key in [k for k in self._entries if k[0] == key[0] and k[1:3] != key[1:3]]:
+            self._total_bytes -= self._entries.pop(stale_key).size
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._total_bytes -= previous.size
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size
+
+
+# 所有填充器共享的模板缓存实例
+template_cache = TemplateCache(
+    max_bytes=settings.template_cache_max_mb * 1024 * 1024,
+    enabled=settings.template_cache_enabled,
+)
@@ -0,0 +1,164 @@
+"""模板目录索引
+
+启动时扫描一次 {template_base_path}/{excel,word}/{lang}，建立
+(模板名, 语言) -> [(路径, 格式), ...] 的索引，之后所有模板查找都直接查表，
+不再在每次请求中逐个拼接路径并调用 Path.exists()。
+
+模板目录发生变化时可显式调用 reload()（也提供 POST /templates/reload），
+或启用监听：安装了 watchfiles（uvicorn[standard] 自带，基于 inotify）时监听文件事件，
+否则退化为按间隔轮询目录修改时间。
+
+version 是索引内容的指纹：渲染工作进程各自持有一份索引，主进程随任务发送自己的 version，
+工作进程发现不一致时重新扫描，使 reload 对工作进程同样生效。
+"""
+
+import hashlib
+import importlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 查找优先级：先 excel 后 word
+FORMATS = ("excel", "word")
+LANGUAGES = ("zh", "ja", "en")
+_EXTENSIONS = {"excel": "xlsx", "word": "docx"}
+
+
+class TemplateCatalog:
+    """模板文件索引（线程安全，支持重新加载与变更监听）"""
+
+    def __init__(self, base_path: Path, display_names: Mapping[str, Mapping[str, str]]):
+        """
+        Args:
+            base_path: 模板根目录（相对路径按当前工作目录解析）
+            display_names: {模板名: {语言: 文件名(不含扩展名)}}
+        """
+        base_path = Path(base_path)
+        self.base_path = base_path if base_path.is_absolute() else Path.cwd() / base_path
+        self._display_names = display_names
+        self._index: Dict[Tuple[str, str], List[Tuple[Path, str]]] = {}
+        self.version = ""
+        self._lock = threading.Lock()
+        self._stop_event: Optional[threading.Event] = None
+        self._watch_thread: Optional[threading.Thread] = None
+        self.reload()
+
+    def reload(self) -> int:
+        """重新扫描模板目录，返回索引到的 (模板名, 语言) 数量"""
+        files = self._scan()
+        index: Dict[Tuple[str, str], List[Tuple[Path, str]]] = {}
+        for template_name, names in self._display_names.items():
+            for lang in LANGUAGES:
+                file_name_base = names.get(lang)
+                if not file_name_base:
+                    continue
+                entries = []
+                for fmt in FORMATS:
+                    path = files.get((fmt, lang, f"{file_name_base}.{_EXTENSIONS[fmt]}"))
+                    if path is not None:
+                        entries.append((path, fmt))
+                if entries:
+                    index[(template_name, lang)] = entries
+        version = hashlib.sha1(repr(sorted(index.items())).encode("utf-8")).hexdigest()
+        with self._lock:
+            self._index = index
+            self.version = version
+        logger.info("Template catalog loaded: %s entries from %s", len(index), self.base_path)
+        return len(index)
+
+    def _scan(self) -> Dict[Tuple[str, str, str], Path]:
+        """一次性列出所有模板目录下的文件"""
+        files: Dict[Tuple[str, str, str], Path] = {}
+        for fmt in FORMATS:
+            for lang in LANGUAGES:
+                directory = self.base_path / fmt / lang
+                if not directory.is_dir():
+                    continue
+                for path in directory.iterdir():
+                    if path.is_file():
+                        files[(fmt, lang, path.name)] = path
+        return files
+
+    def lookup(
+        self,
+        template_name: str,
+        language: Optional[str] = None,
+        file_type: Optional[str] = None,
+    ) -> Optional[Tuple[Path, str]]:
+        """
+        查找模板文件
+
+        Args:
+            template_name: 模板名称
+            language: 语言代码，为 None 或不支持时按 zh/ja/en 顺序查找
+            file_type: 文件类型 (excel/word)，为 None 时先 excel 后 word
+
+        Returns:
+            (模板路径, 格式)，不存在时返回 None
+        """
+        languages = [language] if language in LANGUAGES else LANGUAGES
+        index = self._index
+        for lang in languages:
+            for path, fmt in index.get((template_name, lang), ()):
+                if file_type is None or fmt == file_type:
+                    return path, fmt
+        return None
+
+    def languages(self, template_name: str) -> List[str]:
+        """模板存在文件的语言列表"""
+        index = self._index
+        return [lang for lang in LANGUAGES if (template_name, lang) in index]
+
+    # ---- 变更监听 ----
+
+    def start_watching(self, poll_interval: float = 5.0) -> None:
+        """在后台线程中监听模板目录变化，变化时自动 reload()"""
+        if self._watch_thread is not None:
+            return
+        self._stop_event = threading.Event()
+        try:
+            watchfiles = importlib.import_module("watchfiles")
+            target, args = self._watch_with_watchfiles, (watchfiles,)
+        except ImportError:
+            target, args = self._watch_with_polling, (poll_interval,)
+        self._watch_thread = threading.Thread(target=target, args=args, name="template-catalog-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        """停止监听"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join(timeout=5)
+        self._watch_thread = None
+        self._stop_event = None
+
+    def _watch_with_watchfiles(self, watchfiles) -> None:
+        try:
+            for _changes in watchfiles.watch(self.base_path, stop_event=self._stop_event):
+                self.reload()
+        except Exception:
+            logger.exception("Template catalog watcher stopped")
+
+    def _watch_with_polling(self, poll_interval: float) -> None:
+        snapshot = self._directory_snapshot()
+        while not self._stop_event.wait(poll_interval):
+            current = self._directory_snapshot()
+            if current != snapshot:
+                snapshot = current
+                self.reload()
+
+    def _directory_snapshot(self) -> Dict[Path, int]:
+        """模板目录的修改时间（文件增删、重命名会更新所在目录的 mtime）"""
+        snapshot = {}
+        for fmt in FORMATS:
+            for lang in LANGUAGES:
+                directory = self.base_path / fmt / lang
+                try:
+                    snapshot[directory] = directory.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+        return snapshot
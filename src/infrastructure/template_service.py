@@ -1,14 +1,24 @@
 """模板填充服务模块（已迁移到 infrastructure 层）"""
 
-import re
+import logging
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, Optional
-
-from docx import Document
-from openpyxl import load_workbook
+from typing import Any, Callable, Dict, List, Optional
 
 from src.config import settings
+from src.infrastructure.image_fetcher import download_image, prefetch_images
+from src.infrastructure.merged_cells import MergedCellIndex, merged_cell_index
+from src.infrastructure.metrics import annotate, span
+from src.infrastructure.package_writer import save_document, save_workbook
+from src.infrastructure.placeholders import TEXT_PLACEHOLDERS, WorkbookPlaceholderIndex, render_fragments
+from src.infrastructure.template_cache import template_cache
+from src.infrastructure.xlsx_patch import PatchedWorksheet, UnsupportedPatchOperation
+
+logger = logging.getLogger(__name__)
+
+# Excel 填充引擎：openpyxl 重新生成整个工作簿；patch 直接修补活动工作表的 XML（见 xlsx_patch）
+XLSX_ENGINE_OPENPYXL = "openpyxl"
+XLSX_ENGINE_PATCH = "patch"
 
 
 class TemplateFillerStrategy(ABC):
@@ -20,9 +30,12 @@ class TemplateFillerStrategy(ABC):
         "ja": "AIで検索できませんでした。要手動確認",
         "en": "AI could not retrieve this; manual confirmation required",
     }
+    _MISSING_TEXTS = frozenset(_MISSING_TEXT_BY_LANGUAGE.values())
 
     def __init__(self) -> None:
         self._language: str = "zh"
+        # 渲染前预取的图片：URL -> 内容（下载失败为空字节串）
+        self._prefetched_images: Dict[str, bytes] = {}
 
     def _set_language(self, language: Optional[str]) -> None:
         """设置当前语言"""
@@ -45,66 +58,162 @@ class TemplateFillerStrategy(ABC):
         s = value.strip()
         if s == "":
             return True
-        return s in set(self._MISSING_TEXT_BY_LANGUAGE.values())
+        return s in self._MISSING_TEXTS
+
+    def prefetch_images(self, parameters: Dict[str, Any]) -> None:
+        """渲染前并发下载参数中引用的全部图片（填充器通过 _collect_image_urls 声明需要的图片）"""
+        urls = self._collect_image_urls(parameters)
+        if not urls:
+            self._prefetched_images = {}
+            return
+        annotate(image_count=len(urls))
+        with span("image_download"):
+            self._prefetched_images = prefetch_images(urls)
+
+    def _collect_image_urls(self, parameters: Dict[str, Any]) -> List[str]:
+        """返回渲染时会用到的图片 URL；不含图片的填充器无需覆盖"""
+        return []
+
+    def _fetch_image(self, url: str) -> bytes:
+        """获取图片内容：优先使用预取结果，未预取的 URL 再单独下载"""
+        prefetched = getattr(self, "_prefetched_images", None) or {}
+        if url in prefetched:
+            return prefetched[url]
+        return download_image(url)
 
     @abstractmethod
     def fill_template(self, template_path: Path, parameters: Dict[str, Any], output_path: Path, language: Optional[str] = None) -> bool:
-        """填充模板"""
+        """填充模板（output_path 可以是文件路径，也可以是可写的二进制流，如内存缓冲区）"""
         pass
     
+    def _save_workbook(self, workbook, template_path: Path, output_path) -> None:
+        """保存工作簿：与模板相同的部件（如嵌入图片）直接复制模板中的压缩数据"""
+        with span("save"):
+            save_workbook(workbook, output_path, template_cache.template_archive(template_path))
+
+    def _save_document(self, doc, template_path: Path, output_path) -> None:
+        """保存 Word 文档：只读部件与模板中相同的部件直接复制模板中的压缩数据"""
+        with span("save"):
+            save_document(doc, output_path, template_cache.template_archive(template_path))
+
+    def _resolve_placeholder(self, key: str, parameters: Dict[str, Any]) -> Optional[str]:
+        """占位符的替换文本；参数中没有该 key 时返回 None（保留占位符原文）"""
+        if key not in parameters:
+            return None
+        value = parameters[key]
+        # 如果值为空，使用语言对应的兜底文本
+        if self._is_missing_text(value):
+            return self._missing_text()
+        return str(value)
+
     def _replace_placeholders(self, text: str, parameters: Dict[str, Any]) -> str:
-        """替换文本中的占位符"""
+        """替换文本中的占位符（{{key}} 与 {key} 单次扫描完成，拆分结果按文本缓存）"""
         if not text or not isinstance(text, str):
             return text
-        
-        def replace_double_brace(match):
-            placeholder = match.group(1).strip()
-            if placeholder in parameters:
-                value = parameters[placeholder]
-                # 如果值为空，使用语言对应的兜底文本
-                if self._is_missing_text(value):
-                    return self._missing_text()
-                return str(value)
-            return match.group(0)
-        
-        text = re.sub(r'\{\{([^}]+)\}\}', replace_double_brace, text)
-        
-        def replace_single_brace(match):
-            placeholder = match.group(1).strip()
-            if placeholder in parameters:
-                value = parameters[placeholder]
-                # 如果值为空，使用语言对应的兜底文本
-                if self._is_missing_text(value):
-                    return self._missing_text()
-                return str(value)
-            return match.group(0)
-        
-        text = re.sub(r'\{([^}]+)\}', replace_single_brace, text)
-        
-        return text
+        return TEXT_PLACEHOLDERS.substitute(text, lambda key: self._resolve_placeholder(key, parameters))
 
 
 class ExcelTemplateFiller(TemplateFillerStrategy):
     """Excel模板填充策略"""
 
+    def __init__(self, engine: str = XLSX_ENGINE_OPENPYXL) -> None:
+        super().__init__()
+        if engine not in (XLSX_ENGINE_OPENPYXL, XLSX_ENGINE_PATCH):
+            raise ValueError(f"不支持的 Excel 填充引擎: {engine}")
+        self.engine = engine
+
+    def _fill_active_sheet(self, template_path: Path, output_path, fill: Callable[[Any], None]) -> None:
+        """
+        在模板的活动工作表上执行 fill 并保存
+
+        engine 为 patch 时直接修补工作表 XML；模板结构或 fill 中的操作不受支持时，
+        改用 openpyxl 重新执行 fill（修补引擎在生成全部内容后才写入输出，不会留下残缺文件）。
+        """
+        if self.engine == XLSX_ENGINE_PATCH and settings.template_xlsx_patch_enabled:
+            try:
+                worksheet = PatchedWorksheet(template_cache.xlsx_patch_template(template_path))
+                fill(worksheet)
+                with span("save"):
+                    worksheet.save(output_path)
+                return
+            except UnsupportedPatchOperation as e:
+                logger.info("Falling back to openpyxl for %s: %s", Path(template_path).name, e)
+
+        workbook = template_cache.load_workbook(template_path)
+        fill(workbook.active)
+        self._save_workbook(workbook, template_path, output_path)
+
     def fill_template(self, template_path: Path, parameters: Dict[str, Any], output_path: Path, language: Optional[str] = None) -> bool:
         try:
             # 设置语言
             self._set_language(language)
 
-            workbook = load_workbook(template_path)
-            for sheet_name in workbook.sheetnames:
-                worksheet = workbook[sheet_name]
-                for row in worksheet.iter_rows():
-                    for cell in row:
-                        if cell.value and isinstance(cell.value, str):
-                            cell.value = self._replace_placeholders(cell.value, parameters)
-            workbook.save(output_path)
+            workbook = template_cache.load_workbook(template_path)
+            index = template_cache.placeholder_index(template_path)
+            for worksheet in workbook.worksheets:
+                self._replace_indexed_placeholders(worksheet, index, parameters)
+            self._save_workbook(workbook, template_path, output_path)
             return True
         except Exception as e:
             print(f"Excel模板填充失败: {str(e)}")
             return False
 
+    def _merged_cells(self, worksheet) -> MergedCellIndex:
+        """工作表的合并区域索引；合并 / 取消合并应通过索引执行，保持索引同步"""
+        return merged_cell_index(worksheet)
+
+    def _get_merged_cell_top_left(self, worksheet, row: int, col: int):
+        """
+        获取合并单元格的左上角单元格
+        如果单元格不是合并单元格，返回该单元格本身
+        """
+        return self._merged_cells(worksheet).top_left(row, col)
+
+    def _replace_indexed_placeholders(
+        self,
+        worksheet,
+        index: WorkbookPlaceholderIndex,
+        parameters: Dict[str, Any],
+    ) -> List[Any]:
+        """
+        替换工作表中的占位符，返回值被修改的单元格
+
+        只处理占位符索引记录的单元格；填充步骤改写过的单元格按当前内容重新替换。
+        填充过程中插入/删除了行列（索引坐标可能已失效）时，退回逐单元格扫描。
+        """
+        sheet = index.sheet(worksheet.title)
+        if sheet is None or (worksheet.max_row, worksheet.max_column) != (sheet.max_row, sheet.max_column):
+            return self._replace_all_placeholders(worksheet, parameters)
+
+        changed = []
+        for entry in sheet.cells:
+            # 直接取已存在的单元格，避免 worksheet.cell() 创建新单元格
+            cell = worksheet._cells.get((entry.row, entry.column))
+            if cell is None or not cell.value or not isinstance(cell.value, str):
+                continue
+            original_value = cell.value
+            if original_value == entry.text:
+                new_value = render_fragments(entry.fragments, lambda key: self._resolve_placeholder(key, parameters))
+            else:
+                new_value = self._replace_placeholders(original_value, parameters)
+            if new_value != original_value:
+                cell.value = new_value
+                changed.append(cell)
+        return changed
+
+    def _replace_all_placeholders(self, worksheet, parameters: Dict[str, Any]) -> List[Any]:
+        """逐单元格扫描替换占位符，返回值被修改的单元格"""
+        changed = []
+        for row in worksheet.iter_rows():
+            for cell in row:
+                if cell.value and isinstance(cell.value, str):
+                    original_value = cell.value
+                    new_value = self._replace_placeholders(original_value, parameters)
+                    if new_value != original_value:
+                        cell.value = new_value
+                        changed.append(cell)
+        return changed
+
 
 class WordTemplateFiller(TemplateFillerStrategy):
     """Word模板填充策略"""
@@ -114,7 +223,7 @@ class WordTemplateFiller(TemplateFillerStrategy):
             # 设置语言
             self._set_language(language)
 
-            doc = Document(template_path)
+            doc = template_cache.load_document(template_path)
             for paragraph in doc.paragraphs:
                 if paragraph.text:
                     paragraph.text = self._replace_placeholders(paragraph.text, parameters)
@@ -132,7 +241,7 @@ class WordTemplateFiller(TemplateFillerStrategy):
                     for paragraph in section.footer.paragraphs:
                         if paragraph.text:
                             paragraph.text = self._replace_placeholders(paragraph.text, parameters)
-            doc.save(output_path)
+            self._save_document(doc, template_path, output_path)
             return True
         except Exception as e:
             print(f"Word模板填充失败: {str(e)}")
@@ -0,0 +1,125 @@
+"""单元格文本折行与行高估算
+
+Excel 填充器按文本长度估算需要的行高：每行可容纳的字符数按列宽 × 1.7 估算，
+原先各填充器各自实现一遍，且逐字符计数时不区分全角 / 半角（中文字符与英文字符同宽），
+每次调用还要重新查列宽。本模块统一：
+- 字宽：东亚全角字符（中日韩文字、全角标点等）计 2 个单位，其余计 1 个单位；
+  全角字符集在首次使用时由 unicodedata 预先计算为一个正则字符类，按整行统计
+- 折行：每行容量 = int(列宽 × 1.7) 个单位，空行计 1 行
+- 列宽：按工作表缓存（填充过程中不修改列宽）；合并单元格按合并区域的总列宽计算
+"""
+
+import math
+import re
+import threading
+import unicodedata
+import weakref
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Pattern, Sequence, Tuple
+
+from openpyxl.utils import get_column_letter
+
+from src.infrastructure.merged_cells import merged_cell_index
+
+# 每个列宽单位可容纳的半角字符数（经验值）
+CHARS_PER_WIDTH = 1.7
+WIDE_GLYPH_UNITS = 2
+
+# BMP 之外整段为全角的区间：表情符号、CJK 扩展 B 及以后
+_WIDE_SUPPLEMENTARY_RANGES = ((0x1F300, 0x1F64F), (0x1F900, 0x1F9FF), (0x20000, 0x3FFFD))
+
+
+@lru_cache(maxsize=None)
+def _wide_pattern() -> Pattern[str]:
+    """全角字符的正则字符类（由 East Asian Width 为 W / F 的码位预先计算）"""
+    ranges: List[Tuple[int, int]] = []
+    for code in range(0x1100, 0x10000):
+        if unicodedata.east_asian_width(chr(code)) in ("W", "F"):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1] = (ranges[-1][0], code)
+            else:
+                ranges.append((code, code))
+    ranges.extend(_WIDE_SUPPLEMENTARY_RANGES)
+    char_class = "".join(
+        re.escape(chr(start)) if start == end else f"{re.escape(chr(start))}-{re.escape(chr(end))}"
+        for start, end in ranges
+    )
+    return re.compile(f"[{char_class}]")
+
+
+def glyph_units(text: str) -> int:
+    """文本的显示宽度（半角 1，全角 2）"""
+    if text.isascii():
+        return len(text)
+    wide = len(text) - len(_wide_pattern().sub("", text))
+    return len(text) + wide * (WIDE_GLYPH_UNITS - 1)
+
+
+def line_widths(text: str) -> Tuple[int, ...]:
+    """文本各行（按 \\n 分割）的显示宽度"""
+    return tuple(glyph_units(line) for line in text.split("\n")) if text else ()
+
+
+def line_capacity(column_width: float) -> int:
+    """列宽（Excel 字符单位）对应的每行容量（显示宽度），至少为 1"""
+    return max(1, int(column_width * CHARS_PER_WIDTH))
+
+
+def wrapped_line_count(widths: Sequence[int], capacity: int) -> int:
+    """各行按容量折行后的总行数（空行计 1 行，至少 1 行）"""
+    total = 0
+    for width in widths:
+        total += max(1, math.ceil(width / capacity)) if width else 1
+    return total or 1
+
+
+def count_lines(text: str, column_width: float) -> int:
+    """文本在指定列宽内折行后的行数；空文本计 1 行"""
+    return wrapped_line_count(line_widths(text), line_capacity(column_width)) if text else 1
+
+
+def column_line_counts(texts: Iterable[str], column_width: float) -> List[int]:
+    """同一列（同一宽度）的一批文本各自折行后的行数"""
+    capacity = line_capacity(column_width)
+    return [wrapped_line_count(line_widths(text), capacity) if text else 1 for text in texts]
+
+
+class SheetTextMetrics:
+    """工作表的列宽缓存"""
+
+    def __init__(self, worksheet: Any):
+        self.worksheet = worksheet
+        self._widths: Dict[int, float] = {}
+
+    def column_width(self, column: int, default: float) -> float:
+        """列宽；未设置（None / 0）时返回 default"""
+        if column not in self._widths:
+            self._widths[column] = self.worksheet.column_dimensions[get_column_letter(column)].width or 0
+        return self._widths[column] or default
+
+    def column_widths(self, min_col: int, max_col: int, default: float) -> List[float]:
+        return [self.column_width(column, default) for column in range(min_col, max_col + 1)]
+
+    def span_width(self, min_col: int, max_col: int, default: float) -> float:
+        """min_col～max_col 各列宽之和（未设置的列按 default 计）"""
+        return sum(self.column_widths(min_col, max_col, default))
+
+    def cell_width(self, row: int, column: int, default: float) -> float:
+        """单元格的显示宽度：位于合并区域内时为合并区域的总列宽"""
+        cell_range = merged_cell_index(self.worksheet).find(row, column)
+        if cell_range is None:
+            return self.column_width(column, default)
+        return self.span_width(cell_range.min_col, cell_range.max_col, default)
+
+
+_metrics: "weakref.WeakKeyDictionary[Any, SheetTextMetrics]" = weakref.WeakKeyDictionary()
+_metrics_lock = threading.Lock()
+
+
+def sheet_text_metrics(worksheet: Any) -> SheetTextMetrics:
+    """获取工作表的列宽缓存（按工作表对象缓存）"""
+    with _metrics_lock:
+        metrics = _metrics.get(worksheet)
+        if metrics is None:
+            metrics = _metrics[worksheet] = SheetTextMetrics(worksheet)
+        return metrics
@@ -0,0 +1,80 @@
+"""工作表行布局：一次性在多个位置插入空行
+
+openpyxl 的 insert_rows 每次调用都会先把插入位置以下的整个矩形区域实例化为单元格，
+再逐个移动；合并区域与行高不随之移动，调用方只能先保存表尾内容、插入后再逐格恢复。
+本模块按各插入位置的累计偏移量，自下而上一次移动全部受影响的单元格、合并区域与行高。
+与 insert_rows 相同，公式、图片、数据验证与条件格式不做调整。
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Tuple
+
+from src.infrastructure.merged_cells import merged_cell_index
+
+
+def insert_row_blocks(worksheet: Any, insertions: Iterable[Tuple[int, int]]) -> None:
+    """
+    在多个位置插入空行（行号均为插入前的行号）
+
+    效果等同于自下而上依次调用 worksheet.insert_rows(row, amount)，另外：
+    - 合并区域随所在行移动；跨越插入位置的合并区域向下扩展
+    - 行高随所在行移动；新插入的行沿用插入位置上一行的行高（同 Excel 插入行）
+
+    Args:
+        worksheet: 工作表对象
+        insertions: [(插入位置行号, 插入行数), ...]，行数不大于 0 的项被忽略
+    """
+    amounts: Dict[int, int] = {}
+    for row, amount in insertions:
+        if amount > 0:
+            amounts[row] = amounts.get(row, 0) + amount
+    if not amounts:
+        return
+
+    points = sorted(amounts)
+    # offsets[k]：行号不小于 points[k-1] 的行的累计偏移量
+    offsets = [0]
+    for point in points:
+        offsets.append(offsets[-1] + amounts[point])
+
+    def offset(row: int) -> int:
+        return offsets[bisect_right(points, row)]
+
+    first = points[0]
+
+    # 单元格：自下而上移动，目标位置上的单元格总是已经移走
+    for row, column in sorted((key for key in worksheet._cells if key[0] >= first), reverse=True):
+        worksheet._move_cell(row, column, offset(row), 0)
+
+    # 合并区域：先从集合中移除再修改边界（集合按边界计算哈希）
+    moved: List[Any] = []
+    for cell_range in list(worksheet.merged_cells.ranges):
+        if cell_range.max_row >= first:
+            worksheet.merged_cells.ranges.remove(cell_range)
+            moved.append(cell_range)
+    for cell_range in moved:
+        spans_insertion = offset(cell_range.min_row) != offset(cell_range.max_row)
+        cell_range.min_row, cell_range.max_row = (
+            cell_range.min_row + offset(cell_range.min_row),
+            cell_range.max_row + offset(cell_range.max_row),
+        )
+        worksheet.merged_cells.ranges.add(cell_range)
+        if spans_insertion and hasattr(cell_range, "format"):
+            # 扩展出的行补齐 MergedCell
+            cell_range.format()
+    merged_cell_index(worksheet).rebuild()
+
+    # 行高：自下而上移动行维度，新插入的行复制插入位置上一行的行高
+    row_dimensions = worksheet.row_dimensions
+    for row in sorted((r for r in row_dimensions if r >= first), reverse=True):
+        dimension = row_dimensions.pop(row)
+        dimension.index = row + offset(row)
+        row_dimensions[dimension.index] = dimension
+    for point in points:
+        above = point - 1 + offset(point - 1)
+        height = row_dimensions[above].height if above in row_dimensions else None
+        if not height:
+            continue
+        start = above + 1
+        for row in range(start, start + amounts[point]):
+            row_dimensions[row].height = height
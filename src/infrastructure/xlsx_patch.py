@@ -0,0 +1,611 @@
+"""Excel 工作表 XML 直接修补引擎
+
+PTF INDEX、标签仕样书、包装设计仕样书、使用说明书仕样书等填充器只是在固定的一批单元格中
+写入文本并设置背景色/自动换行，却要为此让 openpyxl 克隆整个工作簿、重新生成全部工作表与
+样式表（保存占渲染耗时的九成左右）。
+
+本引擎为这类模板提供一个与 openpyxl 工作表接口兼容的子集（PatchedWorksheet）：
+- 读取：单元格值、合并区域、样式来自模板首次使用时 openpyxl 的解析结果（随模板缓存复用），
+  与 openpyxl 路径读取到的内容完全一致
+- 写入：只记录被修改的单元格；保存时把这些单元格的 <c> 元素拼接进活动工作表的原始 XML，
+  新增的填充/单元格格式追加到 styles.xml 的 <fills>/<cellXfs> 末尾，
+  其余条目（sharedStrings、绘图、图片等）直接复制模板压缩包中的压缩数据
+写入的字符串使用内联字符串（t="inlineStr"），sharedStrings.xml 保持不变。
+
+插入/删除行列、公式、字体/边框等未建模的操作，以及结构不符合预期的模板，
+统一抛出 UnsupportedPatchOperation，由调用方改用 openpyxl 重新执行整个填充过程。
+"""
+
+import copy
+import math
+import posixpath
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from lxml import etree
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE, MergedCell
+from openpyxl.styles import Alignment, PatternFill
+from openpyxl.styles.proxy import StyleProxy
+from openpyxl.utils.cell import coordinate_to_tuple, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.xml.functions import tostring
+
+from src.infrastructure.package_writer import OutputTarget, PassthroughZipFile, TemplateArchive
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+_OFFICE_DOCUMENT = _REL_NS + "/officeDocument"
+_STYLES = _REL_NS + "/styles"
+
+_SHEET_DATA_OPEN = re.compile(rb"<sheetData\b[^>]*?(/?)>")
+_SHEET_DATA_CLOSE = b"</sheetData>"
+# sheetData 中的行与单元格（单元格内容中的 "<" 均已转义，不会出现嵌套的 </c>）
+_TOKEN = re.compile(rb"<row\b([^>]*?)(/?)>|</row>|<c\b([^>]*?)(?:/>|>(.*?)</c>)", re.S)
+_ATTR = re.compile(rb"""([\w:]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_FORMULA = re.compile(rb"<f\b")
+
+# Excel 单元格文本长度上限（与 openpyxl 一致）
+_MAX_STRING_LENGTH = 32767
+
+
+class UnsupportedPatchOperation(Exception):
+    """修补引擎不支持的模板结构或操作（调用方应改用 openpyxl）"""
+
+
+def _attrs(raw: bytes) -> List[Tuple[bytes, bytes]]:
+    return [(m.group(1), m.group(2) if m.group(2) is not None else m.group(3)) for m in _ATTR.finditer(raw)]
+
+
+@dataclass(frozen=True)
+class _RawCell:
+    """模板工作表 XML 中的一个 <c> 元素"""
+    start: int
+    end: int
+    attrs: Tuple[Tuple[bytes, bytes], ...]
+    content: Optional[bytes]
+    style: int
+    has_formula: bool
+
+    def with_style(self, style: int) -> bytes:
+        """仅替换样式索引，保留原有内容"""
+        attrs = [(k, v) for k, v in self.attrs if k != b"s"]
+        if style:
+            attrs.insert(1, (b"s", str(style).encode()))
+        head = b"<c" + b"".join(b' %s="%s"' % (k, v) for k, v in attrs)
+        if self.content is None:
+            return head + b"/>"
+        return head + b">" + self.content + b"</c>"
+
+
+@dataclass(frozen=True)
+class _RawRow:
+    """模板工作表 XML 中的一个 <row> 元素；cells 为 (列号, 起始位置)，按列号递增"""
+    start: int
+    open_end: int
+    close_start: int
+    end: int
+    self_closing: bool
+    cells: Tuple[Tuple[int, int], ...]
+
+
+class XlsxPatchTemplate:
+    """
+    修补引擎使用的模板解析结果（建立后只读，随模板缓存复用）
+
+    模板结构不受支持时 unsupported 记录原因（同样缓存，避免每次请求重复解析）。
+    """
+
+    def __init__(self, archive: TemplateArchive, workbook: Any):
+        self.archive = archive
+        self.unsupported: Optional[str] = None
+        try:
+            self._load(archive, workbook)
+        except UnsupportedPatchOperation as e:
+            self.unsupported = str(e)
+
+    def _load(self, archive: TemplateArchive, workbook: Any) -> None:
+        if archive.skipped:
+            raise UnsupportedPatchOperation(f"archive entries cannot be copied: {archive.skipped}")
+
+        # 读取模型：与 openpyxl 路径看到的活动工作表一致
+        worksheet = workbook.active
+        self.title: str = worksheet.title
+        self.max_row: int = worksheet.max_row
+        self.max_column: int = worksheet.max_column
+        self.merged_ranges: List[CellRange] = [CellRange(rng.coord) for rng in worksheet.merged_cells.ranges]
+        self.merged_slaves: Set[Tuple[int, int]] = set()
+        self.values: Dict[Tuple[int, int], Any] = {}
+        self.alignments: Dict[Tuple[int, int], Alignment] = {}
+        self.fills: Dict[Tuple[int, int], Any] = {}
+        self.default_alignment = workbook._alignments[0]
+        self.default_fill = workbook._fills[0]
+        for key, cell in worksheet._cells.items():
+            if isinstance(cell, MergedCell):
+                self.merged_slaves.add(key)
+                continue
+            self.values[key] = cell.value
+            if cell.has_style:
+                self.alignments[key] = workbook._alignments[cell._style.alignmentId]
+                self.fills[key] = workbook._fills[cell._style.fillId]
+
+        workbook_member = _office_document(archive)
+        sheet_member = None
+        styles_member = None
+        root = _parse(archive, workbook_member)
+        rels = _relationships(archive, workbook_member)
+        for sheet in root.iter(f"{{{_MAIN_NS}}}sheet"):
+            if sheet.get("name") == self.title:
+                sheet_member = rels.get(sheet.get(f"{{{_REL_NS}}}id"), (None, None))[1]
+        for rel_type, target in rels.values():
+            if rel_type == _STYLES:
+                styles_member = target
+        if sheet_member not in archive.names or styles_member not in archive.names:
+            raise UnsupportedPatchOperation("active sheet or styles part not found")
+        self.sheet_member: str = sheet_member
+        self.styles_member: str = styles_member
+        self._load_sheet(archive.read(sheet_member))
+        self._load_styles(archive.read(styles_member))
+
+    def _load_sheet(self, data: bytes) -> None:
+        if etree.fromstring(data).nsmap.get(None) != _MAIN_NS:
+            raise UnsupportedPatchOperation("worksheet does not use the default SpreadsheetML namespace")
+        opening = _SHEET_DATA_OPEN.search(data)
+        if opening is None or opening.group(1):
+            raise UnsupportedPatchOperation("worksheet has no sheetData content")
+        close = data.find(_SHEET_DATA_CLOSE, opening.end())
+
+        self.sheet_xml = data
+        self.sheet_data_end = close
+        self.rows: Dict[int, _RawRow] = {}
+        self.cells: Dict[Tuple[int, int], _RawCell] = {}
+        row_number = None
+        last_row = 0
+        row_start = row_open_end = 0
+        row_cells: List[Tuple[int, int]] = []
+        for token in _TOKEN.finditer(data, opening.end(), close):
+            if token.group(0).startswith(b"<row"):
+                attrs = dict(_attrs(token.group(1)))
+                if b"r" not in attrs:
+                    raise UnsupportedPatchOperation("row without r attribute")
+                number = int(attrs[b"r"])
+                if number <= last_row:
+                    raise UnsupportedPatchOperation("rows are not in ascending order")
+                last_row = number
+                if token.group(2):
+                    self.rows[number] = _RawRow(token.start(), token.end(), token.start(), token.end(), True, ())
+                else:
+                    row_number, row_start, row_open_end, row_cells = number, token.start(), token.end(), []
+            elif token.group(0) == b"</row>":
+                self.rows[row_number] = _RawRow(row_start, row_open_end, token.start(), token.end(), False, tuple(row_cells))
+                row_number = None
+            else:
+                attrs = tuple(_attrs(token.group(3)))
+                values = dict(attrs)
+                if row_number is None or b"r" not in values:
+                    raise UnsupportedPatchOperation("cell outside a row or without r attribute")
+                row, column = coordinate_to_tuple(values[b"r"].decode())
+                if row != row_number or (row_cells and column <= row_cells[-1][0]):
+                    raise UnsupportedPatchOperation("cells are not in document order")
+                content = token.group(4)
+                self.cells[(row, column)] = _RawCell(
+                    token.start(),
+                    token.end(),
+                    attrs,
+                    content,
+                    int(values.get(b"s", b"0")),
+                    bool(content and _FORMULA.search(content)),
+                )
+                row_cells.append((column, token.start()))
+        self.row_numbers: List[int] = sorted(self.rows)
+
+    def _load_styles(self, data: bytes) -> None:
+        root = etree.fromstring(data)
+        if root.nsmap.get(None) != _MAIN_NS:
+            raise UnsupportedPatchOperation("styles part does not use the default SpreadsheetML namespace")
+        fills = root.find(f"{{{_MAIN_NS}}}fills")
+        cell_xfs = root.find(f"{{{_MAIN_NS}}}cellXfs")
+        if fills is None or cell_xfs is None:
+            raise UnsupportedPatchOperation("styles part has no fills or cellXfs")
+        self.fill_count = len(fills.findall(f"{{{_MAIN_NS}}}fill"))
+        self.xf_elements = cell_xfs.findall(f"{{{_MAIN_NS}}}xf")
+
+        self.styles_xml = data
+        self.fills_span = _element_span(data, b"fills")
+        self.cell_xfs_span = _element_span(data, b"cellXfs")
+        if self.fills_span[2] > self.cell_xfs_span[0]:
+            raise UnsupportedPatchOperation("unexpected styles part layout")
+
+    def estimated_size(self) -> int:
+        """估算内存占用（字节），用于模板缓存的内存预算"""
+        if self.unsupported:
+            return 1024
+        return (
+            len(self.sheet_xml)
+            + len(self.styles_xml) * 4
+            + 256 * (len(self.values) + len(self.cells))
+            + 64 * len(self.merged_slaves)
+        )
+
+
+def _element_span(data: bytes, name: bytes) -> Tuple[int, int, int]:
+    """元素开始标签的 (起始, 结束) 位置与结束标签的起始位置"""
+    opening = re.search(rb"<%s\b[^>]*?(/?)>" % name, data)
+    if opening is None or opening.group(1):
+        raise UnsupportedPatchOperation(f"styles part has no {name.decode()} content")
+    close = data.find(b"</%s>" % name, opening.end())
+    if close < 0:
+        raise UnsupportedPatchOperation(f"unterminated {name.decode()}")
+    return opening.start(), opening.end(), close
+
+
+def _parse(archive: TemplateArchive, member: str):
+    return etree.fromstring(archive.read(member))
+
+
+def _relationships(archive: TemplateArchive, member: str) -> Dict[str, Tuple[str, str]]:
+    """部件的关系：Id -> (类型, 目标条目名称)"""
+    folder, name = posixpath.split(member)
+    rels_member = posixpath.join(folder, "_rels", name + ".rels")
+    if rels_member not in archive.names:
+        return {}
+    rels = {}
+    for rel in _parse(archive, rels_member).iter(f"{{{_PKG_REL_NS}}}Relationship"):
+        if rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        target = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get("Id")] = (rel.get("Type"), target)
+    return rels
+
+
+def _office_document(archive: TemplateArchive) -> str:
+    for rel_type, target in _relationships(archive, "").values():
+        if rel_type == _OFFICE_DOCUMENT:
+            return target
+    raise UnsupportedPatchOperation("package has no office document")
+
+
+class PatchedCell:
+    """修补引擎中的单元格（openpyxl Cell 接口的子集：value / fill / alignment）"""
+
+    __slots__ = ("parent", "row", "column", "_value", "_value_set", "_fill", "_alignment")
+
+    def __init__(self, worksheet: "PatchedWorksheet", row: int, column: int):
+        object.__setattr__(self, "parent", worksheet)
+        object.__setattr__(self, "row", row)
+        object.__setattr__(self, "column", column)
+        object.__setattr__(self, "_value", None)
+        object.__setattr__(self, "_value_set", False)
+        object.__setattr__(self, "_fill", None)
+        object.__setattr__(self, "_alignment", None)
+
+    def __repr__(self) -> str:
+        return f"<PatchedCell {self.parent.title!r}.{self.coordinate}>"
+
+    def __getattr__(self, name: str):
+        raise UnsupportedPatchOperation(f"cell.{name} is not supported")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in ("value", "fill", "alignment"):
+            raise UnsupportedPatchOperation(f"setting cell.{name} is not supported")
+        object.__setattr__(self, name, value)
+
+    @property
+    def coordinate(self) -> str:
+        return f"{get_column_letter(self.column)}{self.row}"
+
+    @property
+    def column_letter(self) -> str:
+        return get_column_letter(self.column)
+
+    @property
+    def value(self) -> Any:
+        if self._value_set:
+            return self._value
+        return self.parent._template.values.get((self.row, self.column))
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        object.__setattr__(self, "_value", _check_value(value))
+        object.__setattr__(self, "_value_set", True)
+
+    @property
+    def fill(self) -> StyleProxy:
+        return StyleProxy(self._fill if self._fill is not None else self._template_fill())
+
+    @fill.setter
+    def fill(self, fill: Any) -> None:
+        if not isinstance(fill, PatternFill):
+            raise UnsupportedPatchOperation(f"{type(fill).__name__} is not supported")
+        object.__setattr__(self, "_fill", fill)
+
+    @property
+    def alignment(self) -> StyleProxy:
+        return StyleProxy(self._alignment if self._alignment is not None else self._template_alignment())
+
+    @alignment.setter
+    def alignment(self, alignment: Any) -> None:
+        if isinstance(alignment, StyleProxy):
+            alignment = copy.copy(alignment)
+        if not isinstance(alignment, Alignment):
+            raise UnsupportedPatchOperation(f"{type(alignment).__name__} is not an Alignment")
+        object.__setattr__(self, "_alignment", alignment)
+
+    def _template_fill(self):
+        return self.parent._template.fills.get((self.row, self.column), self.parent._template.default_fill)
+
+    def _template_alignment(self) -> Alignment:
+        return self.parent._template.alignments.get((self.row, self.column), self.parent._template.default_alignment)
+
+    def _changed_fill(self) -> Optional[PatternFill]:
+        if self._fill is None or self._fill == self._template_fill():
+            return None
+        return self._fill
+
+    def _changed_alignment(self) -> Optional[Alignment]:
+        if self._alignment is None or self._alignment == self._template_alignment():
+            return None
+        return self._alignment
+
+
+def _check_value(value: Any) -> Any:
+    """按 openpyxl 的规则检查写入的值；openpyxl 会另作处理的值交给 openpyxl"""
+    if value is None or isinstance(value, bool) or isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise UnsupportedPatchOperation("non-finite number")
+        return value
+    if isinstance(value, str):
+        value = value[:_MAX_STRING_LENGTH]
+        # 非法字符（openpyxl 抛出 IllegalCharacterError）与公式
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise UnsupportedPatchOperation("illegal characters in cell value")
+        if len(value) > 1 and value.startswith("="):
+            raise UnsupportedPatchOperation("formula values are not supported")
+        return value
+    raise UnsupportedPatchOperation(f"{type(value).__name__} values are not supported")
+
+
+def _cell_xml(coordinate: str, style: int, value: Any) -> bytes:
+    attrs = f' r="{coordinate}"' + (f' s="{style}"' if style else "")
+    if value is None:
+        return f"<c{attrs}/>".encode()
+    if isinstance(value, bool):
+        return f'<c{attrs} t="b"><v>{int(value)}</v></c>'.encode()
+    if isinstance(value, (int, float)):
+        return f"<c{attrs}><v>{value!r}</v></c>".encode()
+    return f'<c{attrs} t="inlineStr"><is><t xml:space="preserve">{escape(value)}</t></is></c>'.encode("utf-8")
+
+
+class _MergedCells:
+    """worksheet.merged_cells 的只读替代（提供 ranges 与坐标包含判断）"""
+
+    def __init__(self, ranges: List[CellRange]):
+        self.ranges = ranges
+
+    def __contains__(self, coordinate: str) -> bool:
+        row, column = coordinate_to_tuple(coordinate)
+        return any(rng.min_row <= row <= rng.max_row and rng.min_col <= column <= rng.max_col for rng in self.ranges)
+
+
+class _ExistingCells:
+    """worksheet._cells 的只读替代：只返回模板中已存在或已访问过的单元格"""
+
+    def __init__(self, worksheet: "PatchedWorksheet"):
+        self._worksheet = worksheet
+
+    def get(self, key: Tuple[int, int], default: Any = None) -> Any:
+        worksheet = self._worksheet
+        if key in worksheet._template.values or key in worksheet._template.merged_slaves or key in worksheet._patched:
+            return worksheet._get_cell(*key)
+        return default
+
+
+class _StyleBuilder:
+    """为修改过样式的单元格生成新的 <fill>/<xf>（同一请求内去重）"""
+
+    def __init__(self, template: XlsxPatchTemplate):
+        self._template = template
+        self.fills: List[bytes] = []
+        self._fill_ids: Dict[bytes, int] = {}
+        self.xfs: List[bytes] = []
+        self._xf_ids: Dict[Tuple[int, Optional[bytes], Optional[bytes]], int] = {}
+
+    def xf_for(self, base: int, fill: Optional[PatternFill], alignment: Optional[Alignment]) -> int:
+        if fill is None and alignment is None:
+            return base
+        if base >= len(self._template.xf_elements):
+            raise UnsupportedPatchOperation(f"cell style {base} not found")
+        fill_xml = tostring(fill.to_tree()) if fill is not None else None
+        alignment_tree = alignment.to_tree() if alignment is not None else None
+        alignment_xml = tostring(alignment_tree) if alignment_tree is not None else None
+        key = (base, fill_xml, alignment_xml)
+        xf_id = self._xf_ids.get(key)
+        if xf_id is not None:
+            return xf_id
+
+        xf = copy.deepcopy(self._template.xf_elements[base])
+        if fill_xml is not None:
+            xf.set("fillId", str(self._fill_id(fill_xml)))
+            xf.set("applyFill", "1")
+        if alignment is not None:
+            for existing in xf.findall(f"{{{_MAIN_NS}}}alignment"):
+                xf.remove(existing)
+            if alignment_tree is not None:
+                alignment_tree.tag = f"{{{_MAIN_NS}}}alignment"
+                xf.insert(0, alignment_tree)
+            xf.set("applyAlignment", "1")
+        self.xfs.append(_element_xml(xf))
+        xf_id = self._xf_ids[key] = len(self._template.xf_elements) + len(self.xfs) - 1
+        return xf_id
+
+    def _fill_id(self, fill_xml: bytes) -> int:
+        fill_id = self._fill_ids.get(fill_xml)
+        if fill_id is None:
+            self.fills.append(fill_xml)
+            fill_id = self._fill_ids[fill_xml] = self._template.fill_count + len(self.fills) - 1
+        return fill_id
+
+    def styles_xml(self) -> Optional[bytes]:
+        """追加了新样式的 styles.xml；没有新样式时返回 None"""
+        if not self.xfs:
+            return None
+        template = self._template
+        data = template.styles_xml
+        fills_start, fills_open_end, fills_close = template.fills_span
+        xfs_start, xfs_open_end, xfs_close = template.cell_xfs_span
+        return b"".join((
+            data[:fills_start],
+            b'<fills count="%d">' % (template.fill_count + len(self.fills)),
+            data[fills_open_end:fills_close],
+            *self.fills,
+            data[fills_close:xfs_start],
+            b'<cellXfs count="%d">' % (len(template.xf_elements) + len(self.xfs)),
+            data[xfs_open_end:xfs_close],
+            *self.xfs,
+            data[xfs_close:],
+        ))
+
+
+def _element_xml(element) -> bytes:
+    """序列化默认命名空间下的元素（不重复输出根元素上已声明的命名空间）"""
+    name = etree.QName(element)
+    if name.namespace != _MAIN_NS or any(key.startswith("{") for key in element.attrib):
+        raise UnsupportedPatchOperation(f"unsupported markup in cell style: {element.tag}")
+    head = "<" + name.localname + "".join(f" {key}={quoteattr(value)}" for key, value in element.attrib.items())
+    children = [_element_xml(child) for child in element if isinstance(child.tag, str)]
+    if not children:
+        return (head + "/>").encode("utf-8")
+    return (head + ">").encode("utf-8") + b"".join(children) + f"</{name.localname}>".encode()
+
+
+class PatchedWorksheet:
+    """
+    模板活动工作表的修补视图（openpyxl Worksheet 接口的子集）
+
+    支持 cell() / ws["A1"] / iter_rows() / merged_cells / max_row / max_column；
+    其余属性与操作抛出 UnsupportedPatchOperation。
+    """
+
+    def __init__(self, template: XlsxPatchTemplate):
+        if template.unsupported:
+            raise UnsupportedPatchOperation(template.unsupported)
+        self._template = template
+        self._patched: Dict[Tuple[int, int], PatchedCell] = {}
+        self.title = template.title
+        self.max_row = template.max_row
+        self.max_column = template.max_column
+        self.merged_cells = _MergedCells(template.merged_ranges)
+        self._cells = _ExistingCells(self)
+
+    def __getattr__(self, name: str):
+        raise UnsupportedPatchOperation(f"worksheet.{name} is not supported")
+
+    def __repr__(self) -> str:
+        return f"<PatchedWorksheet {self.title!r}>"
+
+    def __getitem__(self, key: str):
+        if not isinstance(key, str) or ":" in key:
+            raise UnsupportedPatchOperation(f"worksheet[{key!r}] is not supported")
+        return self._get_cell(*coordinate_to_tuple(key))
+
+    def cell(self, row: int, column: int, value: Any = None):
+        if row < 1 or column < 1:
+            raise ValueError("Row or column values must be at least 1")
+        cell = self._get_cell(row, column)
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def iter_rows(self, *args: Any, **kwargs: Any) -> Iterator[Tuple[Any, ...]]:
+        if args or kwargs:
+            raise UnsupportedPatchOperation("iter_rows with bounds is not supported")
+        for row in range(1, self.max_row + 1):
+            yield tuple(self._get_cell(row, column) for column in range(1, self.max_column + 1))
+
+    def _get_cell(self, row: int, column: int):
+        if (row, column) in self._template.merged_slaves:
+            return MergedCell(self, row, column)
+        cell = self._patched.get((row, column))
+        if cell is None:
+            cell = self._patched[(row, column)] = PatchedCell(self, row, column)
+            # 与 openpyxl 一致：访问单元格即扩展工作表范围
+            self.max_row = max(self.max_row, row)
+            self.max_column = max(self.max_column, column)
+        return cell
+
+    def save(self, output: OutputTarget) -> None:
+        """写出修补后的工作簿（先生成全部修补内容，再开始写入输出）"""
+        template = self._template
+        styles = _StyleBuilder(template)
+        sheet_xml = self._patched_sheet_xml(styles)
+        styles_xml = styles.styles_xml()
+
+        archive = template.archive
+        with PassthroughZipFile(output, archive) as zip_file:
+            for name in archive.names:
+                if name == template.sheet_member:
+                    zip_file.writestr(name, sheet_xml)
+                elif name == template.styles_member and styles_xml is not None:
+                    zip_file.writestr(name, styles_xml)
+                else:
+                    zip_file.write_template_entry(name, archive.entry(name))
+
+    def _patched_sheet_xml(self, styles: _StyleBuilder) -> bytes:
+        template = self._template
+        # (起始, 结束, 内容)；同一位置的插入按生成顺序排列，且先于该位置的替换
+        edits: List[Tuple[int, int, bytes]] = []
+        new_cells: Dict[int, List[Tuple[int, bytes]]] = {}
+
+        for (row, column), cell in sorted(self._patched.items()):
+            fill = cell._changed_fill()
+            alignment = cell._changed_alignment()
+            if not cell._value_set and fill is None and alignment is None:
+                continue
+            if row > template.max_row or column > template.max_column:
+                raise UnsupportedPatchOperation(f"{cell.coordinate} is outside the template dimension")
+            raw = template.cells.get((row, column))
+            style = styles.xf_for(raw.style if raw is not None else 0, fill, alignment)
+            if raw is None:
+                new_cells.setdefault(row, []).append((column, _cell_xml(cell.coordinate, style, cell._value)))
+            elif cell._value_set:
+                if raw.has_formula:
+                    raise UnsupportedPatchOperation(f"{cell.coordinate} contains a formula")
+                edits.append((raw.start, raw.end, _cell_xml(cell.coordinate, style, cell._value)))
+            else:
+                edits.append((raw.start, raw.end, raw.with_style(style)))
+
+        for row, cells in new_cells.items():
+            raw_row = template.rows.get(row)
+            if raw_row is None:
+                # 新行插入到下一个已有行之前
+                index = bisect_right(template.row_numbers, row)
+                position = template.rows[template.row_numbers[index]].start if index < len(template.row_numbers) else template.sheet_data_end
+                markup = b'<row r="%d">' % row + b"".join(xml for _, xml in cells) + b"</row>"
+                edits.append((position, position, markup))
+            elif raw_row.self_closing:
+                opening = template.sheet_xml[raw_row.start:raw_row.end].rstrip(b"/>").rstrip()
+                markup = opening + b">" + b"".join(xml for _, xml in cells) + b"</row>"
+                edits.append((raw_row.start, raw_row.end, markup))
+            else:
+                for column, xml in cells:
+                    position = next((start for col, start in raw_row.cells if col > column), raw_row.close_start)
+                    edits.append((position, position, xml))
+
+        data = template.sheet_xml
+        ordered = sorted(
+            ((start, end > start, sequence, end, xml) for sequence, (start, end, xml) in enumerate(edits)),
+        )
+        parts = []
+        position = 0
+        for start, _, _, end, xml in ordered:
+            parts.append(data[position:start])
+            parts.append(xml)
+            position = end
+        parts.append(data[position:])
+        return b"".join(parts)
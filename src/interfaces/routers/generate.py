@@ -1,7 +1,10 @@
-from fastapi import APIRouter
-from typing import Any
+from fastapi import APIRouter, Request, Response
+from typing import Any, Dict, Optional
 
-from src.application.generate_service import generate_document_internal
+from src.application.generate_service import generate_document_async, generate_documents_batch
+from src.config import settings
+from src.infrastructure.metrics import start_trace
+from src.infrastructure.profiling import PROFILE_HEADER, PROFILE_ID_HEADER, request_profile
 from src.interfaces.schemas import (
     DHFIndexParameters, PTFIndexParameters, IndividualTestSpecParameters,
     IndividualTestResultParameters,
@@ -12,110 +15,133 @@ from src.interfaces.schemas import (
     PackagingDesignSpecificationParameters, UserManualSpecificationParameters,
     ProjectPlanParameters
 )
-from src.interfaces.schemas import GenerateDocumentResponse, GenerateDocumentRequest
+from src.interfaces.schemas import GenerateDocumentResponse, GenerateDocumentRequest, GenerateBatchRequest, GenerateBatchResponse
 
 router = APIRouter(prefix="", tags=["generate"])
 
 
+async def _generate(
+    http_request: Request, response: Response, template_name: str, parameters: Dict[str, Any], language: Optional[str]
+) -> GenerateDocumentResponse:
+    """
+    生成单个文档；开启 monitoring.server_timing 时在响应头中返回各阶段耗时。
+    请求头 X-OHC-Profile 与 profiling.admin_token 一致时剖析本次生成，响应头 X-OHC-Profile-Id 返回剖析文件的请求ID。
+    """
+    admin_token = getattr(settings, "profiling_admin_token", None)
+    with start_trace() as trace, request_profile(http_request.headers.get(PROFILE_HEADER), admin_token) as profile_request:
+        result = await generate_document_async(template_name, parameters, language)
+    if settings.metrics_server_timing:
+        response.headers["Server-Timing"] = trace.server_timing()
+    if profile_request is not None and profile_request.artifacts:
+        response.headers[PROFILE_ID_HEADER] = profile_request.request_id
+    return GenerateDocumentResponse(**result)
+
+
 @router.post("/generate", response_model=GenerateDocumentResponse, summary="生成文档", description="生成账票文档（通用接口）")
-async def generate_document(request: GenerateDocumentRequest):
+async def generate_document(request: GenerateDocumentRequest, http_request: Request, response: Response):
     language = request.language or None
-    return GenerateDocumentResponse(**generate_document_internal(request.template_name, request.parameters, language))
+    return await _generate(http_request, response, request.template_name, request.parameters, language)
+
+
+@router.post("/generate/batch", response_model=GenerateBatchResponse, summary="批量生成文档", description="并行生成多个账票文档，返回逐条结果，可选打包为 zip")
+async def generate_batch(request: GenerateBatchRequest):
+    items = [(item.template_name, item.parameters, item.language or None) for item in request.items]
+    return GenerateBatchResponse(**await generate_documents_batch(items, request.include_zip))
 
 
 @router.post("/generate/dhf-index", response_model=GenerateDocumentResponse, summary="生成DHF INDEX", description="生成制作文档・图纸一览")
-async def generate_dhf_index(parameters: DHFIndexParameters):
+async def generate_dhf_index(parameters: DHFIndexParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("DHF_INDEX", params_dict, language))
+    return await _generate(http_request, response, "DHF_INDEX", params_dict, language)
 
 
 @router.post("/generate/ptf-index", response_model=GenerateDocumentResponse, summary="生成PTF INDEX", description="生成PTF INDEX")
-async def generate_ptf_index(parameters: PTFIndexParameters):
+async def generate_ptf_index(parameters: PTFIndexParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("PTF_INDEX", params_dict, language))
+    return await _generate(http_request, response, "PTF_INDEX", params_dict, language)
 
 
 @router.post("/generate/individual-test-spec", response_model=GenerateDocumentResponse, summary="生成个别试验要项书", description="生成个别试验要项书")
-async def generate_individual_test_spec(parameters: IndividualTestSpecParameters):
+async def generate_individual_test_spec(parameters: IndividualTestSpecParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("INDIVIDUAL_TEST_SPEC", params_dict, language))
+    return await _generate(http_request, response, "INDIVIDUAL_TEST_SPEC", params_dict, language)
 
 
 @router.post("/generate/individual-test-result", response_model=GenerateDocumentResponse, summary="生成个别试验结果书", description="生成个别试验结果书")
-async def generate_individual_test_result(parameters: IndividualTestResultParameters):
+async def generate_individual_test_result(parameters: IndividualTestResultParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("INDIVIDUAL_TEST_RESULT", params_dict, language))
+    return await _generate(http_request, response, "INDIVIDUAL_TEST_RESULT", params_dict, language)
 
 
 @router.post("/generate/verification-plan", response_model=GenerateDocumentResponse, summary="生成验证计划书", description="生成ES/PP验证计划书")
-async def generate_verification_plan(parameters: VerificationPlanParameters):
+async def generate_verification_plan(parameters: VerificationPlanParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("VERIFICATION_PLAN", params_dict, language))
+    return await _generate(http_request, response, "VERIFICATION_PLAN", params_dict, language)
 
 
 @router.post("/generate/verification-result", response_model=GenerateDocumentResponse, summary="生成验证结果书", description="生成ES/PP验证结果书")
-async def generate_verification_result(parameters: VerificationResultParameters):
+async def generate_verification_result(parameters: VerificationResultParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("VERIFICATION_RESULT", params_dict, language))
+    return await _generate(http_request, response, "VERIFICATION_RESULT", params_dict, language)
 
 
 @router.post("/generate/basic-specification", response_model=GenerateDocumentResponse, summary="生成基本规格书", description="生成基本规格书")
-async def generate_basic_specification(parameters: BasicSpecificationParameters):
+async def generate_basic_specification(parameters: BasicSpecificationParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("BASIC_SPECIFICATION", params_dict, language))
+    return await _generate(http_request, response, "BASIC_SPECIFICATION", params_dict, language)
 
 
 @router.post("/generate/follow-up-dr-minutes", response_model=GenerateDocumentResponse, summary="生成跟进DR会议记录", description="生成跟进DR会议记录")
-async def generate_follow_up_dr_minutes(parameters: FollowUpDRMinutesParameters):
+async def generate_follow_up_dr_minutes(parameters: FollowUpDRMinutesParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("FOLLOW_UP_DR_MINUTES", params_dict, language))
+    return await _generate(http_request, response, "FOLLOW_UP_DR_MINUTES", params_dict, language)
 
 
 @router.post("/generate/labeling-specification", response_model=GenerateDocumentResponse, summary="生成标签规格书", description="生成标签规格书")
-async def generate_labeling_specification(parameters: LabelingSpecificationParameters):
+async def generate_labeling_specification(parameters: LabelingSpecificationParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("LABELING_SPECIFICATION", params_dict, language))
+    return await _generate(http_request, response, "LABELING_SPECIFICATION", params_dict, language)
 
 
 @router.post("/generate/product-environment-assessment", response_model=GenerateDocumentResponse, summary="生成产品环境评估要项书/结果书", description="生成产品环境评估要项书/结果书")
-async def generate_product_environment_assessment(parameters: ProductEnvironmentAssessmentParameters):
+async def generate_product_environment_assessment(parameters: ProductEnvironmentAssessmentParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("PRODUCT_ENVIRONMENT_ASSESSMENT", params_dict, language))
+    return await _generate(http_request, response, "PRODUCT_ENVIRONMENT_ASSESSMENT", params_dict, language)
 
 
 @router.post("/generate/existing-product-comparison", response_model=GenerateDocumentResponse, summary="生成与现有产品对比表", description="生成与现有产品对比表")
-async def generate_existing_product_comparison(parameters: ExistingProductComparisonParameters):
+async def generate_existing_product_comparison(parameters: ExistingProductComparisonParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("EXISTING_PRODUCT_COMPARISON", params_dict, language))
+    return await _generate(http_request, response, "EXISTING_PRODUCT_COMPARISON", params_dict, language)
 
 
 @router.post("/generate/packaging-design-specification", response_model=GenerateDocumentResponse, summary="生成包装设计仕样书", description="生成包装设计仕样书")
-async def generate_packaging_design_specification(parameters: PackagingDesignSpecificationParameters):
+async def generate_packaging_design_specification(parameters: PackagingDesignSpecificationParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("PACKAGING_DESIGN_SPECIFICATION", params_dict, language))
+    return await _generate(http_request, response, "PACKAGING_DESIGN_SPECIFICATION", params_dict, language)
 
 
 @router.post("/generate/user-manual-specification", response_model=GenerateDocumentResponse, summary="生成使用说明书仕样书", description="生成使用说明书仕样书")
-async def generate_user_manual_specification(parameters: UserManualSpecificationParameters):
+async def generate_user_manual_specification(parameters: UserManualSpecificationParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("USER_MANUAL_SPECIFICATION", params_dict, language))
+    return await _generate(http_request, response, "USER_MANUAL_SPECIFICATION", params_dict, language)
 
 
 @router.post("/generate/project-plan", response_model=GenerateDocumentResponse, summary="生成项目计划书", description="生成项目计划书")
-async def generate_project_plan(parameters: ProjectPlanParameters):
+async def generate_project_plan(parameters: ProjectPlanParameters, http_request: Request, response: Response):
     params_dict = parameters.model_dump()
     language = params_dict.pop("language", None) or None
-    return GenerateDocumentResponse(**generate_document_internal("PROJECT_PLAN", params_dict, language))
+    return await _generate(http_request, response, "PROJECT_PLAN", params_dict, language)
@@ -0,0 +1,74 @@
+import json
+from datetime import datetime
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from src.application import job_service
+from src.infrastructure.job_store import JobRecord
+from src.interfaces.schemas import GenerateDocumentRequest, JobStatusResponse, JobSubmitResponse
+
+router = APIRouter(prefix="", tags=["jobs"])
+
+
+def _to_status_response(record: JobRecord) -> JobStatusResponse:
+    return JobStatusResponse(
+        job_id=record.job_id,
+        template_name=record.template_name,
+        status=record.status,
+        created_at=datetime.fromtimestamp(record.created_at).isoformat(),
+        updated_at=datetime.fromtimestamp(record.updated_at).isoformat(),
+        result=record.result,
+    )
+
+
+def _get_job_or_404(job_id: str) -> JobRecord:
+    record = job_service.get_job(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return record
+
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202, summary="提交生成任务", description="异步生成账票文档，立即返回任务ID")
+async def submit_job(request: GenerateDocumentRequest):
+    language = request.language or None
+    record = job_service.submit_generate_job(request.template_name, request.parameters, language)
+    return JobSubmitResponse(job_id=record.job_id, status=record.status, status_url=f"/jobs/{record.job_id}")
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse, summary="查询任务状态", description="查询异步生成任务的状态与结果")
+async def get_job(job_id: str):
+    return _to_status_response(_get_job_or_404(job_id))
+
+
+@router.get("/jobs/{job_id}/wait", response_model=JobStatusResponse, summary="等待任务完成", description="长轮询：任务结束或超时后返回任务状态")
+async def wait_job(job_id: str, timeout: float = Query(30, ge=0, le=120, description="最长等待时间（秒）")):
+    _get_job_or_404(job_id)
+    record = await job_service.wait_for_job(job_id, timeout)
+    if record is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    return _to_status_response(record)
+
+
+@router.get("/jobs/{job_id}/events", summary="订阅任务状态", description="Server-Sent Events：推送任务状态变化，任务结束后关闭连接")
+async def job_events(job_id: str, timeout: float = Query(300, ge=0, le=3600, description="最长订阅时间（秒）")):
+    record = _get_job_or_404(job_id)
+
+    async def event_stream():
+        current = record
+        last_status = None
+        while current is not None:
+            if current.status != last_status:
+                payload = _to_status_response(current).model_dump_json()
+                yield f"event: status\ndata: {payload}\n\n"
+                last_status = current.status
+            if current.finished:
+                return
+            next_record = await job_service.wait_for_job(job_id, timeout, last_status=last_status)
+            if next_record is not None and next_record.status == last_status and not next_record.finished:
+                # 订阅超时
+                yield f"event: timeout\ndata: {json.dumps({'job_id': job_id})}\n\n"
+                return
+            current = next_record
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
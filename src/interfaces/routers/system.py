@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 from datetime import datetime
 from typing import Dict
 
+from src.infrastructure.metrics import registry as metrics_registry
 from src.infrastructure.services_registry import template_service, storage_service
 from src.interfaces.schemas import HealthCheckResponse, ServiceConfigResponse
 from src.config import settings
@@ -30,6 +31,13 @@ async def get_service_config():
     )
 
 
+@router.get("/metrics", response_class=PlainTextResponse, summary="运行指标", description="以 Prometheus 文本格式输出文档生成各模板、各阶段的耗时直方图")
+async def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="指标统计未启用")
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @router.get("/download/{filename}", summary="下载文件", description="下载生成的文件（仅本地存储时可用）")
 async def download_file(filename: str):
     # 处理枚举类型：如果是枚举，使用 .value 获取字符串值；否则直接转换为字符串
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Optional
 
-from src.application.template_service import get_supported_templates, get_template_info
+from src.application.template_service import get_supported_templates, get_template_info, reload_templates
 from src.interfaces.schemas import TemplateInfoResponse
 
 router = APIRouter(prefix="", tags=["templates"])
@@ -20,6 +20,11 @@ async def list_templates(language: Optional[str] = None):
     return get_supported_templates(language)
 
 
+@router.post("/templates/reload", summary="重新加载模板索引", description="重新扫描模板目录，使新增或删除的模板文件生效")
+async def reload_templates_route():
+    return {"success": True, "entries": reload_templates()}
+
+
 @router.get("/templates/{template_name}", response_model=TemplateInfoResponse, summary="获取模板信息", description="获取指定模板的详细信息")
 async def get_template_info_route(template_name: str, language: Optional[str] = None):
     info = get_template_info(template_name, language)
@@ -51,6 +51,48 @@ class GenerateDocumentResponse(BaseModel):
     )
 
 
+class GenerateBatchRequest(BaseModel):
+    """批量生成文档请求模型"""
+    items: List[GenerateDocumentRequest] = Field(..., min_length=1, max_length=100, description="生成请求列表")
+    include_zip: bool = Field(default=False, description="是否额外生成包含全部成功文件的 zip 打包文件")
+
+
+class GenerateBatchResponse(BaseModel):
+    """批量生成文档响应模型"""
+    success: bool = Field(..., description="是否全部成功")
+    message: str = Field(..., description="响应消息")
+    results: List[GenerateDocumentResponse] = Field(..., description="逐条生成结果（与请求顺序一致）")
+    zip_file_name: Optional[str] = Field(None, description="zip 打包文件名")
+    zip_file_url: Optional[str] = Field(None, description="zip 打包文件下载链接或本地路径")
+
+
+class JobSubmitResponse(BaseModel):
+    """异步生成任务提交响应模型"""
+    job_id: str = Field(..., description="任务ID")
+    status: str = Field(..., description="任务状态（pending/succeeded/failed）")
+    status_url: str = Field(..., description="任务状态查询地址")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "job_id": "3f2b0c9e8d7a4c6b9e1f0a2b3c4d5e6f",
+                "status": "pending",
+                "status_url": "/jobs/3f2b0c9e8d7a4c6b9e1f0a2b3c4d5e6f"
+            }
+        }
+    )
+
+
+class JobStatusResponse(BaseModel):
+    """异步生成任务状态响应模型"""
+    job_id: str = Field(..., description="任务ID")
+    template_name: str = Field(..., description="模板名称")
+    status: str = Field(..., description="任务状态（pending/succeeded/failed）")
+    created_at: str = Field(..., description="提交时间")
+    updated_at: str = Field(..., description="最后更新时间")
+    result: Optional[GenerateDocumentResponse] = Field(None, description="生成结果（任务结束后返回）")
+
+
 class TemplateInfoResponse(BaseModel):
     """模板信息响应模型"""
     name: str = Field(..., description="模板名称")
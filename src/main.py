@@ -4,6 +4,7 @@ import base64
 import logging
 import re
 import tempfile
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -19,6 +20,22 @@ from src.interfaces.middleware.auth import AuthMiddleware, create_auth_middlewar
 # Use uvicorn's logger name so it follows uvicorn log configuration.
 logger = logging.getLogger("uvicorn.error")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时预热渲染进程池、监听模板目录，退出时关闭执行器与渲染引擎"""
+    from src.infrastructure import services_registry as registry
+    if registry.render_engine is not None:
+        registry.render_engine.start()
+    if settings.template_watch_enabled:
+        registry.template_service.catalog.start_watching(settings.template_watch_poll_interval)
+    yield
+    registry.template_service.catalog.stop_watching()
+    registry.generation_executor.shutdown(wait=False)
+    if registry.render_engine is not None:
+        registry.render_engine.shutdown(wait=False)
+
+
 # 创建FastAPI应用
 app = FastAPI(
     title=settings.app_name,
@@ -26,7 +43,8 @@ app = FastAPI(
     description=settings.app_description,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
 # Include routers and application/infrastructure modules (use absolute imports only)
@@ -37,11 +55,14 @@ from src.interfaces.schemas import (
     TemplateInfoResponse, ServiceConfigResponse, HealthCheckResponse
 )
 from src.application.utils import generate_output_filename
+from src.infrastructure.executor import ExecutorSaturatedError
 from src.interfaces.routers.generate import router as generate_router
 from src.interfaces.routers.system import router as system_router
+from src.interfaces.routers.jobs import router as jobs_router
 
 app.include_router(templates_router)
 app.include_router(generate_router)
+app.include_router(jobs_router)
 app.include_router(system_router)
 
 # 注册认证中间件
@@ -88,6 +109,23 @@ async def request_validation_error_handler(request: Request, exc: RequestValidat
     return JSONResponse(status_code=422, content={"detail": errors})
 
 
+@app.exception_handler(ExecutorSaturatedError)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturatedError):
+    """
+    文档生成执行器已满（工作线程与等待队列均被占用）时返回 503，并提示重试间隔。
+    """
+    logger.warning(
+        "Generation rejected, executor saturated: path=%s client=%s",
+        request.url.path,
+        getattr(request.client, "host", None),
+    )
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "error_type": type(exc).__name__},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """
@@ -17,6 +17,9 @@ class DummyStorage:
         # mimic successful remote storage save
         return True, f"https://example.com/{filename}", "saved"
 
+    def save_stream(self, stream, length, filename, project_id=None, version=None):
+        return True, f"https://example.com/{filename}", "saved"
+
 
 def test_generate_document_e2e(monkeypatch, tmp_path):
     # monkeypatch storage and template services
@@ -36,7 +39,7 @@ def test_generate_document_e2e(monkeypatch, tmp_path):
 
         def generate_document(self, template_name, parameters, output_path, language=None):
             # write a small xlsx-like content (not a real xlsx) so storage/read can proceed
-            output_path.write_bytes(b"PK\\x03\\x04test")
+            output_path.write(b"PK\\x03\\x04test")
             return True
 
     monkeypatch.setattr(services_registry, "template_service", DummyTemplateService())
@@ -0,0 +1,46 @@
+import os
+import urllib.request
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from benchmarks.bench_fillers import compare, run_template
+from benchmarks.image_server import ImageServer
+from benchmarks.payloads import PAYLOAD_BUILDERS, build_payload
+from src.config import settings
+from src.domain.template_filler_service import TemplateService
+
+
+def test_every_filler_has_a_benchmark_payload():
+    assert set(PAYLOAD_BUILDERS) == set(TemplateService.TEMPLATE_FILLER_MAPPING)
+
+    small = build_payload("DHF_INDEX", "http://127.0.0.1:1", scale=1)
+    large = build_payload("DHF_INDEX", "http://127.0.0.1:1", scale=3)
+    assert len(large["file_list"]) == 3 * len(small["file_list"])
+    # 约一半的文件名取自模板本身，保证匹配路径被覆盖
+    assert any("未登记文件" not in item["short_name"] for item in small["file_list"])
+
+    first = build_payload("PROJECT_PLAN", "http://bench", image_start=0)
+    second = build_payload("PROJECT_PLAN", "http://bench", image_start=100)
+    assert first["differentiation"] != second["differentiation"]
+
+
+def test_image_server_serves_distinct_images_and_run_template_measures(monkeypatch):
+    # run_template 会把图片缓存目录指向私有临时目录，测试结束后还原
+    monkeypatch.setattr(settings, "image_cache_dir", settings.image_cache_dir)
+    with ImageServer() as server:
+        first = urllib.request.urlopen(f"{server.base_url}/icon/1.png").read()
+        second = urllib.request.urlopen(f"{server.base_url}/icon/2.png").read()
+        assert first.startswith(b"\x89PNG") and first != second
+
+        result = run_template("DHF_INDEX", server.base_url, rounds=1)
+    assert result["rounds"] == 1 and result["output_bytes"] > 0 and result["median_ms"] > 0
+    assert result["peak_rss_mb"] >= result["baseline_rss_mb"] > 0
+
+
+def test_compare_flags_growth_beyond_threshold_and_noise():
+    baseline = {"A": {"median_ms": 100.0, "peak_rss_mb": 80.0, "output_bytes": 1000}}
+    assert compare({"A": {"median_ms": 120.0, "peak_rss_mb": 80.0, "output_bytes": 1000}}, baseline, 0.25) == []
+    regressions = compare({"A": {"median_ms": 140.0, "peak_rss_mb": 81.0, "output_bytes": 2000}}, baseline, 0.25)
+    assert [line.split(":")[1].split()[0] for line in regressions] == ["median_ms", "output_bytes"]
+    # 低于噪声下限的绝对增长不计为退化
+    assert compare({"B": {"median_ms": 1.5}}, {"B": {"median_ms": 1.0}}, 0.25) == []
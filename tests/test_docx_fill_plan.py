@@ -0,0 +1,52 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from docx import Document
+
+from src.infrastructure.template_cache import TemplateCache
+
+
+def _make_template(path):
+    doc = Document()
+    doc.add_paragraph("标题")
+    doc.add_paragraph("名称：{{name}}")
+    table = doc.add_table(rows=3, cols=2)
+    table.cell(0, 0).text = "型号"
+    table.cell(0, 1).text = "{{model}}"
+    # 纵向合并：内容只保存在首个单元格中
+    merged = table.cell(1, 1).merge(table.cell(2, 1))
+    merged.text = "{{images}}"
+    doc.add_paragraph("{{summary}}")
+    doc.save(path)
+
+
+def test_plan_records_placeholder_locations_once(tmp_path):
+    path = tmp_path / "t.docx"
+    _make_template(path)
+    cache = TemplateCache()
+
+    plan = cache.docx_fill_plan(path)
+    assert plan.body_paragraphs == (1, 3)
+    assert [(c.row_index, c.cell_index) for c in plan.table_cells] == [(2, 1), (3, 1)]
+    assert cache.docx_fill_plan(path) is plan
+
+
+def test_bound_plan_survives_sibling_changes(tmp_path):
+    path = tmp_path / "t.docx"
+    _make_template(path)
+    cache = TemplateCache()
+    doc = cache.load_document(path)
+    bound = cache.docx_fill_plan(path).bind(doc)
+
+    assert [p.text for p in bound.paragraphs] == ["名称：{{name}}", "{{summary}}"]
+    assert [c.text for c in bound.cells] == ["{{model}}", "{{images}}"]
+
+    # 在目标之前插入段落、删除一个计划段落后，其余引用仍然有效
+    body = doc.element.body
+    body.insert(0, doc.add_paragraph("新增")._element)
+    first = bound.paragraphs[0]._element
+    first.getparent().remove(first)
+
+    assert [p.text for p in bound.live_paragraphs()] == ["{{summary}}"]
+    assert [p.text for p in bound.cell_paragraphs()] == ["{{model}}", "{{images}}"]
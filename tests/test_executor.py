@@ -0,0 +1,62 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.application import generate_service as gs
+from src.infrastructure.executor import ExecutorSaturatedError, GenerationExecutor
+
+
+def test_executor_runs_function_off_loop():
+    executor = GenerationExecutor(max_workers=2, max_queue=0)
+    loop_thread = threading.get_ident()
+
+    async def main():
+        return await executor.run(threading.get_ident)
+
+    try:
+        worker_thread = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert worker_thread != loop_thread
+    assert executor.in_flight == 0
+
+
+def test_executor_rejects_when_saturated():
+    executor = GenerationExecutor(max_workers=1, max_queue=1, retry_after=7)
+    release = threading.Event()
+
+    async def main():
+        running = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturatedError) as exc_info:
+            await executor.run(release.wait)
+        release.set()
+        await asyncio.gather(*running)
+        return exc_info.value
+
+    try:
+        error = asyncio.run(main())
+    finally:
+        executor.shutdown()
+    assert error.retry_after == 7
+    assert executor.in_flight == 0
+
+
+def test_generate_returns_503_when_executor_saturated(monkeypatch):
+    class SaturatedExecutor:
+        async def run(self, func, *args):
+            raise ExecutorSaturatedError("服务繁忙，请稍后重试", retry_after=3)
+
+    monkeypatch.setattr(gs, "generation_executor", SaturatedExecutor())
+
+    client = TestClient(app)
+    resp = client.post("/generate", json={"template_name": "DHF_INDEX", "parameters": {}})
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "3"
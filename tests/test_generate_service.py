@@ -1,5 +1,7 @@
+import asyncio
 import os
 import tempfile
+import zipfile
 from pathlib import Path
 
 import pytest
@@ -9,13 +11,21 @@ os.environ.setdefault("SKIP_INFRA_INIT", "1")
 from src.application import generate_service as gs
 
 
+def _write_output(output, data):
+    # 渲染目标可能是文件路径，也可能是内存缓冲区
+    if isinstance(output, Path):
+        output.write_bytes(data)
+    else:
+        output.write(data)
+
+
 def test_generate_document_success_remote(monkeypatch, tmp_path):
     # Mock template_service to validate name and write output file
     def validate(name):
         return True
 
     def gen_doc(template_name, parameters, output_path, language=None):
-        output_path.write_bytes(b"ok")
+        _write_output(output_path, b"ok")
         return True
 
     class DummyTemplateSvc:
@@ -26,6 +36,9 @@ def test_generate_document_success_remote(monkeypatch, tmp_path):
         def save_file(self, file_path, file_name, project_id=None, version=None):
             return True, "http://example.com/file", "ok"
 
+        def save_stream(self, stream, length, file_name, project_id=None, version=None):
+            return True, "http://example.com/file", "ok"
+
     monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
     monkeypatch.setattr(gs, "storage_service", DummyStorage())
     monkeypatch.setattr(gs, "settings", type("S", (), {"storage_type": "minio"}))
@@ -41,7 +54,7 @@ def test_generate_document_success_local(monkeypatch, tmp_path):
         return True
 
     def gen_doc(template_name, parameters, output_path, language=None):
-        output_path.write_bytes(b"ok")
+        _write_output(output_path, b"ok")
         return True
 
     class DummyTemplateSvc:
@@ -67,3 +80,71 @@ def test_generate_document_success_local(monkeypatch, tmp_path):
     assert res["file_url"] is not None
 
 
+
+def test_generate_document_uploads_from_memory_buffer(monkeypatch):
+    uploads = []
+
+    class DummyTemplateSvc:
+        validate_template_name = staticmethod(lambda name: True)
+
+        @staticmethod
+        def generate_document(template_name, parameters, output_path, language=None):
+            assert not isinstance(output_path, Path)
+            output_path.write(b"rendered")
+            return True
+
+    class DummyStorage:
+        def save_file(self, file_path, file_name, project_id=None, version=None):
+            raise AssertionError("buffered output should not be uploaded from disk")
+
+        def save_stream(self, stream, length, file_name, project_id=None, version=None):
+            uploads.append((stream.read(), length))
+            return True, "http://example.com/file", "ok"
+
+    class S:
+        storage_type = "minio"
+        render_temp_dir = None
+        render_spool_max_mb = 1
+
+    monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
+    monkeypatch.setattr(gs, "storage_service", DummyStorage())
+    monkeypatch.setattr(gs, "settings", S())
+
+    res = gs.generate_document_internal("DHF_INDEX", {"project_number": "P", "version": "v1"})
+    assert res["success"] is True
+    assert uploads == [(b"rendered", len(b"rendered"))]
+
+
+def test_generate_documents_batch_with_zip(monkeypatch, tmp_path):
+    def gen_doc(template_name, parameters, output_path, language=None):
+        if parameters.get("fail"):
+            return False
+        _write_output(output_path, template_name.encode())
+        return True
+
+    class DummyTemplateSvc:
+        validate_template_name = staticmethod(lambda name: True)
+        generate_document = staticmethod(gen_doc)
+
+    class S:
+        storage_type = "local"
+
+        @staticmethod
+        def get_local_storage_path():
+            return tmp_path
+
+    monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
+    monkeypatch.setattr(gs, "settings", S())
+    monkeypatch.setattr(gs, "storage_service", None)
+
+    items = [
+        ("DHF_INDEX", {"project_number": "P", "version": "v1"}, "zh"),
+        ("PTF_INDEX", {"project_number": "P", "version": "v1"}, "zh"),
+        ("PTF_INDEX", {"project_number": "P", "version": "v1", "fail": True}, "zh"),
+    ]
+    res = asyncio.run(gs.generate_documents_batch(items, include_zip=True))
+
+    assert [r["success"] for r in res["results"]] == [True, True, False]
+    assert res["success"] is False
+    with zipfile.ZipFile(res["zip_file_url"]) as zf:
+        assert sorted(zf.read(name) for name in zf.namelist()) == [b"DHF_INDEX", b"PTF_INDEX"]
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from src.infrastructure.image_cache import FetchResult, ImageCache
+
+
+class FakeOrigin:
+    """模拟图片服务器：支持 ETag 条件请求，并记录请求次数"""
+
+    def __init__(self, images):
+        self.images = images
+        self.requests = []
+
+    def __call__(self, url, etag, last_modified):
+        self.requests.append((url, etag))
+        content = self.images.get(url, b"")
+        current_etag = f'"{len(content)}-{content[:4].hex()}"'
+        if etag == current_etag:
+            return FetchResult(not_modified=True)
+        return FetchResult(content=content, etag=current_etag)
+
+
+def test_hit_and_conditional_revalidation(tmp_path):
+    origin = FakeOrigin({"http://img/a.png": b"AAAA"})
+    cache = ImageCache(tmp_path, revalidate_seconds=60)
+
+    assert cache.get("http://img/a.png", origin) == b"AAAA"
+    assert cache.get("http://img/a.png", origin) == b"AAAA"
+    assert len(origin.requests) == 1
+
+    # 过期后发送带 ETag 的条件请求，304 时复用缓存
+    cache.revalidate_seconds = 0
+    assert cache.get("http://img/a.png", origin) == b"AAAA"
+    assert origin.requests[-1] == ("http://img/a.png", '"4-41414141"')
+    assert cache.revalidated == 1
+
+    # 源站内容变化后重新下载
+    origin.images["http://img/a.png"] = b"BBBBBB"
+    assert cache.get("http://img/a.png", origin) == b"BBBBBB"
+
+
+def test_disk_tier_survives_new_instance_and_dedupes_content(tmp_path):
+    origin = FakeOrigin({"http://img/a.png": b"same", "http://img/b.png": b"same"})
+    cache = ImageCache(tmp_path)
+    cache.get("http://img/a.png", origin)
+    cache.get("http://img/b.png", origin)
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+    restarted = ImageCache(tmp_path)
+    assert restarted.get("http://img/a.png", origin) == b"same"
+    assert len(origin.requests) == 2
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    urls = [f"http://img/{i}.png" for i in range(3)]
+    origin = FakeOrigin({url: bytes([i]) * 100 for i, url in enumerate(urls)})
+    cache = ImageCache(tmp_path, memory_max_bytes=0, disk_max_bytes=250)
+
+    cache.get(urls[0], origin)
+    time.sleep(0.01)
+    cache.get(urls[1], origin)
+    time.sleep(0.01)
+    cache.get(urls[2], origin)
+
+    blobs = list((tmp_path / "blobs").iterdir())
+    assert sum(p.stat().st_size for p in blobs) <= 250
+    # 最早写入的图片被淘汰，再次获取时重新下载
+    cache.get(urls[0], origin)
+    assert origin.requests.count((urls[0], None)) == 2
+
+
+def test_failed_revalidation_keeps_cached_content(tmp_path):
+    origin = FakeOrigin({"http://img/a.png": b"AAAA"})
+    cache = ImageCache(tmp_path, revalidate_seconds=0)
+    cache.get("http://img/a.png", origin)
+
+    assert cache.get("http://img/a.png", lambda url, etag, last_modified: FetchResult()) == b"AAAA"
+
+
+def test_url_metadata_counts_toward_disk_limit_and_follows_evicted_content(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.infrastructure.image_cache._META_MEMORY_ENTRIES", 50)
+    # 预签名 URL：同一图片每次的查询签名都不同
+    urls = [f"http://img/a.png?X-Amz-Signature={i:04d}" for i in range(300)]
+    origin = FakeOrigin({url: url.encode() * 10 for url in urls})
+    cache = ImageCache(tmp_path, memory_max_bytes=0, disk_max_bytes=10_000)
+    in_progress = tmp_path / "blobs" / ".tmp-writing"
+    in_progress.write_bytes(b"x" * 100)
+
+    for url in urls:
+        cache.get(url, origin)
+
+    files = list((tmp_path / "blobs").iterdir()) + list((tmp_path / "urls").iterdir())
+    assert sum(p.stat().st_size for p in files if p != in_progress) <= 10_000
+    assert len(cache._meta) <= 50
+    # 剩余元数据都指向仍存在的内容
+    blobs = {p.name for p in (tmp_path / "blobs").iterdir()}
+    assert all(meta.digest in blobs for meta in cache._meta.values())
+    assert all(json.loads(p.read_text())["digest"] in blobs for p in (tmp_path / "urls").iterdir())
+    # 其他线程正在写入的临时文件不会被淘汰
+    assert in_progress.exists()
+
+
+def test_presigned_urls_of_one_image_stay_within_limits(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.infrastructure.image_cache._META_MEMORY_ENTRIES", 50)
+    urls = [f"http://img/a.png?X-Amz-Signature={i:04d}" for i in range(300)]
+    origin = FakeOrigin({url: b"A" * 1000 for url in urls})
+    cache = ImageCache(tmp_path, memory_max_bytes=0, disk_max_bytes=10_000)
+
+    for url in urls:
+        assert cache.get(url, origin) == b"A" * 1000
+
+    files = list((tmp_path / "blobs").iterdir()) + list((tmp_path / "urls").iterdir())
+    assert sum(p.stat().st_size for p in files) <= 10_000
+    assert len(cache._meta) == 50
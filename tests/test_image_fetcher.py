@@ -0,0 +1,55 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from src.infrastructure.image_fetcher import prefetch_images
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith("/slow"):
+            time.sleep(0.5)
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = self.path.encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_prefetch_downloads_concurrently(image_server):
+    urls = [f"{image_server}/slow/{i}.png" for i in range(4)]
+    started = time.monotonic()
+    result = prefetch_images(urls + [urls[0], f"{image_server}/missing.png"], max_workers=4, deadline=5)
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 1.5
+    assert result == {
+        **{url: f"/slow/{i}.png".encode() for i, url in enumerate(urls)},
+        f"{image_server}/missing.png": b"",
+    }
+
+
+def test_prefetch_deadline_marks_unfinished_as_failed(image_server):
+    fast, slow = f"{image_server}/fast.png", f"{image_server}/slow.png"
+    result = prefetch_images([fast, slow], max_workers=2, deadline=0.2)
+    assert result == {fast: b"/fast.png", slow: b""}
@@ -0,0 +1,43 @@
+import io
+import os
+import random
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from PIL import Image
+
+from src.infrastructure.image_normalizer import normalize_image
+
+
+def _encode(img, fmt, **kwargs):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    return buf.getvalue()
+
+
+def _photo(width, height):
+    rng = random.Random(0)
+    img = Image.new("RGB", (width, height))
+    img.putdata([(x % 256, y % 256, rng.randrange(256)) for y in range(height) for x in range(width)])
+    return img
+
+
+def test_large_photo_is_downscaled_to_jpeg():
+    original = _encode(_photo(1200, 600), "PNG")
+    result = normalize_image(original, 300, url="http://img/photo.png")
+
+    img = Image.open(io.BytesIO(result))
+    assert img.format == "JPEG"
+    assert img.size == (300, 150)
+    assert len(result) < len(original)
+    # 相同 (URL, 目标宽度) 直接返回缓存结果
+    assert normalize_image(original, 300, url="http://img/photo.png") is result
+
+
+def test_transparent_image_stays_png_and_small_image_is_untouched():
+    transparent = _encode(Image.new("RGBA", (800, 400), (0, 120, 200, 128)), "PNG")
+    img = Image.open(io.BytesIO(normalize_image(transparent, 200)))
+    assert (img.format, img.mode, img.size) == ("PNG", "RGBA", (200, 100))
+
+    small = _encode(_photo(100, 50), "JPEG")
+    assert normalize_image(small, 300) is small
@@ -0,0 +1,53 @@
+import os
+import time
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.application import job_service
+from src.infrastructure.job_store import InMemoryJobStore, JobRecord, SQLiteJobStore
+
+
+def fake_generate(template_name, parameters, language=None):
+    return {
+        "success": True,
+        "message": "文档生成成功",
+        "file_name": f"{template_name}.xlsx",
+        "file_url": f"https://example.com/{template_name}.xlsx",
+        "storage_type": "minio",
+        "project_id": parameters.get("project_number"),
+        "version": None,
+    }
+
+
+def test_job_lifecycle_with_sqlite_store(monkeypatch):
+    monkeypatch.setattr(job_service, "job_store", SQLiteJobStore(":memory:"))
+    monkeypatch.setattr(job_service, "generate_document_internal", fake_generate)
+
+    client = TestClient(app)
+    resp = client.post("/jobs", json={"template_name": "DHF_INDEX", "parameters": {"project_number": "P1"}})
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    resp = client.get(f"/jobs/{job_id}/wait", params={"timeout": 5})
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["status"] == "succeeded"
+    assert data["result"]["file_name"] == "DHF_INDEX.xlsx"
+
+    resp = client.get(f"/jobs/{job_id}/events")
+    assert "event: status" in resp.text
+    assert '"succeeded"' in resp.text
+
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_in_memory_job_store_evicts_expired_records():
+    store = InMemoryJobStore(ttl_seconds=0)
+    record = JobRecord.new("DHF_INDEX")
+    store.create(record)
+    time.sleep(0.01)
+    assert store.get(record.job_id) is None
+    assert store.evict_expired() == 0
@@ -0,0 +1,93 @@
+import asyncio
+import io
+import os
+from pathlib import Path
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+import httpx
+
+from benchmarks.fake_minio import FakeMinIO
+from benchmarks.loadtest import ROUTES, Sample, parse_mix, run_load, summarize
+from benchmarks.payloads import PAYLOAD_BUILDERS
+from src.application import generate_service as gs
+from src.config import settings
+from src.infrastructure.storage_service import MinIOStorageService
+from src.main import app
+
+
+def test_routes_cover_benchmark_payloads_and_exist():
+    assert set(ROUTES) == set(PAYLOAD_BUILDERS)
+    assert set(ROUTES.values()) <= set(app.openapi()["paths"])
+
+    assert parse_mix(None) == {name: 1.0 for name in ROUTES}
+    assert parse_mix(["DHF_INDEX=3,PTF_INDEX", "PROJECT_PLAN=0.5"]) == {
+        "DHF_INDEX": 3.0, "PTF_INDEX": 1.0, "PROJECT_PLAN": 0.5,
+    }
+
+
+def test_summarize_reports_percentiles_and_error_rate():
+    samples = [Sample("A", i, (i + 1) / 1000, "200", True) for i in range(99)]
+    samples.append(Sample("A", 99, 1.0, "503", False))
+    summary = summarize(samples, elapsed=10.0)
+    assert summary["requests"] == 100 and summary["throughput_rps"] == 10.0
+    assert summary["error_rate"] == 0.01 and summary["statuses"] == {"200": 99, "503": 1}
+    assert summary["latency_ms"]["p50"] == 50.0 and summary["latency_ms"]["p99"] == 99.0
+    assert summary["latency_ms"]["max"] == 1000.0
+    assert summarize([], 1.0)["latency_ms"] is None
+
+
+def test_run_load_drives_generate_endpoints(monkeypatch, tmp_path):
+    class DummyTemplateSvc:
+        validate_template_name = staticmethod(lambda name: True)
+
+        @staticmethod
+        def generate_document(template_name, parameters, output_path, language=None):
+            if template_name == "PTF_INDEX":
+                return False
+            output_path.write(b"rendered")
+            return True
+
+    class S:
+        storage_type = "local"
+        render_temp_dir = None
+        render_spool_max_mb = 1
+
+        @staticmethod
+        def get_local_storage_path():
+            return Path(tmp_path)
+
+    monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
+    monkeypatch.setattr(gs, "settings", S())
+    monkeypatch.setattr(gs, "storage_service", None)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            return await run_load(
+                client, {"DHF_INDEX": 3, "PTF_INDEX": 1},
+                lambda template: {"project_number": "P", "version": "1.0"},
+                concurrency=3, requests=12, seed=1,
+            )
+
+    report = asyncio.run(main())
+    assert report["overall"]["requests"] == 12
+    templates = report["templates"]
+    assert templates["DHF_INDEX"]["error_rate"] == 0.0
+    # 生成失败时接口返回 200 + success=false，计为错误
+    assert templates["PTF_INDEX"]["errors"] == templates["PTF_INDEX"]["requests"] > 0
+    assert report["overall"]["latency_ms"]["p95"] >= report["overall"]["latency_ms"]["p50"] > 0
+
+
+def test_fake_minio_accepts_storage_service_uploads(monkeypatch):
+    with FakeMinIO() as minio:
+        monkeypatch.setattr(settings, "minio_endpoint", minio.endpoint)
+        monkeypatch.setattr(settings, "minio_access_key", minio.access_key)
+        monkeypatch.setattr(settings, "minio_secret_key", minio.secret_key)
+        monkeypatch.setattr(settings, "minio_bucket_name", "loadtest")
+        monkeypatch.setattr(settings, "minio_secure", False)
+
+        storage = MinIOStorageService()
+        success, url, _ = storage.save_stream(io.BytesIO(b"x" * 2048), 2048, "doc.xlsx", project_id="P", version="1")
+    assert success and "/loadtest/P/1/" in url
+    assert minio.stats.objects == 1 and minio.stats.bytes == 2048
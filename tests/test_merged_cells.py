@@ -0,0 +1,46 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+import pytest
+from openpyxl import Workbook
+
+from src.infrastructure.merged_cells import merged_cell_index
+
+
+def _ranges(cell_ranges):
+    return sorted(str(r) for r in cell_ranges)
+
+
+def test_index_follows_merge_and_unmerge():
+    ws = Workbook().active
+    ws["B2"] = "左上"
+    ws.merge_cells("B2:D4")
+    ws.merge_cells("F3:G3")
+    index = merged_cell_index(ws)
+
+    assert index.top_left(4, 3).coordinate == "B2"
+    assert index.top_left(3, 5).coordinate == "E3"
+    assert _ranges(index.overlapping(3, 3, 4, 6)) == ["B2:D4", "F3:G3"]
+    assert index.overlapping(5, 9, 1, 9) == []
+
+    index.unmerge("B2:D4")
+    index.merge("A6:C8")
+    # 被已有区域包含的区域不会加入（与 openpyxl 一致）
+    index.merge("B7:C7")
+    assert _ranges(index.ranges) == _ranges(ws.merged_cells.ranges) == ["A6:C8", "F3:G3"]
+    assert index.find(3, 3) is None
+    assert index.top_left(8, 2).coordinate == "A6"
+    with pytest.raises(ValueError):
+        index.unmerge("B2:D4")
+    assert merged_cell_index(ws) is index
+
+
+def test_index_rebuilds_after_direct_worksheet_changes():
+    ws = Workbook().active
+    ws.merge_cells("A1:B1")
+    index = merged_cell_index(ws)
+
+    ws.merge_cells("A3:A5")
+    assert str(merged_cell_index(ws).find(4, 1)) == "A3:A5"
+    assert len(index) == len(ws.merged_cells.ranges) == 2
@@ -0,0 +1,91 @@
+import os
+import time
+from pathlib import Path
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from fastapi.testclient import TestClient
+
+from src.application import generate_service as gs
+from src.config import settings
+from src.infrastructure import metrics
+from src.infrastructure.executor import GenerationExecutor
+from src.main import app
+
+
+def test_spans_are_recorded_per_template_and_stage():
+    with metrics.trace_generation("METRICS_UNIT", "ja") as trace:
+        with metrics.span("fill"):
+            # 同名阶段嵌套时只计外层
+            with metrics.span("fill"):
+                time.sleep(0.002)
+            with metrics.span("save"):
+                pass
+        metrics.annotate(rows_inserted=3, output_size=20000)
+        trace.annotate(outcome="success")
+
+    assert [span.name for span in trace.spans] == ["save", "fill"]
+    assert trace.server_timing().startswith("save;dur=")
+    assert "fill;dur=" in trace.server_timing() and "total;dur=" in trace.server_timing()
+    assert metrics.current_trace() is None
+
+    assert metrics.generation_duration.count(("METRICS_UNIT", "ja", "success")) == 1
+    assert metrics.stage_duration.count(("METRICS_UNIT", "fill")) == 1
+    assert metrics.rows_inserted_total.value(("METRICS_UNIT",)) == 3
+    text = metrics.registry.render()
+    assert "# TYPE ohc_generation_stage_duration_seconds histogram" in text
+    assert 'ohc_generation_stage_duration_seconds_bucket{template="METRICS_UNIT",stage="fill",le="+Inf"} 1' in text
+    assert 'ohc_generation_output_bytes_bucket{template="METRICS_UNIT",le="16384"} 0' in text
+    assert 'ohc_generation_output_bytes_bucket{template="METRICS_UNIT",le="65536"} 1' in text
+
+    # 没有追踪时 span 不做记录
+    with metrics.span("fill"):
+        pass
+
+
+def test_thread_executor_propagates_trace():
+    executor = GenerationExecutor(max_workers=1, max_queue=0)
+    try:
+        with metrics.start_trace() as trace:
+            def work():
+                with metrics.span("render"):
+                    return metrics.current_trace()
+            assert executor.submit(work).result() is trace
+        assert [span.name for span in trace.spans] == ["render"]
+    finally:
+        executor.shutdown()
+
+
+def test_generate_endpoint_reports_server_timing(monkeypatch, tmp_path):
+    class DummyTemplateSvc:
+        validate_template_name = staticmethod(lambda name: True)
+
+        @staticmethod
+        def generate_document(template_name, parameters, output_path, language=None):
+            with metrics.span("fill"):
+                output_path.write(b"rendered")
+            return True
+
+    class S:
+        storage_type = "local"
+        render_temp_dir = None
+        render_spool_max_mb = 1
+
+        @staticmethod
+        def get_local_storage_path():
+            return Path(tmp_path)
+
+    monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
+    monkeypatch.setattr(gs, "settings", S())
+    monkeypatch.setattr(gs, "storage_service", None)
+    monkeypatch.setattr(settings, "metrics_server_timing", True)
+
+    client = TestClient(app)
+    resp = client.post("/generate", json={"template_name": "DHF_INDEX", "parameters": {"project_number": "P"}})
+    assert resp.status_code == 200 and resp.json()["success"] is True
+    timing = resp.headers["Server-Timing"]
+    assert "render;dur=" in timing and "fill;dur=" in timing and "upload;dur=" in timing
+
+    text = client.get("/metrics").text
+    assert 'ohc_generation_duration_seconds_count{template="DHF_INDEX",language="",outcome="success"}' in text
+    assert 'ohc_generation_stage_duration_seconds_count{template="DHF_INDEX",stage="upload"}' in text
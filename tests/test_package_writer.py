@@ -0,0 +1,66 @@
+import io
+import os
+import zipfile
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from docx import Document
+from openpyxl import Workbook, load_workbook
+from openpyxl.drawing.image import Image as XLImage
+from PIL import Image
+
+from src.infrastructure.package_writer import save_document, save_workbook
+from src.infrastructure.template_cache import TemplateCache
+
+
+def _raw_entry(path_or_stream, name):
+    """条目的本地文件头之后的压缩数据"""
+    with zipfile.ZipFile(path_or_stream) as archive:
+        info = archive.getinfo(name)
+        archive.fp.seek(info.header_offset + 26)
+        name_length = int.from_bytes(archive.fp.read(2), "little")
+        extra_length = int.from_bytes(archive.fp.read(2), "little")
+        archive.fp.seek(info.header_offset + 30 + name_length + extra_length)
+        return archive.fp.read(info.compress_size)
+
+
+def test_workbook_images_are_copied_without_recompression(tmp_path):
+    image_buffer = io.BytesIO()
+    Image.effect_noise((64, 64), 50).convert("RGB").save(image_buffer, format="PNG")
+    path = tmp_path / "t.xlsx"
+    wb = Workbook()
+    wb.active["A1"] = "{name}"
+    wb.active.add_image(XLImage(io.BytesIO(image_buffer.getvalue())), "B2")
+    wb.save(path)
+
+    cache = TemplateCache()
+    workbook = cache.load_workbook(path)
+    workbook.active["A1"] = "N"
+    output = io.BytesIO()
+    save_workbook(workbook, output, cache.template_archive(path))
+
+    assert _raw_entry(output, "xl/media/image1.png") == _raw_entry(path, "xl/media/image1.png")
+    with zipfile.ZipFile(output) as archive:
+        assert archive.testzip() is None
+        assert archive.read("xl/media/image1.png") == image_buffer.getvalue()
+    assert load_workbook(output).active["A1"].value == "N"
+
+
+def test_document_read_only_parts_are_copied_from_template(tmp_path):
+    path = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("{{name}}")
+    doc.save(path)
+
+    cache = TemplateCache()
+    document = cache.load_document(path)
+    document.paragraphs[0].text = "N"
+    output = io.BytesIO()
+    save_document(document, output, cache.template_archive(path))
+
+    with zipfile.ZipFile(output) as archive, zipfile.ZipFile(path) as template:
+        assert archive.testzip() is None
+        assert archive.read("word/styles.xml") == template.read("word/styles.xml")
+        assert sorted(archive.namelist()) == sorted(template.namelist())
+    assert _raw_entry(output, "word/styles.xml") == _raw_entry(path, "word/styles.xml")
+    assert [p.text for p in Document(output).paragraphs] == ["N"]
@@ -0,0 +1,97 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from openpyxl import Workbook
+
+from src.infrastructure.placeholders import (
+    DOCX_PLACEHOLDERS,
+    Placeholder,
+    PlaceholderSyntax,
+    render_fragments,
+    render_segments,
+    split_placeholders,
+)
+from src.infrastructure.template_cache import TemplateCache
+from src.infrastructure.template_service import ExcelTemplateFiller
+
+
+def test_split_and_render_fragments():
+    fragments = split_placeholders("项目: {{ project }} / {date} / {unknown}")
+    assert fragments == (
+        "项目: ",
+        Placeholder("project", "{{ project }}"),
+        " / ",
+        Placeholder("date", "{date}"),
+        " / ",
+        Placeholder("unknown", "{unknown}"),
+    )
+    values = {"project": "P-1", "date": "2024-01-01"}
+    assert render_fragments(fragments, values.get) == "项目: P-1 / 2024-01-01 / {unknown}"
+
+
+def test_substitution_is_single_pass_and_cached():
+    syntax = PlaceholderSyntax(r"\{\{([^}]+)\}\}|\{([^}]+)\}")
+    values = {"a": "{b}", "b": "B"}
+    # 替换结果中的花括号不会被再次替换
+    assert syntax.substitute("{{a}}-{b}", values.get) == "{b}-B"
+    assert syntax.substitute("{{a}}-{b}", values.get) == "{b}-B"
+    assert syntax.cache_info().hits == 1
+    assert syntax.substitute("无占位符", values.get) == "无占位符"
+    assert syntax.cache_info().currsize == 1
+
+
+def test_docx_segments_merge_literals_and_skip_empty_values():
+    flat = {"name": "N", "empty": ""}
+    fragments = DOCX_PLACEHOLDERS.split("前缀 {{name}} {{unknown}} {{empty}}后缀")
+    assert render_segments(fragments, flat.get) == [
+        ("前缀 ", False),
+        ("N", True),
+        (" {{unknown}} 后缀", False),
+    ]
+
+
+def test_index_records_only_placeholder_cells_and_is_cached(tmp_path):
+    path = tmp_path / "t.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "标题"
+    ws["B2"] = "名称: {name}"
+    ws["C3"] = 42
+    wb.save(path)
+
+    cache = TemplateCache()
+    index = cache.placeholder_index(path)
+    assert [(c.row, c.column) for c in index.sheet(ws.title).cells] == [(2, 2)]
+    assert index.keys == {"name": [(ws.title, 2, 2)]}
+    assert cache.placeholder_index(path) is index
+
+
+def test_indexed_replacement_matches_full_scan(tmp_path):
+    path = tmp_path / "t.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    ws["A1"] = "名称: {{name}}"
+    ws["A2"] = "负责人: {owner}"
+    ws["A3"] = "{missing}"
+    wb.save(path)
+
+    cache = TemplateCache()
+    index = cache.placeholder_index(path)
+    filler = ExcelTemplateFiller()
+    parameters = {"name": "N", "owner": ""}
+
+    # 填充步骤改写了已索引的单元格：按当前内容重新替换
+    indexed = cache.load_workbook(path).active
+    indexed["A2"] = indexed["A2"].value + " ({name})"
+    changed = filler._replace_indexed_placeholders(indexed, index, parameters)
+    assert [c.coordinate for c in changed] == ["A1", "A2"]
+    assert indexed["A1"].value == "名称: N"
+    assert indexed["A2"].value == "负责人: AI未检索到，需人工确认 (N)"
+    assert indexed["A3"].value == "{missing}"
+
+    # 插入行后索引坐标失效，退回全表扫描
+    shifted = cache.load_workbook(path).active
+    shifted.insert_rows(1)
+    filler._replace_indexed_placeholders(shifted, index, parameters)
+    assert [shifted.cell(r, 1).value for r in (2, 3)] == ["名称: N", "负责人: AI未检索到，需人工确认"]
@@ -0,0 +1,84 @@
+import os
+import pstats
+import time
+from pathlib import Path
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from fastapi.testclient import TestClient
+
+from src.application import generate_service as gs
+from src.config import settings
+from src.infrastructure import profiling
+from src.main import app
+
+
+def _busy_fill(seconds=0.03):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(200))
+
+
+def test_sampled_generation_captures_pstats_and_stacks(tmp_path):
+    with profiling.profile_generation("PROJECT_PLAN", sample_rate=1.0, templates=["PROJECT_PLAN"]) as capture:
+        assert profiling.current_capture() is capture
+        with profiling.profile("fill"):
+            _busy_fill()
+    assert profiling.current_capture() is None and capture.captured
+
+    artifacts = capture.artifacts()
+    (tmp_path / "fill.pstats").write_bytes(artifacts["pstats"])
+    stats = pstats.Stats(str(tmp_path / "fill.pstats"))
+    assert any(func[2] == "_busy_fill" for func in stats.stats)
+    # 调用栈从 with 语句内调用的函数开始
+    stacks = artifacts["collapsed.txt"].decode("utf-8").splitlines()
+    assert stacks and all(line.startswith("_busy_fill (test_profiling.py:") for line in stacks)
+
+    # 不在抽样模板内 / 未抽中时不剖析，profile() 不做任何事
+    with profiling.profile_generation("DHF_INDEX", sample_rate=1.0, templates=["PROJECT_PLAN"]) as capture:
+        assert capture is None
+        with profiling.profile("fill"):
+            pass
+    with profiling.profile_generation("PROJECT_PLAN") as capture:
+        assert capture is None
+
+
+def test_admin_header_profiles_request_and_stores_artifacts(monkeypatch, tmp_path):
+    class DummyTemplateSvc:
+        validate_template_name = staticmethod(lambda name: True)
+
+        @staticmethod
+        def generate_document(template_name, parameters, output_path, language=None):
+            with profiling.profile("fill"):
+                _busy_fill(0.02)
+            output_path.write(b"rendered")
+            return True
+
+    class S:
+        storage_type = "local"
+        render_temp_dir = None
+        render_spool_max_mb = 1
+
+        @staticmethod
+        def get_local_storage_path():
+            return Path(tmp_path)
+
+    monkeypatch.setattr(gs, "template_service", DummyTemplateSvc())
+    monkeypatch.setattr(gs, "settings", S())
+    monkeypatch.setattr(gs, "storage_service", None)
+    monkeypatch.setattr(settings, "profiling_admin_token", "secret")
+
+    client = TestClient(app)
+    body = {"template_name": "PROJECT_PLAN", "parameters": {"project_number": "P"}}
+
+    resp = client.post("/generate", json=body, headers={"X-OHC-Profile": "wrong"})
+    assert resp.status_code == 200 and "X-OHC-Profile-Id" not in resp.headers
+    assert not list(tmp_path.rglob("*.pstats"))
+
+    resp = client.post("/generate", json=body, headers={"X-OHC-Profile": "secret"})
+    assert resp.status_code == 200 and resp.json()["success"] is True
+    request_id = resp.headers["X-OHC-Profile-Id"]
+    file_name = resp.json()["file_name"]
+    target_dir = tmp_path / "P" / "default"
+    assert (target_dir / f"{file_name}.{request_id}.pstats").stat().st_size > 0
+    assert (target_dir / f"{file_name}.{request_id}.collapsed.txt").read_text(encoding="utf-8")
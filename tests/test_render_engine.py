@@ -0,0 +1,76 @@
+import os
+import shutil
+from pathlib import Path
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from openpyxl import load_workbook
+
+from src.domain.template_filler_service import TemplateService
+from src.infrastructure.render_engine import ProcessRenderEngine
+from src.infrastructure.template_catalog import TemplateCatalog
+
+TEMPLATES = Path(__file__).resolve().parents[1] / "static" / "templates"
+
+
+def test_process_render_engine_renders_into_shared_temp_dir(tmp_path):
+    engine = ProcessRenderEngine(max_workers=1, max_jobs_per_worker=1, temp_dir=str(tmp_path))
+    try:
+        # max_jobs_per_worker=1：每个任务后回收进程，两次渲染都应成功
+        for _ in range(2):
+            path = engine.render("DHF_INDEX", {"project_name": "P-001"}, "zh", ".xlsx")
+            assert path is not None
+            assert path.parent == tmp_path
+            load_workbook(path)
+            path.unlink()
+        assert engine.render("NOT_A_TEMPLATE", {}, "zh", ".xlsx") is None
+    finally:
+        engine.shutdown()
+    assert list(tmp_path.iterdir()) == []
+
+
+
+def test_start_warms_every_worker_once(tmp_path, monkeypatch):
+    warmed = []
+    original = ProcessRenderEngine._warm_up
+    monkeypatch.setattr(ProcessRenderEngine, "_warm_up", lambda self, pool: warmed.extend(original(self, pool)))
+
+    engine = ProcessRenderEngine(max_workers=2, max_jobs_per_worker=1, temp_dir=str(tmp_path))
+    try:
+        engine.start()
+        # 预热任务在屏障处等待，两个任务分别由两个不同的进程处理
+        assert len(set(warmed)) == 2
+        # 预热占用了名额的进程被回收后，渲染仍然正常
+        path = engine.render("DHF_INDEX", {"project_name": "P-001"}, "zh", ".xlsx")
+        assert path is not None
+        path.unlink()
+    finally:
+        engine.shutdown()
+
+
+def test_worker_follows_catalog_reloaded_after_start(tmp_path, monkeypatch):
+    templates = tmp_path / "templates"
+    (templates / "excel" / "zh").mkdir(parents=True)
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "config.toml").write_text(
+        f'[templates]\nbase_path = "{templates.as_posix()}"\n', encoding="utf-8"
+    )
+    # 工作进程按当前目录下的 config/config.toml 加载模板目录
+    monkeypatch.chdir(tmp_path)
+    catalog = TemplateCatalog(
+        templates, {name: config["display_names"] for name, config in TemplateService.SUPPORTED_TEMPLATES.items()}
+    )
+
+    engine = ProcessRenderEngine(max_workers=1, max_jobs_per_worker=50, temp_dir=str(tmp_path / "out"))
+    try:
+        engine.start()
+        assert engine.render("DHF_INDEX", {}, "zh", ".xlsx", catalog.version) is None
+
+        # 启动后新增模板：主进程重新加载索引，工作进程随任务收到新版本后跟进
+        shutil.copy(TEMPLATES / "excel" / "zh" / "文件･图纸一览.xlsx", templates / "excel" / "zh")
+        catalog.reload()
+        path = engine.render("DHF_INDEX", {"project_name": "P-001"}, "zh", ".xlsx", catalog.version)
+        assert path is not None
+        load_workbook(path)
+    finally:
+        engine.shutdown()
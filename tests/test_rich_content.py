@@ -0,0 +1,70 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from src.domain.fillers.individual_test_spec_filler import IndividualTestSpecFiller
+from src.domain.fillers.project_plan_filler import ProjectPlanFiller
+from src.infrastructure.rich_content import (
+    PART_IMAGE,
+    PART_TABLE,
+    PART_TEXT,
+    ParsedContentCache,
+)
+
+
+MIXED = "\n".join([
+    "前置条件",
+    "",
+    "| 项目 | 值 |",
+    "|---|---|",
+    "| A | 1 |",
+    "| B | 2 |",
+    "",
+    "![image](https://example.com/a.png)",
+    "说明 https://example.com/b.png 结束",
+])
+
+
+def test_individual_test_spec_parts_carry_row_counts():
+    filler = IndividualTestSpecFiller()
+    parsed = filler._parse_content(MIXED)
+    assert filler._parse_content(MIXED) is parsed
+
+    types = [part.type for part in parsed.parts]
+    assert types[:3] == [PART_TEXT, PART_TABLE, PART_IMAGE]
+    table = parsed.parts[1].table
+    assert table.headers == ["项目", "值"] and table.rows == [["A", "1"], ["B", "2"]]
+    assert parsed.parts[1].rows == 3
+    assert parsed.parts[0].text == "前置条件" and parsed.parts[0].rows == 1
+    assert parsed.parts[0].line_widths == (8,)
+    # 片段之间各间隔一行
+    expected = len(parsed.parts) - 1 + sum(part.rows for part in parsed.parts)
+    assert filler._calculate_content_rows(list(parsed.parts)) == expected
+    assert filler._calculate_content_rows([]) == 0
+
+
+def test_project_plan_parsed_content_is_shared_between_prefetch_and_render():
+    filler = ProjectPlanFiller()
+    assert filler._parse_content("普通文本") is None
+    assert filler._parse_content(None) is None
+
+    parsed = filler._parse_content(MIXED)
+    assert filler._parse_content(MIXED) is parsed
+    assert parsed.image_urls == ("https://example.com/a.png", "https://example.com/b.png")
+    assert parsed.image_count == 2
+    text_part = parsed.parts[-1]
+    assert text_part.type == PART_TEXT and text_part.has_inline_images
+    assert [seg.type for seg in text_part.segments] == [PART_TEXT, PART_IMAGE, PART_TEXT]
+    assert filler._collect_image_urls({"field": MIXED, "plain": "文本"}) == list(parsed.image_urls)
+
+    urls = filler._parse_content(["https://example.com/1.png", "ftp://x"])
+    assert [(part.type, part.content) for part in urls.parts] == [(PART_IMAGE, "https://example.com/1.png")]
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ParsedContentCache(maxsize=2)
+    calls = []
+    for key in ("a", "b", "a", "c", "b"):
+        cache.get(key, lambda key=key: calls.append(key) or key.upper())
+    # "a" 被再次访问后保留，"b" 被淘汰后需要重新解析
+    assert calls == ["a", "b", "c", "b"]
@@ -0,0 +1,25 @@
+import os
+import random
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from src.infrastructure.substring_matcher import SubstringMatcher
+
+
+def test_finds_overlapping_and_nested_patterns():
+    matcher = SubstringMatcher(["he", "she", "his", "hers", "", "she"])
+    assert matcher.patterns == ["he", "she", "his", "hers"]
+    assert matcher.find("ushers") == {"he", "she", "hers"}
+    assert matcher.find("包装箱图纸（备注）") == set()
+    assert SubstringMatcher(["包装箱", "图纸", "装箱图"]).find("个装箱图纸") == {"图纸", "装箱图"}
+    assert SubstringMatcher([]).find("任意文本") == set()
+
+
+def test_matches_naive_containment():
+    rng = random.Random(7)
+    alphabet = "ab图纸"
+    patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    matcher = SubstringMatcher(patterns)
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+        assert matcher.find(text) == {p for p in patterns if p in text}
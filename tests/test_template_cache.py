@@ -0,0 +1,82 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from docx import Document
+from openpyxl import Workbook
+
+from src.infrastructure.template_cache import TemplateCache
+
+
+def _make_workbook(path, value):
+    wb = Workbook()
+    wb.active["A1"] = value
+    wb.save(path)
+
+
+def test_workbook_clones_are_independent(tmp_path):
+    path = tmp_path / "t.xlsx"
+    _make_workbook(path, "原始")
+    cache = TemplateCache()
+
+    first = cache.load_workbook(path)
+    first.active["A1"] = "已修改"
+    first.active.column_dimensions["K"].width = 30
+    second = cache.load_workbook(path)
+
+    assert second.active["A1"].value == "原始"
+    assert second.active.column_dimensions["K"].width != 30
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_modified_template_invalidates_entry(tmp_path):
+    path = tmp_path / "t.xlsx"
+    _make_workbook(path, "v1")
+    cache = TemplateCache()
+    assert cache.load_workbook(path).active["A1"].value == "v1"
+
+    _make_workbook(path, "v2")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert cache.load_workbook(path).active["A1"].value == "v2"
+    assert len(cache) == 1
+
+
+def test_document_clones_and_lru_eviction(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"t{i}.docx"
+        doc = Document()
+        doc.add_paragraph(f"模板{i}")
+        doc.save(path)
+        paths.append(path)
+
+    cache = TemplateCache(max_bytes=2 * paths[0].stat().st_size * 8 + 1024)
+    doc = cache.load_document(paths[0])
+    doc.paragraphs[0].text = "已修改"
+    assert cache.load_document(paths[0]).paragraphs[0].text == "模板0"
+
+    cache.load_document(paths[1])
+    cache.load_document(paths[2])
+    assert len(cache) == 2
+    assert cache.total_bytes <= cache.max_bytes
+
+
+def test_document_clones_share_read_only_parts(tmp_path):
+    path = tmp_path / "t.docx"
+    doc = Document()
+    doc.add_paragraph("正文", style="List Bullet")
+    doc.sections[0].header.paragraphs[0].text = "页眉"
+    doc.save(path)
+
+    cache = TemplateCache()
+    first = cache.load_document(path)
+    second = cache.load_document(path)
+
+    # 样式部件共享同一棵 XML 树，正文与页眉各自独立
+    assert first.styles.element is second.styles.element
+    assert first.element is not second.element
+    first.sections[0].header.paragraphs[0].text = "已修改"
+    assert second.sections[0].header.paragraphs[0].text == "页眉"
+    assert second.paragraphs[0].style.name == "List Bullet"
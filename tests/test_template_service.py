@@ -14,3 +14,23 @@ def test_get_template_info():
     assert info is not None
     assert info.get("name") == "DHF_INDEX"
 
+
+
+def test_template_catalog_lookup_and_reload(tmp_path):
+    from src.infrastructure.template_catalog import TemplateCatalog
+
+    (tmp_path / "excel" / "ja").mkdir(parents=True)
+    (tmp_path / "word" / "zh").mkdir(parents=True)
+    (tmp_path / "word" / "zh" / "模板.docx").write_bytes(b"")
+    catalog = TemplateCatalog(tmp_path, {"T": {"zh": "模板", "ja": "テンプレート"}})
+
+    assert catalog.lookup("T", "zh") == (tmp_path / "word" / "zh" / "模板.docx", "word")
+    assert catalog.lookup("T", "ja") is None
+    assert catalog.lookup("T", "zh", "excel") is None
+    assert catalog.languages("T") == ["zh"]
+
+    (tmp_path / "excel" / "ja" / "テンプレート.xlsx").write_bytes(b"")
+    assert catalog.lookup("T", "ja") is None
+    catalog.reload()
+    assert catalog.lookup("T", "ja") == (tmp_path / "excel" / "ja" / "テンプレート.xlsx", "excel")
+    assert catalog.languages("T") == ["zh", "ja"]
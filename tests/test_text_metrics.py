@@ -0,0 +1,54 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from openpyxl import Workbook
+
+from src.infrastructure.text_metrics import (
+    column_line_counts,
+    count_lines,
+    glyph_units,
+    line_capacity,
+    line_widths,
+    sheet_text_metrics,
+    wrapped_line_count,
+)
+
+
+def test_wide_glyphs_count_double():
+    assert glyph_units("abc") == 3
+    assert glyph_units("测试ab") == 6
+    assert glyph_units("テスト（全角）") == 14
+    assert glyph_units("ｶﾀｶﾅ") == 4  # 半角片假名
+    assert glyph_units("𠀀") == 2
+    assert line_widths("") == ()
+    assert line_widths("ab\n\n中文") == (2, 0, 4)
+
+
+def test_line_counts():
+    # 列宽 10 -> 每行容量 17
+    assert line_capacity(10) == 17
+    assert line_capacity(0.1) == 1
+    assert count_lines("", 10) == 1
+    assert count_lines("a" * 17, 10) == 1
+    assert count_lines("a" * 18, 10) == 2
+    assert count_lines("中" * 9, 10) == 2
+    assert count_lines("a\n\nb", 10) == 3
+    assert wrapped_line_count((), 10) == 1
+    texts = ["", "a" * 40, "中" * 9, "x\ny"]
+    assert column_line_counts(texts, 10) == [count_lines(t, 10) for t in texts] == [1, 3, 2, 2]
+
+
+def test_sheet_column_widths_are_cached():
+    ws = Workbook().active
+    ws.column_dimensions["C"].width = 20
+    ws.column_dimensions["D"].width = 0
+    metrics = sheet_text_metrics(ws)
+    assert sheet_text_metrics(ws) is metrics
+    assert metrics.column_width(3, 8) == 20
+    # 宽度为 0 时使用默认值；未设置的列沿用 openpyxl 的默认列宽
+    assert metrics.column_widths(2, 4, 8) == [ws.column_dimensions["B"].width, 20, 8]
+    assert metrics.span_width(3, 4, 8) == 28
+    ws.merge_cells("C5:D6")
+    assert metrics.cell_width(6, 3, 8) == 28
+    assert metrics.cell_width(7, 3, 8) == 20
@@ -0,0 +1,54 @@
+import os
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from openpyxl import Workbook
+from openpyxl.cell.cell import MergedCell
+
+from src.infrastructure.merged_cells import merged_cell_index
+from src.infrastructure.worksheet_layout import insert_row_blocks
+
+
+def _make_sheet():
+    ws = Workbook().active
+    for row in range(1, 13):
+        ws.cell(row, 1, f"A{row}")
+        ws.row_dimensions[row].height = 10 + row
+    ws.merge_cells("B2:C2")
+    ws.merge_cells("B6:C7")
+    ws.merge_cells("D4:D6")
+    ws.merge_cells("B10:C10")
+    return ws
+
+
+def _values(ws):
+    return {(c.row, c.column): c.value for row in ws.iter_rows() for c in row if c.value is not None}
+
+
+def test_matches_successive_insert_rows():
+    ws = _make_sheet()
+    expected = _make_sheet()
+    # 自下而上插入，前面的行号不受影响
+    expected.insert_rows(9, amount=3)
+    expected.insert_rows(5, amount=2)
+
+    insert_row_blocks(ws, [(5, 2), (9, 3), (7, 0)])
+    assert _values(ws) == _values(expected)
+
+
+def test_moves_merged_ranges_and_row_heights():
+    ws = _make_sheet()
+    index = merged_cell_index(ws)
+    insert_row_blocks(ws, [(5, 2), (9, 3)])
+
+    assert sorted(str(r) for r in ws.merged_cells.ranges) == ["B15:C15", "B2:C2", "B8:C9", "D4:D8"]
+    # 跨越插入位置的合并区域向下扩展，扩展出的行为 MergedCell
+    assert isinstance(ws.cell(6, 4), MergedCell)
+    assert index.top_left(7, 4).coordinate == "D4"
+    assert str(index.find(15, 3)) == "B15:C15"
+
+    heights = {row: ws.row_dimensions[row].height for row in range(1, 18)}
+    # 原第 5 行移到第 7 行；插入的第 5～6 行沿用原第 4 行的行高
+    assert [heights[r] for r in (4, 5, 6, 7)] == [14, 14, 14, 15]
+    # 原第 9 行移到第 14 行；插入的第 11～13 行沿用原第 8 行（现第 10 行）的行高
+    assert [heights[r] for r in (10, 11, 12, 13, 14, 17)] == [18, 18, 18, 18, 19, 22]
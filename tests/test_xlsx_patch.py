@@ -0,0 +1,86 @@
+import io
+import os
+from copy import copy
+
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+import pytest
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.cell import MergedCell
+from openpyxl.styles import Alignment, PatternFill
+
+from src.infrastructure.template_cache import TemplateCache
+from src.infrastructure.template_service import XLSX_ENGINE_PATCH, ExcelTemplateFiller
+from src.infrastructure.xlsx_patch import PatchedWorksheet, UnsupportedPatchOperation
+
+FILL = PatternFill(fill_type="solid", fgColor="FF739FD7")
+
+
+def _make_template(path):
+    wb = Workbook()
+    wb.create_sheet("其他")
+    ws = wb.active
+    ws["A1"] = "名称"
+    ws["B1"] = "旧值"
+    ws["B1"].alignment = Alignment(horizontal="center")
+    ws["A3"] = "=1+1"
+    ws["D5"] = "结束"
+    ws.merge_cells("A2:B2")
+    wb.save(path)
+
+
+def test_patched_workbook_matches_openpyxl_semantics(tmp_path):
+    path = tmp_path / "t.xlsx"
+    _make_template(path)
+    cache = TemplateCache()
+    ws = PatchedWorksheet(cache.xlsx_patch_template(path))
+
+    assert ws["A1"].value == "名称"
+    assert isinstance(ws.cell(2, 2), MergedCell)
+    assert [str(r) for r in ws.merged_cells.ranges] == ["A2:B2"]
+
+    ws["B1"].value = "新值 <&>\n第二行"
+    alignment = copy(ws["B1"].alignment)
+    alignment.wrap_text = True
+    ws["B1"].alignment = alignment
+    ws["B1"].fill = FILL
+    ws["C1"].value = "同行新增"
+    ws.cell(3, 2).value = "已有行"
+    ws.cell(4, 2).value = "新行"
+    ws["C1"].fill = FILL
+    output = io.BytesIO()
+    ws.save(output)
+
+    result = load_workbook(output)
+    sheet = result.active
+    assert result.sheetnames == ["Sheet", "其他"]
+    assert sheet["B1"].value == "新值 <&>\n第二行"
+    assert sheet["B1"].alignment.horizontal == "center" and sheet["B1"].alignment.wrap_text
+    assert sheet["B1"].fill.fgColor.rgb == "FF739FD7"
+    assert sheet["C1"].value == "同行新增" and sheet["C1"].fill.fgColor.rgb == "FF739FD7"
+    assert [sheet["B3"].value, sheet["B4"].value] == ["已有行", "新行"]
+    assert sheet["A3"].value == "=1+1"
+    assert sheet["D5"].value == "结束"
+    assert [str(r) for r in sheet.merged_cells.ranges] == ["A2:B2"]
+
+
+def test_unsupported_operations_fall_back_to_openpyxl(tmp_path):
+    path = tmp_path / "t.xlsx"
+    _make_template(path)
+    cache = TemplateCache()
+
+    ws = PatchedWorksheet(cache.xlsx_patch_template(path))
+    with pytest.raises(UnsupportedPatchOperation):
+        ws.insert_rows(1)
+    ws["A3"].value = "覆盖公式"
+    with pytest.raises(UnsupportedPatchOperation):
+        ws.save(io.BytesIO())
+
+    def fill(worksheet):
+        worksheet["A1"].value = "已填充"
+        worksheet.insert_rows(1)
+
+    filler = ExcelTemplateFiller(engine=XLSX_ENGINE_PATCH)
+    output = io.BytesIO()
+    filler._fill_active_sheet(path, output, fill)
+    assert load_workbook(output).active["A2"].value == "已填充"
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for placeholder substitution on the shipped templates.
+
+Usage:
+    python tools/bench_placeholders.py [--rounds N]
+
+Collects every string cell of the Excel templates and every paragraph of the Word
+templates under static/templates, then times the previous per-call implementations
+(two re.sub passes / per-key str.replace plus an alternation regex per paragraph)
+against the shared engine in src/infrastructure/placeholders.py.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("SKIP_INFRA_INIT", "1")
+
+from docx import Document  # noqa: E402
+from openpyxl import load_workbook  # noqa: E402
+
+from src.infrastructure.placeholders import DOCX_PLACEHOLDERS, render_segments  # noqa: E402
+from src.infrastructure.template_service import ExcelTemplateFiller  # noqa: E402
+
+MISSING_TEXTS = {
+    "zh": "AI未检索到，需人工确认",
+    "ja": "AIで検索できませんでした。要手動確認",
+    "en": "AI could not retrieve this; manual confirmation required",
+}
+
+
+def legacy_replace_placeholders(text: str, parameters: Dict[str, str]) -> str:
+    """Previous TemplateFillerStrategy._replace_placeholders."""
+
+    def replace(match):
+        placeholder = match.group(1).strip()
+        if placeholder in parameters:
+            value = parameters[placeholder]
+            if value is None or value.strip() == "" or value.strip() in set(MISSING_TEXTS.values()):
+                return MISSING_TEXTS["zh"]
+            return str(value)
+        return match.group(0)
+
+    text = re.sub(r"\{\{([^}]+)\}\}", replace, text)
+    return re.sub(r"\{([^}]+)\}", replace, text)
+
+
+def legacy_docx_segments(full_text: str, flat_parameters: Dict[str, str]) -> List[Tuple[str, bool]]:
+    """Previous VerificationPlanFiller/ProjectPlanFiller._replace_in_paragraph (text part)."""
+    ideal_text = full_text
+    for key, value in flat_parameters.items():
+        ideal_text = ideal_text.replace(f"{{{{{key}}}}}", value)
+    if ideal_text == full_text:
+        return []
+    placeholder_re = re.compile(r"\{\{(" + "|".join(re.escape(k) for k in flat_parameters) + r")\}\}")
+    segments = []
+    for i, part in enumerate(placeholder_re.split(full_text)):
+        if i % 2 == 0:
+            if part:
+                segments.append((part, False))
+        elif flat_parameters.get(part, ""):
+            segments.append((flat_parameters[part], True))
+    return segments
+
+
+def engine_docx_segments(full_text: str, flat_parameters: Dict[str, str]) -> List[Tuple[str, bool]]:
+    segments = render_segments(DOCX_PLACEHOLDERS.split(full_text), flat_parameters.get)
+    if "".join(text for text, _ in segments) == full_text:
+        return []
+    return segments
+
+
+def collect_texts() -> Tuple[List[str], List[str]]:
+    base = ROOT / "static" / "templates"
+    cell_texts: List[str] = []
+    for path in sorted(base.glob("excel/**/*.xlsx")):
+        workbook = load_workbook(path)
+        for worksheet in workbook.worksheets:
+            for row in worksheet.iter_rows():
+                cell_texts.extend(c.value for c in row if c.value and isinstance(c.value, str))
+    paragraph_texts: List[str] = []
+    for path in sorted(base.glob("word/**/*.docx")):
+        doc = Document(path)
+        paragraphs = list(doc.paragraphs)
+        for table in doc.tables:
+            for row in table.rows:
+                for cell in row.cells:
+                    paragraphs.extend(cell.paragraphs)
+        paragraph_texts.extend(p.text for p in paragraphs if p.text)
+    return cell_texts, paragraph_texts
+
+
+def bench(label: str, func: Callable[[], object], rounds: int) -> float:
+    func()  # warm-up (fills the engine's split cache, like a second request)
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    elapsed = (time.perf_counter() - started) / rounds
+    print(f"  {label:<8} {elapsed * 1000:9.3f} ms/render")
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    import warnings
+    warnings.simplefilter("ignore")
+    cell_texts, paragraph_texts = collect_texts()
+
+    keys = set()
+    for text in cell_texts + paragraph_texts:
+        keys.update(DOCX_PLACEHOLDERS.keys(text))
+    parameters = {key: f"value of {key}" for key in sorted(keys)}
+    # Flattened request payloads usually carry a few hundred fields
+    parameters.update({f"extra_field_{i}": f"extra {i}" for i in range(150)})
+
+    filler = ExcelTemplateFiller()
+    print(f"Excel cells: {len(cell_texts)} strings")
+    old = bench("legacy", lambda: [legacy_replace_placeholders(t, parameters) for t in cell_texts], args.rounds)
+    new = bench("engine", lambda: [filler._replace_placeholders(t, parameters) for t in cell_texts], args.rounds)
+    print(f"  speedup  {old / new:9.1f}x")
+
+    print(f"Word paragraphs: {len(paragraph_texts)} ({len(parameters)} parameters)")
+    old = bench("legacy", lambda: [legacy_docx_segments(t, parameters) for t in paragraph_texts], args.rounds)
+    new = bench("engine", lambda: [engine_docx_segments(t, parameters) for t in paragraph_texts], args.rounds)
+    print(f"  speedup  {old / new:9.1f}x")
+
+    for text in cell_texts:
+        assert legacy_replace_placeholders(text, parameters) == filler._replace_placeholders(text, parameters), text
+    for text in paragraph_texts:
+        assert legacy_docx_segments(text, parameters) == engine_docx_segments(text, parameters), text
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())